@@ -0,0 +1,371 @@
+import argparse
+import io
+import json
+import multiprocessing
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from PIL.Image import Image
+from PIL import Image as Img
+from PIL import ImageChops
+import PIL
+import numpy as np
+
+from texture_packer import ArrayWriter, Config, PackChItem, SuffixMatcher, TexturePacker
+
+description = '''\
+Performance benchmarks for texture packer.
+|Benchmarks:
+    engine - channel packing engine (NumPy gather) against PIL split/merge packing, ORM layout
+    suffix - suffix matcher against linear endswith() scan on synthetic file names
+    suite  - end to end pack_textures runs on generated material sets: presets x formats x bit depths x sizes,
+             per stage timings, throughput and peak RSS (every case runs in a fresh process)
+    startup - import time of texture_packer (python -X importtime) and wall time of validate only (--plan --validate)
+             command line runs, which never load PIL or NumPy
+'''
+
+ORM_LAYOUT = [PackChItem("_ao", 0), PackChItem("_roughness", 0), PackChItem("_metallic", 0, invert=True)]
+
+
+def legacy_pack_texture(images:dict[str,Image], pack_items:list[PackChItem])->Image:
+    '''Previous PIL packing path: split every source band, invert with ImageChops, merge'''
+    band_lookup = {suffix:img.split() for suffix, img in images.items()}
+    black_ch = Img.new("L", next(iter(band_lookup.values()))[0].size, 0)
+    ch_bands = []
+    for item in pack_items:
+        g_tex = band_lookup.get(item.suffix, [])
+        if item.ch < len(g_tex):
+            bnd = g_tex[item.ch]
+            if bnd.mode == "I":
+                bnd = Img.fromarray(np.uint8(np.array(bnd) / 256))
+            ch_bands.append(bnd if not item.invert else ImageChops.invert(bnd))
+        else:
+            ch_bands.append(black_ch)
+    if len(ch_bands) == 2:
+        ch_bands.pop()
+    return Img.merge({1:"L", 3:"RGB", 4:"RGBA"}[len(ch_bands)], ch_bands)
+
+
+def engine_pack_texture(packer:TexturePacker, images:dict[str,Image], pack_items:list[PackChItem])->Image:
+    band_lookup = {suffix:packer.image_to_array(img) for suffix, img in images.items()}
+    return packer.pack_texture(band_lookup, pack_items)
+
+
+def legacy_suffix_index(name:str, suffixes:list[str])->tuple[str, int]:
+    '''Previous suffix lookup: endswith() for every suffix, suffixes sorted long>short'''
+    name = name.lower()
+    for s in suffixes:
+        if name.endswith(s):
+            return s, len(name) - len(s)
+    return None, -1
+
+
+def preset_suffixes(aliases:int, seed:int=0)->list[str]:
+    '''Suffixes of presets plus random studio-specific aliases'''
+    config = Config()
+    config.apply_preset("unity")
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz0123456789"))
+    suffixes = list(config.map_suffixes)
+    while len(suffixes) < len(config.map_suffixes) + aliases:
+        alias = "_" + "".join(rng.choice(letters, rng.integers(2, 18)))
+        if alias not in suffixes:
+            suffixes.append(alias)
+    return suffixes
+
+
+def synthetic_names(count:int, suffixes:list[str], seed:int=0)->list[str]:
+    '''File stems: random material names with a known suffix (about 5% without valid suffix)'''
+    rng = np.random.default_rng(seed)
+    materials = [f"Material_{i:05d}_Var{i % 7}" for i in range(max(count // 10, 1))]
+    picks = rng.integers(0, len(suffixes), count)
+    mats = rng.integers(0, len(materials), count)
+    invalid = rng.random(count) < 0.05
+    return [materials[m] + ("_Preview" if bad else suffixes[p].upper() if p % 2 else suffixes[p]) for m, p, bad in zip(mats, picks, invalid)]
+
+
+def bench_suffix(count:int, aliases:int, repeat:int)->list[dict]:
+    suffixes = preset_suffixes(aliases)
+    names = synthetic_names(count, suffixes)
+    sorted_suffixes = sorted(suffixes, key=lambda x: len(x), reverse=True)
+    t = time.perf_counter()
+    matcher = SuffixMatcher(suffixes)
+    build_s = time.perf_counter() - t
+
+    legacy = [legacy_suffix_index(n, sorted_suffixes) for n in names[:100000]]
+    if legacy != [matcher.match(n) for n in names[:100000]]:
+        print("[!] Suffix matcher results differ from linear scan")
+
+    row = {"benchmark":"suffix", "names":count, "suffixes":len(suffixes), "repeat":repeat, "matcher_build_s":build_s}
+    for name, fn in (("linear", lambda: [legacy_suffix_index(n, sorted_suffixes) for n in names]), ("matcher", lambda: [matcher.match(n) for n in names])):
+        times = time_call(fn, repeat)
+        row[name] = {"best_s":min(times), "median_s":statistics.median(times), "names_per_s":count / min(times)}
+    row["speedup"] = row["linear"]["best_s"] / row["matcher"]["best_s"]
+    print(f"[*] {count} names, {len(suffixes)} suffixes: linear {row['linear']['best_s']:.2f} s, matcher {row['matcher']['best_s']:.2f} s, x{row['speedup']:.1f}")
+    return [row]
+
+
+def synthetic_sources(size:int, suffixes:list[str], mode:str="L", seed:int=0)->dict[str,Image]:
+    rng = np.random.default_rng(seed)
+    channels = {"L":1, "RGB":3, "RGBA":4}[mode]
+    sources = {}
+    for suffix in suffixes:
+        arr = rng.integers(0, 256, (size, size, channels), dtype=np.uint8)
+        sources[suffix] = Img.fromarray(arr.reshape(size, size) if channels == 1 else arr)
+    return sources
+
+
+def time_call(fn, repeat:int)->list[float]:
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def bench_engine(sizes:list[int], repeat:int, mode:str)->list[dict]:
+    packer = TexturePacker()
+    results = []
+    for size in sizes:
+        images = synthetic_sources(size, ["_ao", "_roughness", "_metallic"], mode)
+        for img in images.values():
+            img.load()
+        if not np.array_equal(np.asarray(legacy_pack_texture(images, ORM_LAYOUT)), np.asarray(engine_pack_texture(packer, images, ORM_LAYOUT))):
+            print(f"[!] Engine output differs from legacy output at {size}px")
+
+        row = {"benchmark":"engine", "size":size, "source_mode":mode, "repeat":repeat}
+        for name, fn in (("legacy", lambda: legacy_pack_texture(images, ORM_LAYOUT)), ("numpy", lambda: engine_pack_texture(packer, images, ORM_LAYOUT))):
+            times = time_call(fn, repeat)
+            row[name] = {"best_s":min(times), "median_s":statistics.median(times), "mpix_per_s":size * size / 1e6 / min(times)}
+        row["speedup"] = row["legacy"]["best_s"] / row["numpy"]["best_s"]
+        print(f"[*] ORM {size}x{size} ({mode} sources): legacy {row['legacy']['best_s']*1000:.1f} ms, numpy {row['numpy']['best_s']*1000:.1f} ms, x{row['speedup']:.2f}")
+        results.append(row)
+    return results
+
+
+# source map suffixes of material sets, all of them are recognized by every preset
+SUFFIX_CONVENTIONS = {
+    "standard":("", {"albedo":"_albedo", "normal":"_normal", "roughness":"_roughness", "ao":"_ao", "metallic":"_metallic", "height":"_height"}),
+    "unreal":("T_", {"albedo":"_D", "normal":"_N", "roughness":"_R", "ao":"_O", "metallic":"_M", "height":"_Disp"}),
+    "substance":("", {"albedo":"_BaseColor", "normal":"_Normal", "roughness":"_Roughness", "ao":"_AmbientOcclusion", "metallic":"_Metallic", "height":"_Height"}),
+}
+MATERIAL_MAPS = [("albedo", 3), ("normal", 3), ("roughness", 1), ("ao", 1), ("metallic", 1), ("height", 1)]
+PIL_FORMATS = {"png":"PNG", "jpg":"JPEG", "tga":"TGA", "bmp":"BMP", "tiff":"TIFF"}
+
+
+def synthetic_texture(size:int, channels:int, dtype:np.dtype, seed:int)->np.ndarray:
+    '''Smooth pattern with light noise (compresses like real texture data, unlike pure noise), generated in row strips'''
+    rng = np.random.default_rng(seed)
+    freq = rng.uniform(2, 12, (2, channels))
+    coords = np.linspace(0, 2 * np.pi, size, dtype=np.float32)
+    cols = np.sin(coords[:, None] * freq[0]) * 0.5 + 0.5 #W x C
+    top = np.iinfo(dtype).max
+    arr = np.empty((size, size, channels), dtype)
+    for r in range(0, size, 1024):
+        rows = np.cos(coords[r:r + 1024, None] * freq[1]) * 0.25 + 0.5 #H x C
+        strip = rows[:, None, :] * cols[None, :, :] + rng.normal(0, 0.01, (len(rows), size, channels)).astype(np.float32)
+        arr[r:r + 1024] = np.clip(strip, 0, 1) * top
+    return arr
+
+
+def generate_material_set(dest:Path, count:int, size:int, bit_depth:str, fmt:str, convention:str)->Path:
+    '''Write count materials (6 maps each) to dest, existing complete set is reused'''
+    marker = dest.joinpath(".complete")
+    if marker.exists():
+        return dest
+    dest.mkdir(parents=True, exist_ok=True)
+    prefix, suffixes = SUFFIX_CONVENTIONS[convention]
+    dtype = np.uint16 if bit_depth == "16" else np.uint8
+    for i in range(count):
+        for k, (name, channels) in enumerate(MATERIAL_MAPS):
+            arr = synthetic_texture(size, channels, dtype, seed=i * len(MATERIAL_MAPS) + k)
+            path = dest.joinpath(f"{prefix}Material{i:04d}{suffixes[name]}.{fmt}")
+            if dtype == np.uint16:
+                ArrayWriter().write(path, arr, fmt)
+            else:
+                Img.fromarray(arr[:, :, 0] if channels == 1 else arr).save(path, PIL_FORMATS[fmt])
+    marker.write_text("")
+    return dest
+
+
+def peak_rss()->int:
+    '''Peak resident set size of this process and its finished children (worker processes) in bytes, None if unknown'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024 #ru_maxrss is in KB on Linux
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def run_case(case:dict)->dict:
+    '''Run pack_textures for one case (called in a fresh process, so peak RSS belongs to this case only)'''
+    config = Config()
+    packer = TexturePacker()
+    with redirect_stdout(io.StringIO()):
+        config.apply_preset(case["preset"])
+        config.src_dir = case["src_dir"]
+        config.dest_dir = case["dest_dir"]
+        config.output_format = case["output_format"]
+        config.bit_depth = case["bit_depth"]
+        config.jobs = case["jobs"]
+        config.extensions = ["." + case["source_format"]]
+        t = time.perf_counter()
+        packer.pack_textures(config)
+        wall = time.perf_counter() - t
+    outputs = sum(1 for p in Path(case["dest_dir"]).iterdir() if p.is_file() and not p.name.startswith(".") and p.suffix != ".jsonl")
+    return {"wall_s":wall, "stages_s":packer.stage_times, "outputs":outputs, "peak_rss":peak_rss()}
+
+
+def bench_suite(args)->list[dict]:
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="texture_packer_bench_"))
+    versions = {"python":sys.version.split()[0], "numpy":np.__version__, "pillow":PIL.__version__}
+    spawn = multiprocessing.get_context("spawn")
+    results = []
+    try:
+        for size in args.sizes:
+            for bit_depth in args.bit_depths:
+                for source_format in args.formats:
+                    if bit_depth != "8" and source_format not in ArrayWriter.FORMATS["16"]:
+                        print(f"[!] Skip {source_format} sources at {bit_depth} bit (8 bit only format)")
+                        continue
+                    source_bits = "8" if bit_depth == "8" else "16"
+                    for convention in args.conventions:
+                        src = work_dir.joinpath("sets", f"{convention}_{source_format}_{source_bits}bit_{size}px_x{args.count}")
+                        t = time.perf_counter()
+                        generate_material_set(src, args.count, size, source_bits, source_format, convention)
+                        print(f"[*] Material set: {src.name} ({time.perf_counter() - t:.1f} s)")
+                        for preset in args.presets:
+                            for output_format in args.output_formats:
+                                if bit_depth != "8" and output_format not in ArrayWriter.FORMATS[bit_depth]:
+                                    print(f"[!] Skip {output_format} output at {bit_depth} bit")
+                                    continue
+                                dest = work_dir.joinpath("out")
+                                case = {"preset":preset, "source_format":source_format, "output_format":output_format, "bit_depth":bit_depth,
+                                        "size":size, "count":args.count, "convention":convention, "jobs":args.jobs,
+                                        "src_dir":str(src), "dest_dir":str(dest)}
+                                runs = []
+                                for _ in range(args.repeat):
+                                    shutil.rmtree(dest, ignore_errors=True)
+                                    with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                                        runs.append(executor.submit(run_case, case).result())
+                                best = min(runs, key=lambda r: r["wall_s"])
+                                source_mpix = args.count * len(MATERIAL_MAPS) * size * size / 1e6
+                                row = {"benchmark":"suite", **{k:v for k, v in case.items() if k not in ("src_dir", "dest_dir")}, "repeat":args.repeat,
+                                       "wall_s":best["wall_s"], "median_wall_s":statistics.median(r["wall_s"] for r in runs),
+                                       "stages_s":best["stages_s"], "outputs":best["outputs"],
+                                       "source_mpix_per_s":source_mpix / best["wall_s"], "groups_per_s":args.count / best["wall_s"],
+                                       "peak_rss_mb":None if best["peak_rss"] == None else best["peak_rss"] / (1 << 20), "versions":versions}
+                                stages = " ".join(f"{k} {v:.2f}" for k, v in best["stages_s"].items())
+                                rss = "" if row["peak_rss_mb"] == None else f", peak RSS {row['peak_rss_mb']:.0f} MB"
+                                print(f"[*] {preset} {source_format}>{output_format} {bit_depth} bit {size}px x{args.count}: {best['wall_s']:.2f} s, "
+                                      f"{row['source_mpix_per_s']:.1f} MP/s, {row['groups_per_s']:.2f} groups/s{rss} | {stages}")
+                                results.append(row)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(work_dir.joinpath("out"), ignore_errors=True)
+    return results
+
+
+PACKER_SCRIPT = Path(__file__).resolve().parent.joinpath("texture_packer.py")
+
+
+def import_times(code:str)->dict[str,int]:
+    '''Cumulative import time in microseconds of every top level module imported by code in a fresh interpreter (python -X importtime)'''
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PACKER_SCRIPT.parent, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            if name.strip() == name.lstrip(" ") and not name.startswith("  "): #top level import
+                times[name.strip()] = int(parts[1])
+    return times
+
+
+def bench_startup(args)->list[dict]:
+    work_dir = Path(tempfile.mkdtemp(prefix="texture_packer_startup_"))
+    results = []
+    try:
+        src = generate_material_set(work_dir.joinpath("src"), args.count, 64, "8", "png", "standard")
+        imports = [import_times("import texture_packer") for _ in range(args.repeat)]
+        best = min(imports, key=lambda t: t.get("texture_packer", 0))
+        heavy = import_times("import numpy, PIL.Image")
+        heavy_us = heavy.get("numpy", 0) + heavy.get("PIL.Image", 0)
+        loaded = [name for name in ("numpy", "PIL.Image") if name in best]
+        row = {"benchmark":"startup", "case":"import", "repeat":args.repeat, "import_ms":best.get("texture_packer", 0) / 1000,
+               "numpy_pil_import_ms":heavy_us / 1000, "heavy_modules_loaded":loaded}
+        print(f"[*] import texture_packer: {row['import_ms']:.1f} ms, numpy + PIL.Image {'loaded' if loaded else 'not loaded'} "
+              f"(they take {row['numpy_pil_import_ms']:.1f} ms when imported eagerly)")
+        results.append(row)
+        cmd = [sys.executable, str(PACKER_SCRIPT), "-p", "orm", "-s", str(src), "-d", str(work_dir.joinpath("out")), "--plan", "--validate"]
+        times = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            subprocess.run(cmd, capture_output=True, check=True)
+            times.append(time.perf_counter() - t)
+        row = {"benchmark":"startup", "case":"validate", "count":args.count, "repeat":args.repeat,
+               "wall_s":min(times), "median_wall_s":statistics.median(times)}
+        print(f"[*] --plan --validate, {args.count} groups: {row['wall_s'] * 1000:.0f} ms (median {row['median_wall_s'] * 1000:.0f} ms)")
+        results.append(row)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = ArgumentParser(epilog=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to JSON file")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+    eng = sub.add_parser("engine", help="Channel packing engine: NumPy gather against PIL split/merge")
+    eng.add_argument("--sizes", type=int, nargs="+", default=[4096, 8192], help="Texture sizes in pixels. Default 4096 8192")
+    eng.add_argument("--repeat", type=int, default=3, help="Repeat count, best and median time reported. Default 3")
+    eng.add_argument("--source-mode", dest="source_mode", default="L", choices=["L", "RGB", "RGBA"], help="Mode of synthetic source images. Default L")
+    suf = sub.add_parser("suffix", help="Suffix matcher against linear endswith() scan")
+    suf.add_argument("--names", type=int, default=1000000, help="Synthetic file name count. Default 1000000")
+    suf.add_argument("--aliases", type=int, default=400, help="Random suffix aliases added to preset suffixes. Default 400")
+    suf.add_argument("--repeat", type=int, default=1, help="Repeat count. Default 1")
+    sui = sub.add_parser("suite", help="End to end pack_textures runs on generated material sets")
+    sui.add_argument("--count", type=int, default=8, help="Materials (groups) per set. Default 8")
+    sui.add_argument("--sizes", type=int, nargs="+", default=[1024, 2048], help="Texture sizes in pixels (1K-8K). Default 1024 2048")
+    sui.add_argument("--bit-depths", dest="bit_depths", nargs="+", default=["8"], choices=["8", "16", "32f"], help="Source and output bit depths (16 bit sources for 16/32f). Default 8")
+    sui.add_argument("--formats", nargs="+", default=["png"], choices=list(PIL_FORMATS), help="Source formats. Default png")
+    sui.add_argument("--output-formats", dest="output_formats", nargs="+", default=["png"], choices=["png", "jpg", "tga", "bmp", "tiff"], help="Output formats. Default png")
+    sui.add_argument("--presets", nargs="+", default=["orm", "ord", "unity", "unreal"], choices=["orm", "ord", "unity", "unreal"], help="Presets to run. Default all")
+    sui.add_argument("--conventions", nargs="+", default=["standard"], choices=list(SUFFIX_CONVENTIONS), help="Source suffix conventions. Default standard")
+    sui.add_argument("-j", "--jobs", type=int, default=1, help="Packer worker processes. Default 1")
+    sui.add_argument("--repeat", type=int, default=1, help="Repeat count, best run reported. Default 1")
+    sui.add_argument("--work-dir", dest="work_dir", default=None, help="Keep generated material sets in this directory and reuse them in next runs. Default temporary directory")
+    sta = sub.add_parser("startup", help="Import time and validate only command line runs")
+    sta.add_argument("--count", type=int, default=32, help="Materials (groups) in validated set. Default 32")
+    sta.add_argument("--repeat", type=int, default=5, help="Repeat count, best and median time reported. Default 5")
+    args = parser.parse_args()
+
+    results = []
+    if args.benchmark == "engine":
+        results = bench_engine(args.sizes, args.repeat, args.source_mode)
+    elif args.benchmark == "suffix":
+        results = bench_suffix(args.names, args.aliases, args.repeat)
+    elif args.benchmark == "suite":
+        results = bench_suite(args)
+    elif args.benchmark == "startup":
+        results = bench_startup(args)
+
+    if args.json_path != None:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print("[+] Save: " + args.json_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import struct
+import subprocess
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = ROOT / "texture_packer.py"
+sys.path.insert(0, str(ROOT))
+
+SIZE = (40, 24) #width, height, not a multiple of DDS block and strip sizes
+MATERIALS = ("Rock", "Wood_Planks", "Metal")
+GRAY_MAPS = ("_ao", "_roughness", "_metallic", "_height")
+
+
+def make_source(seed:int, channels:int, size:tuple[int,int]=SIZE)->np.ndarray:
+    """Deterministic source: smooth gradients with noise, HxW (channels=1) or HxWxC uint8"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    planes = [(x * (37 + 11 * c) + y * (53 + 7 * c) + seed * 31) % 256 for c in range(channels)]
+    arr = np.clip(np.stack(planes, axis=2) + rng.integers(-12, 13, (height, width, channels)), 0, 255).astype(np.uint8)
+    return arr[:, :, 0] if channels == 1 else arr
+
+
+def write_material(src_dir:Path, name:str, seed:int, size:tuple[int,int]=SIZE):
+    Image.fromarray(make_source(seed, 3, size)).save(src_dir / f"{name}_albedo.png")
+    Image.fromarray(make_source(seed + 1, 3, size)).save(src_dir / f"{name}_normal.png")
+    for i, suffix in enumerate(GRAY_MAPS):
+        Image.fromarray(make_source(seed + 2 + i, 1, size)).save(src_dir / f"{name}{suffix}.png")
+
+
+@pytest.fixture
+def src_dir(tmp_path:Path)->Path:
+    src = tmp_path / "src"
+    src.mkdir()
+    for i, name in enumerate(MATERIALS):
+        write_material(src, name, 10 * i)
+    return src
+
+
+def run(*argv:str, status:int=0)->str:
+    """Command line run of the script, returns its console output, run with other exit status raises SystemExit with it"""
+    proc = subprocess.run([sys.executable, str(SCRIPT)] + [str(arg) for arg in argv], stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    if proc.returncode != status:
+        print(proc.stdout + proc.stderr)
+        raise SystemExit(proc.returncode)
+    return proc.stdout
+
+
+def read_tiff(path:Path)->np.ndarray:
+    """HxWxC pixels of uncompressed or deflate compressed chunky little endian TIFF (PIL can`t read 16 bit RGB and float TIFF)"""
+    data = path.read_bytes()
+    assert data[:4] == b"II*\x00"
+    ifd = struct.unpack_from("<I", data, 4)[0]
+    tags = {}
+    for i in range(struct.unpack_from("<H", data, ifd)[0]):
+        tag, typ, count, value = struct.unpack_from("<HHI4s", data, ifd + 2 + i * 12)
+        fmt = "H" if typ == 3 else "I"
+        size = count * struct.calcsize(fmt)
+        raw = value[:size] if size <= 4 else data[struct.unpack("<I", value)[0]:][:size]
+        tags[tag] = struct.unpack("<%d%s" % (count, fmt), raw)
+    width, height, channels, bits = tags[256][0], tags[257][0], tags.get(277, (1,))[0], tags[258][0]
+    dtype = np.dtype(("<f" if tags.get(339, (1,))[0] == 3 else "<u") + str(bits // 8))
+    strips = [data[offset:offset + count] for offset, count in zip(tags[273], tags[279])]
+    if tags.get(259, (1,))[0] in (8, 32946):
+        strips = [zlib.decompress(strip) for strip in strips]
+    return np.frombuffer(b"".join(strips), dtype).reshape(height, width, channels)
+
+
+def read_pixels(path:Path)->np.ndarray:
+    """HxWxC pixels of output file"""
+    if path.suffix.lower() in (".tif", ".tiff"):
+        return read_tiff(path)
+    with Image.open(path) as img:
+        arr = np.asarray(img).copy()
+    return arr[:, :, np.newaxis] if arr.ndim == 2 else arr
+
+
+def output_files(dest:Path)->dict[str,Path]:
+    """Outputs of a run by path relative to dest (journal, manifest and other dot files excluded)"""
+    return {p.relative_to(dest).as_posix():p for p in sorted(dest.rglob("*")) if p.is_file() and not p.name.startswith(".")}
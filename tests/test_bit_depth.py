@@ -0,0 +1,116 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import SIZE, make_source, read_pixels, run
+
+LAYOUT = """[settings]
+[filters]
+.png
+[map suffixes]
+_albedo
+_ao
+_roughness
+[pack]
+_mix > _ao:r | _roughness:r* | _albedo:g
+""" #16 bit, inverted 16 bit and 8 bit channels
+
+
+@pytest.fixture
+def mixed_dir(tmp_path):
+    """One material with 16 bit gray ao and roughness (I;16 PNG) and 8 bit albedo"""
+    src = tmp_path / "src"
+    src.mkdir()
+    rng = np.random.default_rng(4)
+    for suffix in ("_ao", "_roughness"):
+        Image.fromarray(rng.integers(0, 65536, (SIZE[1], SIZE[0]), np.uint16)).save(src / f"Rock{suffix}.png")
+    Image.fromarray(make_source(1, 3)).save(src / "Rock_albedo.png")
+    (tmp_path / "layout.txt").write_text(LAYOUT)
+    return src
+
+
+def sources(src)->tuple[np.ndarray,np.ndarray,np.ndarray]:
+    ao, rough, albedo = (read_pixels(src / f"Rock{suffix}.png") for suffix in ("_ao", "_roughness", "_albedo"))
+    return ao[:, :, 0].astype(np.int64), rough[:, :, 0].astype(np.int64), albedo[:, :, 1].astype(np.int64)
+
+
+def test_16_bit_output_is_lossless(mixed_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", mixed_dir, "-d", dest, "-c", tmp_path / "layout.txt", "-o", "tiff", "-b", "16")
+    out = read_pixels(dest / "Rock_mix.tiff")
+    ao, rough, albedo = sources(mixed_dir)
+    assert out.dtype == np.uint16
+    assert np.array_equal(out[:, :, 0], ao)
+    assert np.array_equal(out[:, :, 1], 65535 - rough)
+    assert np.array_equal(out[:, :, 2], albedo * 257) #8 bit expanded to full 16 bit range
+
+
+def test_16_bit_png_equals_tiff(mixed_dir, tmp_path):
+    run("-s", mixed_dir, "-d", tmp_path / "tiff", "-c", tmp_path / "layout.txt", "-o", "tiff", "-b", "16")
+    run("-s", mixed_dir, "-d", tmp_path / "png", "-c", tmp_path / "layout.txt", "-b", "16")
+    data = (tmp_path / "png" / "Rock_mix.png").read_bytes()
+    assert data[24:26] == bytes((16, 2)) #IHDR bit depth 16, RGB
+    assert np.array_equal(decode_png16(data), read_pixels(tmp_path / "tiff" / "Rock_mix.tiff"))
+
+
+def test_float_output(mixed_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", mixed_dir, "-d", dest, "-c", tmp_path / "layout.txt", "-o", "tiff", "-b", "32f")
+    out = read_pixels(dest / "Rock_mix.tiff")
+    ao, rough, albedo = sources(mixed_dir)
+    assert out.dtype == np.float32
+    assert np.allclose(out[:, :, 0], ao / 65535, rtol=0, atol=1e-6)
+    assert np.allclose(out[:, :, 1], 1 - rough / 65535, rtol=0, atol=1e-6)
+    assert np.allclose(out[:, :, 2], albedo / 255, rtol=0, atol=1e-6)
+
+
+def test_16_bit_sources_scaled_to_8_bit(mixed_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", mixed_dir, "-d", dest, "-c", tmp_path / "layout.txt")
+    out = read_pixels(dest / "Rock_mix.png")
+    ao, rough, albedo = sources(mixed_dir)
+    assert out.dtype == np.uint8
+    assert np.array_equal(out[:, :, 0], ao >> 8) #high byte, not truncated to low byte or clipped
+    assert np.array_equal(out[:, :, 1], 255 - (rough >> 8))
+    assert np.array_equal(out[:, :, 2], albedo)
+
+
+def decode_png16(data:bytes)->np.ndarray:
+    """Pixels of 16 bit RGB PNG (PIL reads it as 8 bit), filters undone row by row"""
+    width, height = struct.unpack(">II", data[16:24])
+    pos, idat = 8, b""
+    while pos < len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        if tag == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    raw = zlib.decompress(idat)
+    stride, bpp = width * 6, 6
+    rows, prev = [], np.zeros(stride, np.int64)
+    for y in range(height):
+        ftype = raw[y * (stride + 1)]
+        line = np.frombuffer(raw, np.uint8, stride, y * (stride + 1) + 1).astype(np.int64)
+        out = np.zeros(stride, np.int64)
+        for i in range(stride):
+            a = out[i - bpp] if i >= bpp else 0
+            b = prev[i]
+            c = prev[i - bpp] if i >= bpp else 0
+            if ftype == 0:
+                pred = 0
+            elif ftype == 1:
+                pred = a
+            elif ftype == 2:
+                pred = b
+            elif ftype == 3:
+                pred = (a + b) // 2
+            else:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            out[i] = (line[i] + pred) & 255
+        rows.append(out)
+        prev = out
+    return np.array(rows, np.uint8).view(">u2").reshape(height, width, 3).astype(np.uint16)
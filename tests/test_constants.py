@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import SIZE, output_files, run
+
+
+@pytest.fixture
+def flat_dir(src_dir):
+    """Rock with black metallic, white ao and constant green roughness channel, Metal with partly constant albedo"""
+    Image.new("L", SIZE, 0).save(src_dir / "Rock_metallic.png")
+    Image.new("L", SIZE, 255).save(src_dir / "Rock_ao.png")
+    Image.new("L", SIZE, 128).save(src_dir / "Rock_roughness.png")
+    with Image.open(src_dir / "Metal_albedo.png") as img:
+        albedo = np.asarray(img).copy()
+    albedo[:, :, 1] = 77
+    Image.fromarray(albedo).save(src_dir / "Metal_albedo.png")
+    return src_dir
+
+
+def contents(dest)->dict[str,bytes]:
+    return {name:path.read_bytes() for name, path in output_files(dest).items()}
+
+
+@pytest.mark.parametrize("args", [
+    ("-p", "orm"),
+    ("-p", "unreal", "-b", "16"),
+    ("-p", "ord", "-o", "tiff", "-b", "32f"),
+    ("-p", "unity", "--max-size", "20"),
+])
+def test_outputs_identical_with_detection_off(flat_dir, tmp_path, args):
+    run("-s", flat_dir, "-d", tmp_path / "on", *args)
+    run("-s", flat_dir, "-d", tmp_path / "off", *args, "--no-detect-constants")
+    assert contents(tmp_path / "on") == contents(tmp_path / "off")
+
+
+def test_constants_report_and_cache(flat_dir, tmp_path):
+    dest, report_path = tmp_path / "dest", tmp_path / "constants.json"
+    run("-s", flat_dir, "-d", dest, "-p", "orm", "--constants-cache", "--constants-report", report_path)
+    report = json.loads(report_path.read_text())
+    outputs = {Path(entry["output"]).name:entry["values"] for entry in report["constant_outputs"]}
+    assert outputs == {"Rock_orm.png":[1.0, pytest.approx(128 / 255), 0.0]}
+    sources = {Path(path).name for path in report["constant_sources"]}
+    assert sources == {"Rock_metallic.png", "Rock_ao.png", "Rock_roughness.png"}
+    assert report["decodes_skipped"] == 0
+    first = contents(dest)
+
+    run("-s", flat_dir, "-d", dest, "-p", "orm", "--constants-cache", "--constants-report", report_path)
+    assert json.loads(report_path.read_text())["decodes_skipped"] == 3 #unchanged constant sources are not decoded again
+    assert contents(dest) == first
+
+    Image.new("L", SIZE, 3).save(flat_dir / "Rock_metallic.png")
+    run("-s", flat_dir, "-d", dest, "-p", "orm", "--constants-cache", "--constants-report", report_path)
+    assert json.loads(report_path.read_text())["decodes_skipped"] == 2 #changed one is decoded
+    with Image.open(dest / "Rock_orm.png") as img:
+        assert (np.asarray(img)[:, :, 2] == 3).all()
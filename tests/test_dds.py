@@ -0,0 +1,160 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import texture_packer as tp
+from conftest import GRAY_MAPS, SIZE, read_pixels, run
+
+HEADER_SIZE = 128
+DX10_HEADER_SIZE = 20
+ODD_SIZE = (30, 18) #partial edge blocks
+
+
+def smooth_source(seed:int, channels:int, size:tuple[int,int]=ODD_SIZE)->np.ndarray:
+    """HxWxC gradients with waves and slight noise, block compression error of such content is bounded"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    planes = [40 + x * (3 + c) + y * (2 + 2 * c) + 20 * np.sin((x + y * (c + 1)) / 5.0) for c in range(channels)]
+    return np.clip(np.stack(planes, axis=2) + rng.integers(-2, 3, (height, width, channels)), 0, 255).astype(np.uint8)
+
+
+def expand565(c:np.ndarray)->np.ndarray:
+    r, g, b = (c >> 11) & 31, (c >> 5) & 63, c & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1).astype(np.int32)
+
+
+def decode_bc1(blocks:np.ndarray)->np.ndarray:
+    """Nx8 uint8 blocks -> Nx4x4x3 RGB"""
+    c = blocks[:, :4].copy().view("<u2").astype(np.int32)
+    e0, e1 = expand565(c[:, 0]), expand565(c[:, 1])
+    four = (c[:, 0] > c[:, 1])[:, None]
+    palette = np.stack([e0, e1,
+        np.where(four, (2 * e0 + e1) // 3, (e0 + e1) // 2),
+        np.where(four, (e0 + 2 * e1) // 3, 0)], axis=1)
+    bits = blocks[:, 4:].copy().view("<u4")[:, 0].astype(np.int64)
+    idx = (bits[:, None] >> (2 * np.arange(16))) & 3
+    return np.take_along_axis(palette, idx[:, :, None], axis=1).reshape(-1, 4, 4, 3)
+
+
+def decode_bc4(blocks:np.ndarray)->np.ndarray:
+    """Nx8 uint8 blocks -> Nx4x4 values"""
+    a0, a1 = blocks[:, 0].astype(np.int32), blocks[:, 1].astype(np.int32)
+    eight = (a0 > a1)[:, None]
+    steps = np.arange(1, 7)[None, :]
+    interp8 = ((7 - steps) * a0[:, None] + steps * a1[:, None]) // 7
+    interp6 = ((5 - steps[:, :4]) * a0[:, None] + steps[:, :4] * a1[:, None]) // 5
+    six = np.concatenate([interp6, np.zeros_like(a0)[:, None], np.full_like(a0, 255)[:, None]], axis=1)
+    palette = np.concatenate([a0[:, None], a1[:, None], np.where(eight, interp8, six)], axis=1)
+    bits = np.zeros(len(blocks), np.int64)
+    for k in range(6):
+        bits |= blocks[:, 2 + k].astype(np.int64) << (8 * k)
+    idx = (bits[:, None] >> (3 * np.arange(16))) & 7
+    return np.take_along_axis(palette, idx, axis=1).reshape(-1, 4, 4)
+
+
+def decode_dds(data:bytes)->tuple[str,list[np.ndarray]]:
+    """Compression and mip levels (HxWxC) of BC1, BC4, BC5 or uncompressed DDS written by DdsWriter"""
+    assert data[:4] == b"DDS "
+    height, width, _, _, mip_count = struct.unpack_from("<5I", data, 12)
+    fourcc = data[84:88]
+    fmt = {b"DXT1":"bc1", b"ATI1":"bc4", b"ATI2":"bc5"}.get(fourcc, "none")
+    pos, levels = HEADER_SIZE, []
+    for _ in range(max(mip_count, 1)):
+        bw, bh = (width + 3) // 4, (height + 3) // 4
+        if fmt == "none":
+            channels = 1 if struct.unpack_from("<I", data, 80)[0] == 0x20000 else 4
+            level = np.frombuffer(data, np.uint8, width * height * channels, pos).reshape(height, width, channels)
+            pos += width * height * channels
+        else:
+            nbytes = 16 if fmt == "bc5" else 8
+            blocks = np.frombuffer(data, np.uint8, bw * bh * nbytes, pos).reshape(-1, nbytes)
+            pos += bw * bh * nbytes
+            if fmt == "bc1":
+                pixels = decode_bc1(blocks)
+            elif fmt == "bc4":
+                pixels = decode_bc4(blocks)[..., None]
+            else:
+                pixels = np.stack([decode_bc4(blocks[:, :8]), decode_bc4(blocks[:, 8:])], axis=-1)
+            channels = pixels.shape[-1]
+            level = pixels.reshape(bh, bw, 4, 4, channels).transpose(0, 2, 1, 3, 4).reshape(bh * 4, bw * 4, channels)[:height, :width]
+        levels.append(level)
+        width, height = max(width // 2, 1), max(height // 2, 1)
+    assert pos == len(data)
+    return fmt, levels
+
+
+def encode(tmp_path, arr:np.ndarray, normal_map:bool=False, **kwargs)->bytes:
+    path = tmp_path / "out.dds"
+    tp.DdsWriter(**kwargs).write(path, arr, normal_map)
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize("compression, channels, max_error, mean_error", [
+    ("bc1", 3, 24, 4.0),
+    ("bc4", 1, 6, 1.5),
+    ("bc5", 2, 6, 1.5),
+])
+def test_block_round_trip(tmp_path, compression, channels, max_error, mean_error):
+    arr = smooth_source(3, channels)
+    fmt, levels = decode_dds(encode(tmp_path, arr, compression=compression))
+    assert fmt == compression
+    assert levels[0].shape == arr.shape
+    error = np.abs(levels[0].astype(np.int32) - arr)
+    assert error.max() <= max_error
+    assert error.mean() <= mean_error
+
+
+def test_representable_blocks_are_exact(tmp_path):
+    rgb = np.zeros((8, 8, 3), np.uint8) #one 565 representable color per block
+    rgb[:4, :4], rgb[:4, 4:], rgb[4:, :4], rgb[4:, 4:] = (255, 0, 0), (0, 255, 255), (66, 130, 132), (0, 0, 0)
+    _, (decoded,) = decode_dds(encode(tmp_path, rgb, compression="bc1"))
+    assert np.array_equal(decoded, rgb)
+    gray = np.repeat(np.repeat(np.array([[0, 255], [66, 131]], np.uint8), 4, axis=0), 4, axis=1)[:, :, None]
+    _, (decoded,) = decode_dds(encode(tmp_path, gray, compression="bc4"))
+    assert np.array_equal(decoded, gray)
+
+
+def test_uncompressed_is_exact(tmp_path):
+    for channels in (1, 4):
+        arr = np.random.default_rng(5).integers(0, 256, (ODD_SIZE[1], ODD_SIZE[0], channels), np.uint8)
+        fmt, (decoded,) = decode_dds(encode(tmp_path, arr, compression="none"))
+        assert fmt == "none" and np.array_equal(decoded, arr)
+
+
+def test_mip_chain(tmp_path):
+    arr = smooth_source(7, 1)
+    _, levels = decode_dds(encode(tmp_path, arr, compression="bc4", mipmaps=True))
+    assert [level.shape[:2] for level in levels] == [(18, 30), (9, 15), (4, 7), (2, 3), (1, 1)]
+    assert np.abs(levels[1].astype(np.int32) - tp.DdsWriter().box_reduce(arr)).max() <= 6
+
+
+def test_bc7_round_trip(tmp_path):
+    arr = smooth_source(9, 4)
+    data = encode(tmp_path, arr, compression="bc7")
+    assert len(data) == HEADER_SIZE + DX10_HEADER_SIZE + 8 * 5 * 16
+    with Image.open(io.BytesIO(data)) as img:
+        decoded = np.asarray(img.convert("RGBA"))
+    error = np.abs(decoded.astype(np.int32) - arr)
+    assert error.max() <= 20
+    assert error.mean() <= 3.0
+
+
+def test_dds_outputs_of_run(tmp_path):
+    src_dir, png, dds = tmp_path / "src", tmp_path / "png", tmp_path / "dds"
+    src_dir.mkdir()
+    for i, suffix in enumerate(("_albedo", "_normal") + GRAY_MAPS):
+        arr = smooth_source(i, 3 if suffix in ("_albedo", "_normal") else 1, SIZE)
+        Image.fromarray(arr[:, :, 0] if arr.shape[2] == 1 else arr).save(src_dir / f"Rock{suffix}.png")
+    run("-s", src_dir, "-d", png, "-p", "unreal")
+    run("-s", src_dir, "-d", dds, "-p", "unreal", "-o", "dds")
+    for tex_suffix, compression in (("_albedo", "bc1"), ("_orm", "bc1"), ("_normal", "bc5"), ("_height", "bc4")):
+        expected = read_pixels(png / f"Rock{tex_suffix}.png")
+        fmt, (decoded,) = decode_dds((dds / f"Rock{tex_suffix}.dds").read_bytes())
+        assert fmt == compression
+        channels = min(decoded.shape[2], expected.shape[2])
+        assert decoded.shape[:2] == (SIZE[1], SIZE[0])
+        assert np.abs(decoded[:, :, :channels].astype(np.int32) - expected[:, :, :channels]).mean() <= 4.0, tex_suffix
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+import texture_packer as tp
+from conftest import MATERIALS, make_source, output_files, run
+
+
+def test_hit_and_invalidation(tmp_path):
+    src = tmp_path / "Rock_ao.png"
+    Image.fromarray(make_source(1, 1)).save(src)
+    cache = tp.DecodeCache(tmp_path / "cache")
+    assert cache.get(src) is None
+    arr = make_source(1, 3)
+    cache.put(src, arr)
+    mapped = tp.DecodeCache(tmp_path / "cache").get(src)
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    assert np.array_equal(mapped, arr)
+
+    os.utime(src, ns=(src.stat().st_atime_ns, src.stat().st_mtime_ns + 10**9)) #changed source gets a new key
+    cache = tp.DecodeCache(tmp_path / "cache")
+    assert cache.get(src) is None
+    assert cache.stats["hits"] == 0 and cache.stats["misses"] == 1
+
+
+def test_eviction_keeps_budget(tmp_path):
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f"src{i}.png")
+        paths[-1].write_bytes(b"x" * (i + 1))
+    arr = np.zeros((256, 256, 4), np.uint8) #256 KB
+    cache = tp.DecodeCache(tmp_path / "cache", budget_mb=0.6)
+    for path in paths:
+        cache.put(path, arr)
+    assert sorted(os.listdir(tmp_path / "cache")) == sorted(cache.key(path) for path in paths[2:]) #least recently used evicted
+    assert cache.get(paths[3]) is not None and cache.get(paths[0]) is None
+
+
+def test_cached_runs_equal_decoding_runs(src_dir, tmp_path):
+    cache_dir = tmp_path / "cache"
+    for preset in ("orm", "unreal"):
+        run("-s", src_dir, "-d", tmp_path / f"plain_{preset}", "-p", preset)
+    first = run("-s", src_dir, "-d", tmp_path / "orm", "-p", "orm", "--decode-cache", cache_dir)
+    assert "[*] Decode cache: 0 source(s) mapped" in first
+    second = run("-s", src_dir, "-d", tmp_path / "unreal", "-p", "unreal", "--decode-cache", cache_dir, "-j", "2")
+    assert f"[*] Decode cache: {5 * len(MATERIALS)} source(s) mapped" in second #albedo, normal, ao, roughness, metallic cached by first run
+    for preset in ("orm", "unreal"):
+        assert {n:p.read_bytes() for n, p in output_files(tmp_path / preset).items()} == {n:p.read_bytes() for n, p in output_files(tmp_path / f"plain_{preset}").items()}
+
+    Image.fromarray(make_source(77, 1)).save(src_dir / "Rock_ao.png")
+    third = run("-s", src_dir, "-d", tmp_path / "orm", "-p", "orm", "--decode-cache", cache_dir)
+    assert f"[*] Decode cache: {5 * len(MATERIALS) - 1} source(s) mapped" in third
+    run("-s", src_dir, "-d", tmp_path / "plain_orm", "-p", "orm")
+    assert (tmp_path / "orm" / "Rock_orm.png").read_bytes() == (tmp_path / "plain_orm" / "Rock_orm.png").read_bytes()
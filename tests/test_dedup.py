@@ -0,0 +1,61 @@
+import shutil
+
+import pytest
+
+import texture_packer as tp
+from conftest import GRAY_MAPS, output_files, run
+
+SUFFIXES = ("_albedo", "_normal") + GRAY_MAPS
+
+
+@pytest.fixture
+def variants_dir(src_dir):
+    """Rock copied as Rock_Wet (all maps identical) and Rock_Dry (albedo of Metal)"""
+    for suffix in SUFFIXES:
+        shutil.copyfile(src_dir / f"Rock{suffix}.png", src_dir / f"Rock_Wet{suffix}.png")
+        shutil.copyfile(src_dir / (f"Metal{suffix}.png" if suffix == "_albedo" else f"Rock{suffix}.png"), src_dir / f"Rock_Dry{suffix}.png")
+    return src_dir
+
+
+def contents(dest)->dict[str,bytes]:
+    return {name:path.read_bytes() for name, path in output_files(dest).items()}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_duplicates_are_hardlinked(variants_dir, tmp_path, jobs):
+    run("-s", variants_dir, "-d", tmp_path / "plain", "-p", "orm")
+    dest = tmp_path / "dest"
+    run("-s", variants_dir, "-d", dest, "-p", "orm", "--dedup", "-j", jobs)
+    assert contents(dest) == contents(tmp_path / "plain")
+    inode = lambda name: (dest / name).stat().st_ino
+    for suffix in ("_albedo", "_normal", "_orm"):
+        assert inode(f"Rock_Wet{suffix}.png") == inode(f"Rock{suffix}.png"), suffix
+    assert inode("Rock_Dry_orm.png") == inode("Rock_orm.png") and inode("Rock_Dry_normal.png") == inode("Rock_normal.png")
+    assert inode("Rock_Dry_albedo.png") == inode("Metal_albedo.png") != inode("Rock_albedo.png") #same content as Metal albedo
+    assert (dest / "Metal_orm.png").stat().st_nlink == 1
+
+
+def test_copy_mode_and_rewrite_keeps_links(variants_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", variants_dir, "-d", dest, "-p", "orm", "--dedup", "--dedup-link", "copy")
+    assert (dest / "Rock_Wet_orm.png").stat().st_nlink == 1
+    assert (dest / "Rock_Wet_orm.png").read_bytes() == (dest / "Rock_orm.png").read_bytes()
+
+    linked = tmp_path / "linked"
+    run("-s", variants_dir, "-d", linked, "-p", "orm", "--dedup")
+    before = (linked / "Rock_orm.png").read_bytes()
+    shutil.copyfile(variants_dir / "Metal_ao.png", variants_dir / "Rock_Wet_ao.png")
+    run("-s", variants_dir, "-d", linked, "-p", "orm", "--dedup")
+    assert (linked / "Rock_orm.png").read_bytes() == before #rewritten output replaced, not changed through its link
+    assert (linked / "Rock_Wet_orm.png").read_bytes() != before
+
+
+def test_only_same_size_sources_are_hashed(variants_dir):
+    index = tp.DedupIndex()
+    paths = sorted(variants_dir.iterdir())
+    index.hash_sources(paths)
+    sizes = {}
+    for path in paths:
+        sizes.setdefault(path.stat().st_size, []).append(path)
+    assert set(index.hashes) == {str(path) for same in sizes.values() if len(same) > 1 for path in same}
+    assert index.hashes[str(variants_dir / "Rock_Wet_ao.png")] == index.hashes[str(variants_dir / "Rock_ao.png")] == tp.file_hash(variants_dir / "Rock_ao.png")
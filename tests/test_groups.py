@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+
+import texture_packer as tp
+
+
+def linear_match(name:str, suffixes)->tuple[str,int]:
+    """Original matcher: endswith() over suffixes sorted long>short"""
+    name = name.lower()
+    for s in sorted(suffixes, key=len, reverse=True):
+        if name.endswith(s):
+            return s, len(name) - len(s)
+    return None, -1
+
+
+def preset_suffixes()->dict[str,str]:
+    config = tp.Config()
+    config.apply_preset("unreal")
+    return config.map_suffixes
+
+
+def random_stems(suffixes, count:int=3000)->list[str]:
+    rng = random.Random(1)
+    parts = ["rock", "T", "Wood", "planks", "a", "_", "r", "n", "2k", "Base", "COLOR", "_color", "_Normal", "_DX"]
+    stems = []
+    for _ in range(count):
+        stem = "".join(rng.choice(parts) for _ in range(rng.randint(0, 4)))
+        if rng.random() < 0.7:
+            suffix = rng.choice(suffixes)
+            stem += suffix.upper() if rng.random() < 0.3 else suffix
+        stems.append(stem)
+    return stems
+
+
+def test_matcher_equals_linear_scan():
+    suffixes = list(preset_suffixes())
+    matcher = tp.SuffixMatcher(suffixes)
+    for stem in random_stems(suffixes) + ["", "_", "_r", "R", "rock_base_color", "rock_color", "ROCK_AO"]:
+        assert matcher.match(stem) == linear_match(stem, suffixes), stem
+
+
+def test_matcher_with_overlapping_suffixes():
+    suffixes = ["_a", "_ba", "_cba", "a", "_normal_dx", "_dx", "_normal"]
+    matcher = tp.SuffixMatcher(suffixes)
+    for stem in ("x_cba", "x_ba", "xa", "x_a", "rock_normal_dx", "rock_normal", "rock_dx", "cba", "b"):
+        assert matcher.match(stem) == linear_match(stem, suffixes), stem
+
+
+def test_groups_equal_linear_grouping(tmp_path):
+    suffixes_map = preset_suffixes()
+    names = ["T_Rock_D.png", "T_Rock_N.png", "T_Rock_R.png", "Rock_Base_Color.tga", "Rock_roughness.png", "rock_ao.PNG",
+        "sub/Wood_Planks_Normal.png", "sub/Wood_Planks_color.jpg", "sub/deep/Metal_metallic.png", "no_match.png", "Rock.png"]
+    paths = [tmp_path / name for name in names]
+    groups = tp.TexturePacker().get_groups(paths, tmp_path, suffixes_map)
+
+    expected = {}
+    for path in paths:
+        rel = path.relative_to(tmp_path).as_posix().rsplit(".", 1)[0]
+        sf, index = linear_match(Path(rel).name, suffixes_map)
+        if sf == None:
+            continue
+        grp_name = rel[:len(rel) - len(Path(rel).name) + index] + tp.TexturePacker.SUFFIX_PLACEHOLDER
+        expected.setdefault(grp_name, {})[suffixes_map[sf] or sf] = path
+    assert groups == expected
+    assert groups["T_Rock" + tp.TexturePacker.SUFFIX_PLACEHOLDER] == {"_albedo":paths[0], "_normal":paths[1], "_roughness":paths[2]}
+    assert set(groups["Rock" + tp.TexturePacker.SUFFIX_PLACEHOLDER]) == {"_albedo", "_roughness"}
@@ -0,0 +1,93 @@
+import json
+import os
+
+from PIL import Image
+
+import texture_packer as tp
+from conftest import make_source, output_files, run
+
+
+def mtimes(dest)->dict[str,int]:
+    return {name:path.stat().st_mtime_ns for name, path in output_files(dest).items()}
+
+
+def touch_back(dest):
+    """Move output mtimes to the past, so rewritten outputs are detected on coarse timestamp filesystems"""
+    for path in output_files(dest).values():
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns - 10**9))
+
+
+def test_unchanged_sources_are_skipped(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    assert (dest / tp.BuildManifest.FILE_NAME).exists()
+    touch_back(dest)
+    before = mtimes(dest)
+    assert "[+] Save" not in run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    assert mtimes(dest) == before
+
+
+def test_changed_source_rebuilds_its_outputs(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    touch_back(dest)
+    before = mtimes(dest)
+    Image.fromarray(make_source(99, 1)).save(src_dir / "Rock_roughness.png")
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    changed = {name for name, mtime in mtimes(dest).items() if mtime != before[name]}
+    assert changed == {"Rock_orm.png"}
+
+
+def test_touched_source_with_same_content_is_skipped(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    touch_back(dest)
+    before = mtimes(dest)
+    path = src_dir / "Rock_ao.png"
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 5 * 10**9))
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    assert mtimes(dest) == before
+
+
+def test_encoder_settings_rebuild_outputs(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    touch_back(dest)
+    before = mtimes(dest)
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental", "--png-compress-level", "1")
+    assert all(mtime != before[name] for name, mtime in mtimes(dest).items())
+    manifest = json.loads((dest / tp.BuildManifest.FILE_NAME).read_text())
+    config = tp.Config()
+    config.apply_preset("orm")
+    config.png_compress_level = 1
+    assert manifest["outputs"]["Rock_orm.png"]["encoder"] == list(config.get_encoder_key("_orm"))
+
+
+def test_removed_output_is_rebuilt(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    (dest / "Metal_normal.png").unlink()
+    touch_back(dest)
+    before = mtimes(dest)
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    after = mtimes(dest)
+    assert "Metal_normal.png" in after
+    assert {name:after[name] for name in before} == before
+
+
+def test_source_changed_while_packing_is_packed_again(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    config = tp.Config()
+    config.apply_preset("orm")
+    group_items = {suffix:src_dir / f"Rock{suffix}.png" for suffix in ("_albedo", "_normal", "_ao", "_roughness", "_metallic")}
+    save_path = dest / "Rock_orm.png"
+    manifest = tp.BuildManifest(dest)
+    manifest.snapshot(group_items, {"_orm":config.packer["_orm"]})
+    path = src_dir / "Rock_roughness.png"
+    Image.fromarray(make_source(99, 1)).save(path) #edited while the group is packed
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 5 * 10**9))
+    save_path.write_bytes(b"packed")
+    manifest.record(save_path, group_items, config.packer["_orm"], config, "_orm")
+    manifest.save()
+    assert not tp.BuildManifest(dest).load().is_up_to_date(save_path, group_items, config.packer["_orm"], config, "_orm")
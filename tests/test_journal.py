@@ -0,0 +1,82 @@
+import json
+
+import texture_packer as tp
+from conftest import MATERIALS, output_files, run
+
+
+def journal_path(dest):
+    return dest / tp.RunJournal.FILE_NAME
+
+
+def read_groups(dest)->list[str]:
+    return read_groups_text(journal_path(dest).read_text())
+
+
+def read_groups_text(text:str)->list[str]:
+    """Journaled groups, torn lines of killed runs are skipped"""
+    groups = []
+    for ln in text.splitlines()[1:]:
+        try:
+            groups.append(json.loads(ln)["group"])
+        except ValueError:
+            continue
+    return groups
+
+
+def interrupt(dest, completed:int):
+    """Leave dest as a run killed after `completed` groups: later groups journal lines torn, their outputs missing"""
+    lines = journal_path(dest).read_text().splitlines(keepends=True)
+    kept = lines[:1 + completed]
+    journal_path(dest).write_text("".join(kept) + lines[1 + completed][:12])
+    done = set(read_groups_text("".join(kept)))
+    for name, path in output_files(dest).items():
+        if not any(name.startswith(group + "_") for group in done):
+            path.unlink()
+    return done
+
+
+def test_plain_run_writes_no_journal(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm")
+    assert not journal_path(dest).exists()
+
+
+def test_journal_lists_completed_groups(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--journal")
+    assert sorted(read_groups(dest)) == sorted(MATERIALS)
+
+
+def test_resume_packs_only_remaining_groups(src_dir, tmp_path):
+    clean = tmp_path / "clean"
+    run("-s", src_dir, "-d", clean, "-p", "orm")
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--journal")
+    done = interrupt(dest, 1)
+    assert len(done) == 1
+    kept = {name:path.stat().st_mtime_ns for name, path in output_files(dest).items()}
+
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--resume")
+    outputs = output_files(dest)
+    assert {name:path.read_bytes() for name, path in outputs.items()} == {name:path.read_bytes() for name, path in output_files(clean).items()}
+    assert {name:outputs[name].stat().st_mtime_ns for name in kept} == kept #journaled group was not packed again
+    assert sorted(read_groups(dest)) == sorted(MATERIALS)
+
+
+def test_resume_with_other_layout_starts_over(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--journal")
+    interrupt(dest, 2)
+    run("-s", src_dir, "-d", dest, "-p", "ord", "--resume")
+    assert sorted(read_groups(dest)) == sorted(MATERIALS)
+    assert all((dest / f"{name}_ord.png").exists() for name in MATERIALS)
+
+
+def test_failed_group_is_not_journaled(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    (src_dir / "Metal_ao.png").write_bytes(b"not a png")
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--journal", "--error-report", tmp_path / "errors.json", status=1)
+    assert sorted(read_groups(dest)) == ["Rock", "Wood_Planks"]
+    report = json.loads((tmp_path / "errors.json").read_text())
+    assert report["failed_groups"] == ["Metal"]
+    assert len(report["errors"]) == 1
@@ -0,0 +1,86 @@
+import io
+import subprocess
+import sys
+
+import numpy as np
+from PIL import Image
+
+import texture_packer as tp
+from conftest import ROOT, read_pixels, run
+
+ORM_SOURCES = ("_albedo", "_normal", "_ao", "_roughness", "_metallic")
+
+
+def orm_config()->tp.Config:
+    config = tp.Config()
+    config.apply_preset("orm", log=None)
+    return config
+
+
+def test_library_pack_matches_files(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm")
+    sources = {suffix:src_dir / f"Rock{suffix}.png" for suffix in ORM_SOURCES}
+    packed = tp.pack(orm_config(), sources, as_array=True)
+    assert sorted(packed) == ["_albedo", "_normal", "_orm"]
+    for tex_suffix, arr in packed.items():
+        assert isinstance(arr, np.ndarray) and arr.dtype == np.uint8 and arr.ndim == 3
+        assert np.array_equal(arr, read_pixels(dest / f"Rock{tex_suffix}.png")), tex_suffix
+
+
+def test_source_kinds_give_same_outputs(src_dir):
+    paths = {suffix:src_dir / f"Rock{suffix}.png" for suffix in ORM_SOURCES}
+    expected = tp.pack(orm_config(), paths, as_array=True)
+    images = {suffix:Image.open(path) for suffix, path in paths.items()}
+    arrays = {suffix:np.asarray(Image.open(path)) for suffix, path in paths.items()}
+    encoded = {suffix:path.read_bytes() for suffix, path in paths.items()}
+    for sources in (images, arrays, encoded, {suffix:str(path) for suffix, path in paths.items()}):
+        packed = tp.pack(orm_config(), sources)
+        assert all(isinstance(tex, Image.Image) for tex in packed.values())
+        assert packed.keys() == expected.keys()
+        for tex_suffix, tex in packed.items():
+            assert np.array_equal(np.asarray(tex).reshape(expected[tex_suffix].shape), expected[tex_suffix]), tex_suffix
+
+
+def test_mapped_suffixes_and_missing_outputs():
+    config = orm_config()
+    rng = np.random.default_rng(2)
+    ao, rough = rng.integers(0, 256, (8, 8), np.uint8), rng.integers(0, 256, (8, 8), np.uint8)
+    packed = tp.pack(config, {"_Ambient_Occlusion":ao, "_roughness":rough}, as_array=True)
+    assert sorted(packed) == ["_orm"] #no albedo or normal source
+    assert np.array_equal(packed["_orm"][:, :, 0], ao) and np.array_equal(packed["_orm"][:, :, 1], rough)
+    assert not packed["_orm"][:, :, 2].any() #missing metallic is black
+
+
+def test_high_bit_depth_arrays():
+    config = orm_config()
+    config.bit_depth = "16"
+    ao = np.arange(64, dtype=np.uint16).reshape(8, 8) * 1000
+    packed = tp.pack(config, {"_ao":ao, "_roughness":np.full((8, 8), 0.5, np.float32)})
+    assert packed["_orm"].dtype == np.uint16
+    assert np.array_equal(packed["_orm"][:, :, 0], ao)
+    assert (packed["_orm"][:, :, 1] == 32767).all()
+
+
+def test_pack_writes_and_prints_nothing(src_dir, tmp_path):
+    code = ("import sys, texture_packer as tp\n"
+            "config = tp.Config()\nconfig.apply_preset('orm', log=None)\n"
+            f"packed = tp.pack(config, {{'_ao': {str(src_dir / 'Rock_ao.png')!r}}})\n"
+            "print(sorted(packed))\n")
+    work = tmp_path / "work"
+    work.mkdir()
+    listing = sorted(src_dir.iterdir())
+    proc = subprocess.run([sys.executable, "-c", code, "--bogus-argument"], cwd=work, capture_output=True, text=True,
+        env={"PYTHONPATH":str(ROOT)})
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout == "['_orm']\n" #sys.argv not parsed, nothing logged
+    assert list(work.iterdir()) == [] and sorted(src_dir.iterdir()) == listing
+
+
+def test_encoded_bytes_of_other_formats(src_dir):
+    with Image.open(src_dir / "Rock_ao.png") as img:
+        buf = io.BytesIO()
+        img.save(buf, "TGA")
+        expected = np.asarray(img)
+    packed = tp.pack(orm_config(), {"_ao":buf.getvalue()}, as_array=True)
+    assert np.array_equal(packed["_orm"][:, :, 0], expected)
@@ -0,0 +1,49 @@
+import json
+
+from conftest import MATERIALS, output_files, run
+
+
+def planned(out:str)->set[str]:
+    return {ln.split("[+] ", 1)[1].split(":", 1)[0] for ln in out.splitlines() if ln.startswith("    [+] ")}
+
+
+def test_plan_lists_outputs_of_run_without_writing(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    (src_dir / "Metal_metallic.png").unlink()
+    listing = sorted(src_dir.iterdir())
+    out = run("-s", src_dir, "-d", dest, "-p", "orm", "--plan")
+    assert not dest.exists() and sorted(src_dir.iterdir()) == listing
+    assert "    [+] Rock_orm.png: RGB < _ao:r | _roughness:r | _metallic:r" in out
+    assert "        [!] missing: _metallic (black channels)" in out
+    assert out.count("[!] missing") == 1
+    assert f"[*] Plan: {len(MATERIALS)} group(s), {3 * len(MATERIALS)} output(s) to pack, 0 skipped, 1 group(s) with missing maps" in out
+    run("-s", src_dir, "-d", dest, "-p", "orm")
+    assert planned(out) == set(output_files(dest))
+
+
+def test_plan_report(src_dir, tmp_path):
+    dest, report_path = tmp_path / "dest", tmp_path / "plan.json"
+    (src_dir / "Metal_metallic.png").unlink()
+    run("-s", src_dir, "-d", dest, "-p", "ord", "--plan", report_path)
+    report = json.loads(report_path.read_text())
+    assert report["summary"] == {"groups":3, "to_pack":9, "skipped":0, "incomplete_groups":0} #ord doesn't read metallic
+    rock = next(group for group in report["groups"] if group["group"] == "Rock")
+    assert set(rock["inputs"]) == {"_albedo", "_normal", "_ao", "_roughness", "_height"}
+    assert rock["outputs"]["_ord"] == {"path":str((dest / "Rock_ord.png").resolve()), "mode":"RGB",
+        "layout":"_ao:r | _roughness:r | _height:r", "skip":None, "missing":[]}
+
+
+def test_plan_with_validation_fails_on_missing_maps(src_dir, tmp_path):
+    (src_dir / "Metal_metallic.png").unlink()
+    out = run("-s", src_dir, "-d", tmp_path / "dest", "-p", "orm", "--plan", "--validate", status=1)
+    assert "[*] Metal (skipped by validation)" in out
+    run("-s", src_dir, "-d", tmp_path / "dest", "-p", "ord", "--plan", "--validate")
+
+
+def test_plan_shows_up_to_date_outputs(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental")
+    (src_dir / "Rock_ao.png").write_bytes((src_dir / "Metal_ao.png").read_bytes())
+    out = run("-s", src_dir, "-d", dest, "-p", "orm", "--incremental", "--plan")
+    assert planned(out) == {"Rock_orm.png"}
+    assert out.count("skip (up to date)") == 3 * len(MATERIALS) - 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import texture_packer as tp
+from conftest import MATERIALS, SIZE, output_files, run, write_material
+
+
+@pytest.fixture
+def many_dir(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(6):
+        write_material(src, f"{MATERIALS[i % 3]}{i}", 10 * i)
+    return src
+
+
+def contents(dest)->dict[str,bytes]:
+    return {name:path.read_bytes() for name, path in output_files(dest).items()}
+
+
+@pytest.mark.parametrize("prefetch", [
+    ("--prefetch", "1"),
+    ("--prefetch", "4"),
+    ("--prefetch", "2", "--prefetch-memory", "0.005"), #sources don't fit, decoded on demand
+])
+def test_prefetched_outputs_equal_sequential(many_dir, tmp_path, prefetch):
+    run("-s", many_dir, "-d", tmp_path / "plain", "-p", "unreal", "-j", "1", "--prefetch", "0")
+    run("-s", many_dir, "-d", tmp_path / "prefetched", "-p", "unreal", "-j", "1", *prefetch)
+    assert contents(tmp_path / "prefetched") == contents(tmp_path / "plain")
+
+
+def test_failed_source_is_reported_once(many_dir, tmp_path):
+    (many_dir / "Metal2_ao.png").write_bytes(b"not a png")
+    run("-s", many_dir, "-d", tmp_path / "plain", "-p", "orm", "-j", "1", "--prefetch", "0", status=1)
+    out = run("-s", many_dir, "-d", tmp_path / "prefetched", "-p", "orm", "-j", "1", "--prefetch", "3", status=1)
+    assert out.count("[!] Image <" + str(many_dir / "Metal2_ao.png")) == 1
+    assert contents(tmp_path / "prefetched") == contents(tmp_path / "plain")
+
+
+def test_estimate_equals_decoded_size(src_dir, tmp_path):
+    Image.fromarray(np.full((SIZE[1], SIZE[0]), 40000, np.uint16)).save(tmp_path / "height16.png")
+    packer = tp.TexturePacker()
+    with tp.SourcePrefetcher(packer, tp.Config(), []) as prefetcher:
+        for path in (src_dir / "Rock_albedo.png", src_dir / "Rock_ao.png", tmp_path / "height16.png"):
+            with Image.open(path) as img:
+                assert prefetcher._estimate_nbytes(img) == packer.image_to_array(img).nbytes, path.name
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from PIL import Image, ImageChops
+
+import texture_packer as tp
+from conftest import GRAY_MAPS, MATERIALS, output_files, run
+
+MODES = {1:"L", 3:"RGB", 4:"RGBA"}
+PRESETS = ("orm", "ord", "unity", "unreal")
+
+
+def reference_output(sources:dict, pack_items:list)->bytes:
+    """Output as packed by the original PIL band merge implementation, encoded with PIL defaults"""
+    bands = {}
+    for suffix, path in sources.items():
+        with Image.open(path) as img:
+            bands[suffix] = img.split()
+    ch_bands = []
+    for item in pack_items:
+        band = bands[item.suffix][item.ch]
+        ch_bands.append(ImageChops.invert(band) if item.invert else band)
+    buf = io.BytesIO()
+    Image.merge(MODES[len(ch_bands)], ch_bands).save(buf, "png")
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("preset", PRESETS)
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_preset_outputs_are_byte_exact(src_dir, tmp_path, preset, jobs):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", preset, "-j", jobs)
+    config = tp.Config()
+    config.apply_preset(preset)
+    expected = {}
+    for name in MATERIALS:
+        sources = {suffix:src_dir / f"{name}{suffix}.png" for suffix in ("_albedo", "_normal") + GRAY_MAPS}
+        for tex_suffix, pack_items in config.packer.items():
+            expected[config.apply_naming_scheme(name, tex_suffix) + ".png"] = reference_output(sources, pack_items)
+    outputs = output_files(dest)
+    assert sorted(outputs) == sorted(expected)
+    for file_name, data in expected.items():
+        assert outputs[file_name].read_bytes() == data, file_name
+
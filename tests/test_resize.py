@@ -0,0 +1,63 @@
+import numpy as np
+from PIL import Image
+
+import texture_packer as tp
+from conftest import SIZE, make_source, output_files, read_pixels, run
+
+
+def box_reduce(arr:np.ndarray, factor:int)->np.ndarray:
+    height, width = arr.shape[:2]
+    blocks = arr.reshape(height // factor, factor, width // factor, factor, -1).astype(np.float64)
+    return np.rint(blocks.mean(axis=(1, 3))).astype(arr.dtype)
+
+
+def test_max_size_area_averages(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--max-size", "20")
+    out = read_pixels(dest / "Rock_orm.png")
+    assert out.shape == (12, 20, 3)
+    for ch, suffix in enumerate(("_ao", "_roughness", "_metallic")):
+        expected = box_reduce(read_pixels(src_dir / f"Rock{suffix}.png"), 2)[:, :, 0]
+        assert np.abs(out[:, :, ch].astype(np.int32) - expected).max() <= 1, suffix
+    assert np.abs(read_pixels(dest / "Rock_albedo.png").astype(np.int32) - box_reduce(read_pixels(src_dir / "Rock_albedo.png"), 2)).max() <= 1
+
+
+def test_scale_equals_max_size(src_dir, tmp_path):
+    run("-s", src_dir, "-d", tmp_path / "max", "-p", "orm", "--max-size", "20")
+    run("-s", src_dir, "-d", tmp_path / "scale", "-p", "orm", "--scale", "0.5")
+    scaled = output_files(tmp_path / "scale")
+    assert {name:path.read_bytes() for name, path in output_files(tmp_path / "max").items()} == {name:path.read_bytes() for name, path in scaled.items()}
+
+
+def test_lanczos_filter(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "--max-size", "30", "--resize-filter", "lanczos")
+    out = read_pixels(dest / "Rock_orm.png")
+    assert out.shape == (18, 30, 3)
+    with Image.open(src_dir / "Rock_ao.png") as img:
+        expected = np.asarray(img.resize((30, 18), Image.LANCZOS))
+    assert np.array_equal(out[:, :, 0], expected)
+
+
+def test_mixed_source_sizes_are_harmonized(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    big = make_source(50, 1, (SIZE[0] * 2, SIZE[1] * 2))
+    Image.fromarray(big).save(src_dir / "Rock_ao.png")
+    run("-s", src_dir, "-d", dest, "-p", "orm")
+    out = read_pixels(dest / "Rock_orm.png")
+    assert out.shape == (SIZE[1] * 2, SIZE[0] * 2, 3) #largest source
+    assert np.array_equal(out[:, :, 0], big) #not resampled
+    with Image.open(src_dir / "Rock_roughness.png") as img:
+        assert np.array_equal(out[:, :, 1], np.asarray(img.resize((SIZE[0] * 2, SIZE[1] * 2), Image.BICUBIC)))
+    assert read_pixels(dest / "Metal_orm.png").shape == (SIZE[1], SIZE[0], 3)
+
+
+def test_pack_line_size_options():
+    config = tp.Config()
+    config.apply_preset("orm", log=None)
+    config.load_from_dict({"pack":["_orm > _ao:r | _roughness:r | _metallic:r @ max_size=10", "_half > _ao:r @ scale=0.5"]})
+    ao = make_source(3, 1)
+    packed = tp.pack(config, {"_ao":ao, "_roughness":ao, "_metallic":ao}, as_array=True)
+    assert packed["_orm"].shape == (6, 10, 3)
+    assert packed["_half"].shape == (SIZE[1] // 2, SIZE[0] // 2, 1)
+    assert np.abs(packed["_half"][:, :, 0].astype(np.int32) - box_reduce(ao[:, :, None], 2)[:, :, 0]).max() <= 1
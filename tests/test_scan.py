@@ -0,0 +1,63 @@
+import pytest
+
+import texture_packer as tp
+from conftest import output_files, run, write_material
+
+OUTPUTS = ("_albedo.png", "_normal.png", "_orm.png")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Materials in nested, hidden and VCS directories"""
+    src = tmp_path / "src"
+    for rel, name in (("", "Rock"), ("sub", "Wood_Planks"), ("sub/deep", "Metal"), (".hidden", "Hidden"), (".git", "Git"), ("sub/__pycache__", "Cached")):
+        (src / rel).mkdir(parents=True, exist_ok=True)
+        write_material(src / rel, name, len(rel))
+    return src
+
+
+def packed(dest)->set[str]:
+    """Packed groups as relative paths"""
+    return {name[:-len(suffix)] for name in output_files(dest) for suffix in OUTPUTS if name.endswith(suffix)}
+
+
+def test_top_level_only_by_default(tree, tmp_path):
+    run("-s", tree, "-d", tmp_path / "dest", "-p", "orm")
+    assert packed(tmp_path / "dest") == {"Rock"}
+
+
+def test_recursive_keeps_structure_and_skips_hidden_dirs(tree, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", tree, "-d", dest, "-p", "orm", "-r")
+    assert packed(dest) == {"Rock", "sub/Wood_Planks", "sub/deep/Metal"}
+    assert sorted(output_files(dest)) == sorted(group + suffix for group in packed(dest) for suffix in OUTPUTS)
+
+
+@pytest.mark.parametrize("patterns, expected", [
+    (("--include", "sub/*"), {"sub/Wood_Planks", "sub/deep/Metal"}),
+    (("--exclude", "*/deep/*"), {"Rock", "sub/Wood_Planks"}),
+    (("--include", "sub/*", "--exclude", "*_albedo.png", "--exclude", "*/deep/*"), {"sub/Wood_Planks"}),
+    (("--include", "*_ao.png", "--include", "sub/*"), {"Rock", "sub/Wood_Planks", "sub/deep/Metal"}),
+])
+def test_include_exclude_globs(tree, tmp_path, patterns, expected):
+    dest = tmp_path / "dest"
+    run("-s", tree, "-d", dest, "-p", "orm", "-r", *patterns)
+    assert packed(dest) == expected
+
+
+def test_destination_inside_source_is_not_scanned(tree):
+    dest = tree / "packed"
+    run("-s", tree, "-d", dest, "-p", "orm", "-r")
+    first = output_files(dest)
+    run("-s", tree, "-d", dest, "-p", "orm", "-r")
+    assert output_files(dest) == first
+
+
+def test_hidden_files_are_listed(tree):
+    (tree / ".Rock_ao.png").write_bytes((tree / "Rock_ao.png").read_bytes())
+    config = tp.Config()
+    config.recursive = True
+    found = {path.relative_to(tree).as_posix() for path in tp.TexturePacker().scan_source_files(tree, config)}
+    assert ".Rock_ao.png" in found
+    assert not any(name.startswith((".hidden/", ".git/", "sub/__pycache__/")) for name in found)
+    assert "sub/deep/Metal_height.png" in found
@@ -0,0 +1,68 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import texture_packer as tp
+from conftest import output_files, run
+
+
+@pytest.fixture
+def server():
+    config = tp.Config()
+    config.apply_preset("orm", log=None)
+    config.serve_workers = 1
+    pack_server = tp.PackServer(config)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), pack_server.handler_class())
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    pack_server.dispatcher.shutdown()
+    pack_server.executor.shutdown()
+
+
+def request(url:str, data:dict=None)->dict:
+    body = json.dumps(data).encode() if data != None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data=body, method="POST" if body else "GET")) as response:
+        return json.loads(response.read())
+
+
+def test_directory_job_round_trip(server, src_dir, tmp_path):
+    dest, clean = tmp_path / "dest", tmp_path / "clean"
+    job = request(server + "/jobs", {"wait":True, "src_dir":str(src_dir), "dest_dir":str(dest)})
+    assert job["status"] == "done" and job["errors"] == []
+    assert "future" not in job
+    status = request(server + "/jobs/" + job["id"])
+    assert status["status"] == "done" and "log" in status
+    assert [j["id"] for j in request(server + "/jobs")["jobs"]] == [job["id"]]
+    run("-s", src_dir, "-d", clean, "-p", "orm")
+    assert {n:p.read_bytes() for n, p in output_files(dest).items()} == {n:p.read_bytes() for n, p in output_files(clean).items()}
+
+
+def test_material_job_saves_outputs(server, src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    sources = {suffix:str(src_dir / f"Rock{suffix}.png") for suffix in ("_ao", "_roughness", "_metallic")}
+    job = request(server + "/jobs", {"wait":True, "name":"Rock", "dest_dir":str(dest), "sources":sources,
+        "pack":["_orm > _ao:r | _roughness:r | _metallic:r"]})
+    assert job["status"] == "done"
+    assert job["saved"] == [str((dest / "Rock_orm.png").resolve())]
+
+
+def test_directory_job_with_failed_group_is_partial(server, src_dir, tmp_path):
+    (src_dir / "Metal_ao.png").write_bytes(b"not a png")
+    job = request(server + "/jobs", {"wait":True, "src_dir":str(src_dir), "dest_dir":str(tmp_path / "dest")})
+    assert job["status"] == "partial"
+    assert job["failed_groups"] == ["Metal"]
+    assert len(job["errors"]) == 1
+
+
+def test_unknown_job_is_not_found(server):
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        request(server + "/jobs/404")
+    assert exc.value.code == 404
+    assert request(server + "/health")["status"] == "ok"
@@ -0,0 +1,75 @@
+import pytest
+
+import texture_packer as tp
+
+
+@pytest.fixture
+def packer(monkeypatch):
+    """Packer counting opened images"""
+    packer = tp.TexturePacker()
+    packer.opened = []
+    load_image = packer.load_image
+
+    def counting_load_image(path):
+        packer.opened.append(path.name)
+        return load_image(path)
+    monkeypatch.setattr(packer, "load_image", counting_load_image)
+    return packer
+
+
+def layout(text:str)->dict[str,list[tp.PackChItem]]:
+    config = tp.Config()
+    return {ln.split(">")[0].strip():config._parse_mapstr(ln.split(">")[1]) for ln in text.strip().splitlines()}
+
+
+def sources(pack_items:list[tp.PackChItem])->tuple[str]:
+    return tp.OutputPlan("", pack_items).sources
+
+
+def rock_items(src_dir)->dict:
+    return {suffix:src_dir / f"Rock{suffix}.png" for suffix in ("_albedo", "_ao", "_roughness", "_metallic")}
+
+
+def test_sources_are_decoded_once_and_released_after_last_output(packer, src_dir):
+    pk_conf = layout("""
+        _first > _albedo:rg | _ao:r
+        _second > _ao:r | _roughness:r | _albedo:b
+        _third > _roughness:r | _metallic:r | _ao:r
+    """)
+    cache = tp.SourceCache(packer, rock_items(src_dir), pk_conf)
+    assert cache.refs == {"_albedo":2, "_ao":3, "_roughness":2, "_metallic":1}
+
+    first = cache.lookup(sources(pk_conf["_first"]))
+    albedo, ao = first["_albedo"], first["_ao"]
+    assert cache.resident == cache.buffer_nbytes(albedo) + cache.buffer_nbytes(ao)
+    cache.release(sources(pk_conf["_first"]))
+    assert set(cache.arrays) == {"_albedo", "_ao"} #still referenced by later outputs
+
+    second = cache.lookup(sources(pk_conf["_second"]))
+    assert second["_albedo"] is albedo and second["_ao"] is ao
+    peak = cache.buffer_nbytes(albedo) + cache.buffer_nbytes(ao) + cache.buffer_nbytes(second["_roughness"])
+    assert cache.resident == cache.peak == peak
+    cache.release(sources(pk_conf["_second"]))
+    assert set(cache.arrays) == {"_ao", "_roughness"}
+
+    cache.lookup(sources(pk_conf["_third"]))
+    cache.release(sources(pk_conf["_third"]))
+    assert cache.arrays == {} and cache.resident == 0
+    assert cache.peak == peak #albedo released before metallic was decoded
+    assert sorted(packer.opened) == sorted(f"Rock{suffix}.png" for suffix in ("_albedo", "_ao", "_roughness", "_metallic"))
+
+
+def test_failed_source_is_not_retried(packer, src_dir):
+    (src_dir / "Rock_ao.png").write_bytes(b"not a png")
+    pk_conf = layout("""
+        _first > _ao:r | _albedo:g
+        _second > _albedo:r | _ao:r
+    """)
+    cache = tp.SourceCache(packer, rock_items(src_dir), pk_conf)
+    for tex_suffix in pk_conf:
+        bands = cache.lookup(sources(pk_conf[tex_suffix]))
+        assert bands["_ao"] is None and bands["_albedo"] is not None
+        cache.release(sources(pk_conf[tex_suffix]))
+    assert packer.opened.count("Rock_ao.png") == 1
+    assert cache.failed == {"_ao"}
+    assert cache.resident == 0
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+import texture_packer as tp
+from conftest import ROOT, output_files, run
+
+HEAVY = ("numpy", "PIL", "PIL.Image", "concurrent.futures.process", "http.server", "cProfile")
+
+
+def loaded_after(code:str)->set[str]:
+    """Heavy modules in sys.modules after running code in a fresh interpreter"""
+    script = code + f"\nimport sys\nprint(sorted(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT)
+    assert proc.returncode == 0, proc.stderr
+    return set(eval(proc.stdout.strip().splitlines()[-1]))
+
+
+def test_import_loads_no_heavy_modules():
+    assert loaded_after("import texture_packer") == set()
+
+
+def test_config_and_parser_load_no_heavy_modules():
+    code = ("import texture_packer as tp\n"
+            "config = tp.Config()\nconfig.apply_preset('unreal', log=None)\nconfig.get_pack_plan()\n"
+            "tp.build_parser().parse_args(['-p', 'orm', '-j', '4'])\n")
+    assert loaded_after(code) == set()
+
+
+def test_packing_loads_numpy_and_pil(src_dir):
+    assert {"numpy", "PIL"} <= loaded_after(f"import texture_packer as tp\ntp.pack(tp.Config(), {{'_albedo': {str(src_dir / 'Rock_albedo.png')!r}}})")
+
+
+def test_main_in_process_equals_script(src_dir, tmp_path, capsys):
+    tp.main(["-s", str(src_dir), "-d", str(tmp_path / "main"), "-p", "unity"])
+    assert "Texture packing complete" in capsys.readouterr().out
+    run("-s", src_dir, "-d", tmp_path / "script", "-p", "unity")
+    assert {n:p.read_bytes() for n, p in output_files(tmp_path / "main").items()} == {n:p.read_bytes() for n, p in output_files(tmp_path / "script").items()}
+    with pytest.raises(SystemExit) as exc:
+        tp.main(["--version-of-nothing"])
+    assert exc.value.code == 2
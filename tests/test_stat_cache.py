@@ -0,0 +1,70 @@
+import os
+
+import texture_packer as tp
+from conftest import output_files, run
+
+
+def count_scandir(monkeypatch)->list[str]:
+    calls = []
+    scandir = os.scandir
+
+    def counting_scandir(path="."):
+        calls.append(os.fspath(path))
+        return scandir(path)
+    monkeypatch.setattr(tp.os, "scandir", counting_scandir)
+    return calls
+
+
+def test_directory_is_listed_once(tmp_path, monkeypatch):
+    for name in ("a.png", "b.png"):
+        (tmp_path / name).write_bytes(b"x" * 3)
+    cache = tp.StatCache()
+    calls = count_scandir(monkeypatch)
+    assert cache.exists(tmp_path / "a.png") and not cache.exists(tmp_path / "c.png")
+    assert cache.stat(tmp_path / "b.png").st_size == 3
+    assert cache.stat(tmp_path / "c.png") == None
+    assert not cache.exists(tmp_path / "missing" / "a.png")
+    assert calls == [str(tmp_path), str(tmp_path / "missing")]
+
+
+def test_invalidated_file_is_stat_again(tmp_path):
+    cache = tp.StatCache()
+    path = tmp_path / "out.png"
+    assert not cache.exists(path)
+    path.write_bytes(b"packed")
+    assert not cache.exists(path) #listing is not read again
+    cache.invalidate(path)
+    assert cache.exists(path) and cache.stat(path).st_size == 6
+    path.write_bytes(b"packed again")
+    assert cache.stat(path).st_size == 12 #written files are not cached
+
+
+def test_scan_listing_fills_cache(tmp_path, monkeypatch):
+    (tmp_path / "sub").mkdir()
+    for name in ("Rock_ao.png", "sub/Rock_ao.png"):
+        (tmp_path / name).write_bytes(b"x")
+    config = tp.Config()
+    config.recursive = True
+    packer = tp.TexturePacker()
+    packer.scan_source_files(tmp_path, config)
+    calls = count_scandir(monkeypatch)
+    assert packer.stat_cache.exists(tmp_path / "sub" / "Rock_ao.png")
+    assert packer.stat_cache.stat(tmp_path / "Rock_ao.png").st_size == 1
+    assert calls == []
+
+
+def test_make_dir(tmp_path):
+    cache = tp.StatCache()
+    nested = tmp_path / "a" / "b"
+    assert cache.make_dir(nested) and nested.is_dir()
+    assert not cache.make_dir(nested)
+    assert cache.exists(nested) and not cache.exists(nested / "out.png")
+
+
+def test_no_overwrite_run_sees_outputs_of_previous_run(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "-p", "orm", "-r")
+    before = {name:path.stat().st_mtime_ns for name, path in output_files(dest).items()}
+    out = run("-s", src_dir, "-d", dest, "-p", "orm", "-r", "--no-owerwrite")
+    assert out.count("(file exists)") == len(before)
+    assert {name:path.stat().st_mtime_ns for name, path in output_files(dest).items()} == before
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from conftest import output_files, read_pixels, run
+
+STREAM = ("--stream-threshold", "0.0001", "--strip-rows", "7") #every group streamed, strips not dividing the height
+
+
+@pytest.mark.parametrize("args", [
+    ("-p", "orm"),
+    ("-p", "unity"),
+    ("-p", "orm", "-b", "16"),
+    ("-p", "unreal", "-o", "tiff", "-b", "16"),
+    ("-p", "ord", "-o", "tiff", "-b", "32f"),
+    ("--target", "orm", "--target", "unreal"),
+])
+def test_streamed_outputs_equal_in_memory(src_dir, tmp_path, args):
+    memory, streamed = tmp_path / "memory", tmp_path / "streamed"
+    assert "[*] Streaming mode" not in run("-s", src_dir, "-d", memory, *args)
+    assert "[*] Streaming mode" in run("-s", src_dir, "-d", streamed, *args, *STREAM)
+    expected, outputs = output_files(memory), output_files(streamed)
+    assert sorted(outputs) == sorted(expected)
+    for name, path in expected.items():
+        assert np.array_equal(read_pixels(outputs[name]), read_pixels(path)), name
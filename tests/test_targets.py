@@ -0,0 +1,70 @@
+import json
+
+import texture_packer as tp
+from conftest import MATERIALS, output_files, run
+
+CONFIG = """[settings]
+[filters]
+.png
+[map suffixes]
+_albedo
+_normal
+_ao
+_roughness
+_metallic
+_height
+[pack]
+_albedo > _albedo:rgb
+[target orm]
+preset > orm
+[target masks]
+bit_depth > 16
+output_format > tiff
+_mask > _metallic:r | _ao:r | _height:r | _roughness:r*
+"""
+
+
+def contents(dest)->dict[str,bytes]:
+    return {name:path.read_bytes() for name, path in output_files(dest).items()}
+
+
+def test_targets_equal_separate_runs(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "--target", "orm", "--target", "unity", "--target", "ue:naming_scheme=unreal,output_format=tga",
+        "-p", "unreal", "--trace", tmp_path / "trace.jsonl")
+    run("-s", src_dir, "-d", tmp_path / "orm", "-p", "orm")
+    run("-s", src_dir, "-d", tmp_path / "unity", "-p", "unity")
+    run("-s", src_dir, "-d", tmp_path / "ue", "-p", "unreal", "--naming-scheme", "unreal", "-o", "tga")
+    assert sorted(p.name for p in dest.iterdir() if not p.name.startswith(".")) == ["orm", "ue", "unity"] #nothing written to dest itself
+    for name in ("orm", "unity", "ue"):
+        assert contents(dest / name) == contents(tmp_path / name), name
+    decodes = [json.loads(ln)["path"] for ln in (tmp_path / "trace.jsonl").read_text().splitlines() if json.loads(ln)["name"] == "decode"]
+    assert len(decodes) == len(set(decodes)) == 6 * len(MATERIALS) #every source decoded once for all targets
+
+
+def test_config_file_targets_and_round_trip(src_dir, tmp_path):
+    config_path = tmp_path / "config.txt"
+    config_path.write_text(CONFIG)
+    dest = tmp_path / "dest"
+    out = run("-s", src_dir, "-d", dest, "-c", config_path)
+    assert "[!] Top-level [pack] layout is not packed" in out
+    assert sorted(output_files(dest / "masks")) == sorted(f"{name}_mask.tiff" for name in MATERIALS)
+    assert sorted(output_files(dest / "orm")) == sorted(f"{name}{suffix}.png" for name in MATERIALS for suffix in ("_albedo", "_normal", "_orm"))
+
+    saved = tmp_path / "saved.txt"
+    config = tp.Config().load_from_file(config_path)
+    config.save_to_file(saved)
+    again = tp.Config().load_from_file(saved)
+    assert again.targets == config.targets
+    run("-s", src_dir, "-d", tmp_path / "again", "-c", saved)
+    assert contents(tmp_path / "again" / "masks") == contents(dest / "masks")
+    assert contents(tmp_path / "again" / "orm") == contents(dest / "orm")
+
+
+def test_identical_outputs_across_targets_are_linked(src_dir, tmp_path):
+    dest = tmp_path / "dest"
+    run("-s", src_dir, "-d", dest, "--target", "orm", "--target", "ord", "--dedup")
+    for name in (name.lower() for name in MATERIALS): #lowercase_names of default config.txt
+        for suffix in ("_albedo", "_normal"):
+            assert (dest / "orm" / f"{name}{suffix}.png").stat().st_ino == (dest / "ord" / f"{name}{suffix}.png").stat().st_ino
+        assert (dest / "orm" / f"{name}_orm.png").stat().st_nlink == 1
@@ -0,0 +1,39 @@
+import json
+import pstats
+
+import pytest
+
+from conftest import GRAY_MAPS, MATERIALS, run
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_chrome_trace(src_dir, tmp_path, jobs):
+    trace = tmp_path / "trace.json"
+    out = run("-s", src_dir, "-d", tmp_path / "dest", "-p", "orm", "-j", jobs, "--trace", trace)
+    assert f"[+] Save trace: {trace}" in out
+    events = [e for e in json.loads(trace.read_text())["traceEvents"] if e["ph"] == "X"]
+    names = {e["name"] for e in events}
+    assert {"scan", "decode", "pack", "write"} <= names
+    groups = [e for e in events if e["cat"] == "pack_group"]
+    assert sorted(e["name"] for e in groups) == sorted(MATERIALS)
+    assert all(e["args"]["outputs"] == 3 and "peak_mb" in e["args"] for e in groups)
+    assert out.count("[*] Peak memory of") == len(MATERIALS)
+    decodes = [e for e in events if e["name"] == "decode"]
+    assert len(decodes) == len(MATERIALS) * (2 + len(GRAY_MAPS) - 1) #height is not packed by orm
+    assert all(e["args"]["bytes_read"] > 0 for e in decodes)
+    writes = [e for e in events if e["name"] == "write"]
+    assert len(writes) == len(MATERIALS) * 3 and all(e["args"]["bytes_written"] > 0 for e in writes)
+
+
+def test_jsonl_trace_and_profile(src_dir, tmp_path):
+    trace, prof = tmp_path / "trace.jsonl", tmp_path / "pack.prof"
+    run("-s", src_dir, "-d", tmp_path / "dest", "-p", "orm", "--trace", trace, "--profile", prof)
+    records = [json.loads(ln) for ln in trace.read_text().splitlines()]
+    assert {"name", "stage", "start", "duration_s", "pid", "thread"} <= set(records[0])
+    assert [r["start"] for r in records] == sorted(r["start"] for r in records)
+    assert any(r["name"] == "write" and r["path"].endswith("Rock_orm.png") for r in records)
+    assert pstats.Stats(str(prof)).total_calls > 0
+
+
+def test_untraced_run_reports_no_peak(src_dir, tmp_path):
+    assert "Peak memory" not in run("-s", src_dir, "-d", tmp_path / "dest", "-p", "orm")
@@ -0,0 +1,77 @@
+import queue
+import signal
+import subprocess
+import sys
+import threading
+
+from PIL import Image
+
+from conftest import SCRIPT, make_source, output_files, run
+
+
+class Watcher:
+    """Watch mode run of the script, console lines are read by a thread"""
+
+    def __init__(self, *argv) -> None:
+        self.proc = subprocess.Popen([sys.executable, "-u", str(SCRIPT)] + [str(arg) for arg in argv] + ["--watch", "--watch-interval", "0.05"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        self.lines = queue.Queue()
+        self.output = []
+        self.reader = threading.Thread(target=lambda: [self.lines.put(ln) for ln in self.proc.stdout], daemon=True)
+        self.reader.start()
+
+    def wait_for(self, text:str, timeout:float=30)->list[str]:
+        """Lines printed until a line containing text"""
+        read = []
+        while True:
+            ln = self.lines.get(timeout=timeout)
+            read.append(ln)
+            self.output.append(ln)
+            if text in ln:
+                return read
+
+    def stop(self)->str:
+        """Stop watching (Ctrl+C), returns whole console output"""
+        self.proc.send_signal(signal.SIGINT)
+        self.proc.wait(timeout=30)
+        self.reader.join(timeout=30)
+        while not self.lines.empty():
+            self.output.append(self.lines.get())
+        return "".join(self.output)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc.poll() == None:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def test_watch_repacks_only_changed_group(src_dir, tmp_path):
+    dest, clean = tmp_path / "dest", tmp_path / "clean"
+    with Watcher("-s", src_dir, "-d", dest, "-p", "orm") as watcher:
+        watcher.wait_for("[*] Watching")
+        Image.fromarray(make_source(99, 1)).save(src_dir / "Rock_roughness.png")
+        repacked = watcher.wait_for("[+] Repacked in")
+        watcher.stop()
+    assert "repacking 1 group(s): Rock" in "".join(repacked)
+    saved = [ln for ln in repacked if ln.startswith("[+] Save")]
+    assert len(saved) == 3 and all("Rock_" in ln for ln in saved)
+    run("-s", src_dir, "-d", clean, "-p", "orm")
+    assert {name:path.read_bytes() for name, path in output_files(dest).items()} == {name:path.read_bytes() for name, path in output_files(clean).items()}
+
+
+def test_watch_survives_removed_source_directory(src_dir, tmp_path):
+    dest, moved = tmp_path / "dest", tmp_path / "moved"
+    with Watcher("-s", src_dir, "-d", dest, "-p", "orm") as watcher:
+        watcher.wait_for("[*] Watching")
+        src_dir.rename(moved)
+        watcher.wait_for("[!] Scan failed")
+        moved.rename(src_dir)
+        Image.fromarray(make_source(99, 1)).save(src_dir / "Metal_ao.png")
+        repacked = watcher.wait_for("[+] Repacked in")
+        out = watcher.stop()
+    assert "repacking 1 group(s): Metal" in "".join(repacked)
+    assert out.count("[!] Scan failed") == 1
+    assert "[*] Watch stopped" in out
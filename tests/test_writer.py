@@ -0,0 +1,77 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import texture_packer as tp
+from conftest import MATERIALS, output_files, read_pixels, run
+
+
+class FailingPacker:
+    """Packer stub whose save_texture fails for one output, slowly, on writer threads"""
+
+    def __init__(self, failing:str, error:Exception) -> None:
+        self.failing = failing
+        self.error = error
+        self.saved = []
+        self.threads = set()
+
+    def save_texture(self, tex, save_path, config, tex_suffix=""):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        if save_path.name == self.failing:
+            raise self.error
+        self.saved.append(save_path.name)
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+@pytest.mark.parametrize("error", [OSError("disk full"), RuntimeError("encoder crashed")])
+def test_write_error_is_attributed_to_its_output(tmp_path, capsys, threads, error):
+    packer = FailingPacker("b_2.png", error)
+    done, failed, groups = [], [], []
+    with tp.TextureWriter(packer, threads) as writer:
+        for group in ("a", "b", "c"):
+            for i in range(3):
+                name = f"{group}_{i}.png"
+                writer.submit(None, tmp_path / name, None, done=lambda name=name: done.append(name), failed=lambda e, name=name: failed.append((name, e)))
+            writer.after(lambda group=group: groups.append(group))
+    out = capsys.readouterr().out
+    assert failed == [("b_2.png", str(error) if isinstance(error, OSError) else "RuntimeError: encoder crashed")]
+    assert f"[!] Texture <{tmp_path / 'b_2.png'}> not saved" in out
+    assert writer.failed == 1
+    assert sorted(done) == sorted(packer.saved) and len(done) == 8
+    assert groups == ["a", "b", "c"] #group completions in submission order
+    if threads:
+        assert all(name.startswith("writer") for name in packer.threads)
+
+
+def test_compression_settings_keep_pixels(src_dir, tmp_path):
+    run("-s", src_dir, "-d", tmp_path / "default", "-p", "orm")
+    run("-s", src_dir, "-d", tmp_path / "fast", "-p", "orm", "--fast-write", "--write-threads", "4")
+    run("-s", src_dir, "-d", tmp_path / "small", "-p", "orm", "--png-compress-level", "9", "--optimize", "--write-threads", "0")
+    default = output_files(tmp_path / "default")
+    for variant in ("fast", "small"):
+        outputs = output_files(tmp_path / variant)
+        assert sorted(outputs) == sorted(default)
+        for name, path in default.items():
+            assert np.array_equal(read_pixels(outputs[name]), read_pixels(path)), name
+    size = lambda variant: sum(path.stat().st_size for path in output_files(tmp_path / variant).values())
+    assert size("fast") > size("default") >= size("small")
+
+
+def test_jpg_and_tga_outputs(src_dir, tmp_path):
+    run("-s", src_dir, "-d", tmp_path / "jpg", "-p", "orm", "-o", "jpg", "--jpeg-quality", "90")
+    run("-s", src_dir, "-d", tmp_path / "tga", "-p", "orm", "-o", "tga", "--tga-rle")
+    run("-s", src_dir, "-d", tmp_path / "png", "-p", "orm")
+    for name, path in output_files(tmp_path / "png").items():
+        expected = read_pixels(path).astype(np.int32)
+        assert np.array_equal(read_pixels(tmp_path / "tga" / name.replace(".png", ".tga")), expected), name
+        buf = io.BytesIO()
+        with Image.open(path) as img:
+            img.save(buf, "JPEG", quality=90)
+        with Image.open(buf) as img:
+            assert np.array_equal(read_pixels(tmp_path / "jpg" / name.replace(".png", ".jpg")), np.asarray(img).reshape(expected.shape[:2] + (-1,))), name
+    assert len(output_files(tmp_path / "jpg")) == 3 * len(MATERIALS)
@@ -1,15 +1,63 @@
+from __future__ import annotations
 import argparse
+import copy
+import fnmatch
+import hashlib
+import importlib
+import io
 import json
+import os
+import shutil
 import string
+import struct
+import sys
+import tempfile
+import threading
 import time
+import zlib
+from collections import deque
+from contextlib import contextmanager, nullcontext, redirect_stdout
 from os import error
 from pathlib import Path
-from xmlrpc.client import Boolean
-from PIL.Image import Image
-from PIL import Image as Img
-from PIL import ImageChops
-import numpy as np
-from argparse import ArgumentParser
+
+TYPE_CHECKING = False #typing.TYPE_CHECKING without importing typing
+if TYPE_CHECKING:
+    from PIL.Image import Image
+
+
+class LazyModule:
+    """
+    Module imported on first attribute access. PIL and NumPy are loaded only when pixels are touched,
+    so runs which only scan, plan or validate don't pay their import time.
+    """
+
+    def __init__(self, name:str) -> None:
+        self._name = name
+
+    def __getattr__(self, attr:str):
+        module = importlib.import_module(self._name)
+        self.__dict__.update(module.__dict__) #later lookups are plain attribute reads
+        return getattr(module, attr)
+
+
+class LazyConstant:
+    """Class attribute built on first access (tables of NumPy dtypes or PIL filters)"""
+
+    def __init__(self, factory) -> None:
+        self.factory = factory
+
+    def __set_name__(self, owner, name:str):
+        self.name = name
+
+    def __get__(self, obj, owner):
+        value = self.factory()
+        setattr(owner, self.name, value)
+        return value
+
+
+np = LazyModule("numpy")
+Img = LazyModule("PIL.Image")
+futures = LazyModule("concurrent.futures") #imports logging, thread pools are created only once work starts
 
 description = '''\
 This texture packer is tool for batch renaming and packing images to textures with custom channel layout.
@@ -19,22 +67,63 @@ This texture packer is tool for batch renaming and packing images to textures wi
     Pack only unexisting output textures (optional).
     Preset modes for ORM and ORD packing.
     BMP texture format support.
-|Not implemented:
-    Recursive directory scanning, glob syntax,
+    Recursive directory scanning, include/exclude glob filters.
 '''
 
-parser  = ArgumentParser(epilog = description)
-parser.add_argument("-c","--config", dest="config", default="config.txt", help="Path to config (relative cwd or absolute). Default 'config.txt' in cwd")
-parser.add_argument("-s", "--src", dest="src_dir", default=None, help="Path to directory with source textures (relative cwd or absolute)")
-parser.add_argument("-d","--dest", dest="dest_dir", default=None, help="Path to destination directory (relative cwd or absolute)")
-parser.add_argument("-o","--output-format", dest= "output_format", default=None, help="Output format", choices=["png","jpg","bmp","tga","dds"])
-parser.add_argument("--owerwrite", type=bool, dest="owerwrite", action=argparse.BooleanOptionalAction, help = "Owerwrite already existing packed output textures.")
-parser.add_argument("-p", "--preset", dest="preset", default=None, help="Use preset packing configuration", choices=["orm", "ord", "unity", "unreal"])
-parser.add_argument("--pack-type", dest="pack_type", default=None, help="Alias for --preset (ORM or ORD packing)", choices=["orm", "ord"])
-parser.add_argument("--validate", dest="validate", action="store_true", default=False, help="Validate that all required textures exist before packing")
-parser.add_argument("--naming-scheme", dest="naming_scheme", default="standard", help="Naming convention to use", choices=["standard", "unreal"])
-#parser.add_argument("-l","-local-config", dest= "local_config", action="store_true", default="false", help="Use local config (defined in -c or --config) in source directory")
-args = parser.parse_args()
+def build_parser()->argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(epilog = description)
+    parser.add_argument("-c","--config", dest="config", default="config.txt", help="Path to config (relative cwd or absolute). Default 'config.txt' in cwd")
+    parser.add_argument("-s", "--src", dest="src_dir", default=None, help="Path to directory with source textures (relative cwd or absolute)")
+    parser.add_argument("-d","--dest", dest="dest_dir", default=None, help="Path to destination directory (relative cwd or absolute)")
+    parser.add_argument("-o","--output-format", dest= "output_format", default=None, help="Output format", choices=["png","jpg","bmp","tga","dds","tiff"])
+    parser.add_argument("-b","--bit-depth", dest="bit_depth", default=None, help="Output channel bit depth: 8, 16 (png, tiff) or 32 bit float (tiff). Default 8", choices=["8","16","32f"])
+    parser.add_argument("--owerwrite", type=bool, dest="owerwrite", action=argparse.BooleanOptionalAction, help = "Owerwrite already existing packed output textures.")
+    parser.add_argument("-p", "--preset", dest="preset", default=None, help="Use preset packing configuration", choices=["orm", "ord", "unity", "unreal"])
+    parser.add_argument("--pack-type", dest="pack_type", default=None, help="Alias for --preset (ORM or ORD packing)", choices=["orm", "ord"])
+    parser.add_argument("--validate", dest="validate", action="store_true", default=False, help="Validate that all required textures exist before packing")
+    parser.add_argument("--naming-scheme", dest="naming_scheme", default="standard", help="Naming convention to use", choices=["standard", "unreal"])
+    parser.add_argument("-r", "--recursive", dest="recursive", action=argparse.BooleanOptionalAction, help="Scan source subdirectories, output keeps subdirectory structure")
+    parser.add_argument("--include", dest="include", action="append", default=None, help="Glob pattern of source paths (relative to source directory) to pack, may be repeated")
+    parser.add_argument("--exclude", dest="exclude", action="append", default=None, help="Glob pattern of source paths (relative to source directory) to skip, may be repeated")
+    parser.add_argument("--stream-threshold", dest="stream_threshold", type=float, default=None, help="Pack groups larger than this many megapixels in row strips with bounded memory, 0 - disabled. Default 128 (above 8K)")
+    parser.add_argument("--strip-rows", dest="stream_strip_rows", type=int, default=None, help="Rows per strip in streaming mode. Default 256")
+    parser.add_argument("--incremental", dest="incremental", action=argparse.BooleanOptionalAction, help="Skip output textures whose sources, channel layout and naming are unchanged since the last run (uses build manifest in destination directory)")
+    parser.add_argument("--resume", dest="resume", action=argparse.BooleanOptionalAction, help="Skip groups completed by previous interrupted run of the same targets (journal in destination directory), failed groups are packed again")
+    parser.add_argument("--journal", dest="journal", action=argparse.BooleanOptionalAction, help="Append completed groups to crash safe journal in destination directory, read by a later --resume run (which keeps journaling). Default off")
+    parser.add_argument("--error-report", dest="error_report", default=None, metavar="FILE", help="Write JSON report of failed groups (decode, pack and write errors), errors are always printed at the end of run")
+    parser.add_argument("--write-threads", dest="write_threads", type=int, default=None, help="Threads encoding and writing output textures while next outputs are packed, 0 - write in packing thread. Default 2")
+    parser.add_argument("--png-compress-level", dest="png_compress_level", type=int, default=None, choices=range(0, 10), metavar="0-9", help="Deflate level of PNG (and 16/32 bit TIFF) outputs, 0 - store, 9 - smallest. Default 6")
+    parser.add_argument("--optimize", dest="optimize", action=argparse.BooleanOptionalAction, help="Extra encoder pass for smaller PNG/JPG files (slow)")
+    parser.add_argument("--jpeg-quality", dest="jpeg_quality", type=int, default=None, help="JPG output quality 1-95. Default 75")
+    parser.add_argument("--tga-rle", dest="tga_rle", action=argparse.BooleanOptionalAction, help="RLE compressed TGA outputs")
+    parser.add_argument("--fast-write", dest="fast_write", action=argparse.BooleanOptionalAction, help="Fast iteration profile: lowest compression effort, larger files, several times faster writes")
+    parser.add_argument("--max-size", dest="max_size", type=int, default=None, help="Limit longer side of outputs to N pixels (aspect ratio kept), per output: '@ max_size=N' in [pack] line. Default 0 - no limit")
+    parser.add_argument("--scale", dest="scale", type=float, default=None, help="Scale outputs relative to group size (largest source), per output: '@ scale=F' in [pack] line. Default 1.0")
+    parser.add_argument("--resize-filter", dest="resize_filter", default=None, choices=["auto", "box", "bilinear", "bicubic", "lanczos"], help="Filter resampling sources to output size. auto (default): area average for integer downscale factors, bicubic otherwise")
+    parser.add_argument("--mipmaps", dest="mipmaps", action=argparse.BooleanOptionalAction, help="Write full mip chain to DDS outputs")
+    parser.add_argument("--mip-filter", dest="mip_filter", default=None, choices=["box", "bilinear", "bicubic", "lanczos"], help="Mip downsampling filter. Default box")
+    parser.add_argument("--dds-compression", dest="dds_compression", default=None, choices=["auto", "none", "bc1", "bc4", "bc5", "bc7"], help="DDS block compression. auto (default): normal maps BC5, single channel BC4, RGBA BC7, RGB --dds-rgb")
+    parser.add_argument("--dds-rgb", dest="dds_rgb_format", default=None, choices=["bc1", "bc7"], help="Compression of RGB outputs in auto mode: bc1 (smaller, faster) or bc7 (higher quality). Default bc1")
+    parser.add_argument("--detect-constants", dest="detect_constants", action=argparse.BooleanOptionalAction, help="Detect constant source channels (e.g. all black metallic), fill them as single values and report constant outputs. Default on")
+    parser.add_argument("--constants-cache", dest="constants_cache", action=argparse.BooleanOptionalAction, help="Remember constant sources in destination directory, unchanged constant sources are not decoded in later runs")
+    parser.add_argument("--constants-report", dest="constants_report", default=None, metavar="FILE", help="Write JSON report of constant sources and outputs which could be replaced by engine constants")
+    parser.add_argument("--decode-cache", dest="decode_cache_dir", default=None, metavar="DIR", help="Directory of decoded sources (uncompressed .npy) shared by runs, later runs memory map them instead of decoding. Default disabled")
+    parser.add_argument("--decode-cache-size", dest="decode_cache_size", type=float, default=None, metavar="MB", help="Size budget of --decode-cache directory, least recently used sources are evicted. Default 8192")
+    parser.add_argument("--dedup", dest="dedup", action=argparse.BooleanOptionalAction, help="Hash sources and pack outputs with identical layout and source contents once, duplicates are linked to the first encode")
+    parser.add_argument("--dedup-link", dest="dedup_link", default=None, choices=["hardlink", "copy"], help="How duplicate outputs are written: hardlink (copy if not supported) or copy. Default hardlink")
+    parser.add_argument("--prefetch", dest="prefetch_groups", type=int, default=None, help="Number of upcoming groups whose sources are read and decoded in background while current group packs, 0 - disabled. Default 2")
+    parser.add_argument("--prefetch-memory", dest="prefetch_memory", type=float, default=None, help="Memory cap in MB of prefetched, not yet packed sources. Default 1024")
+    parser.add_argument("--target", dest="target_specs", action="append", default=None, metavar="NAME[:param=value,...]", help="Named target packed in the same pass from the same decoded sources, may be repeated. Preset names (orm, ord, unity, unreal) use the preset, params override settings (e.g. naming_scheme=unreal,output_format=dds,dest_dir=out/ue). Default dest_dir: DEST/NAME")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=None, help="Number of worker processes packing texture groups in parallel, 0 - one per CPU core. Default 1 (no process pool)")
+    parser.add_argument("--serve", dest="serve", nargs="?", const="127.0.0.1:8765", default=None, metavar="ADDRESS", help="Run as resident job server: HOST:PORT (HTTP, default 127.0.0.1:8765) or unix:PATH (HTTP over Unix socket)")
+    parser.add_argument("--serve-workers", dest="serve_workers", type=int, default=None, help="Worker processes running server jobs concurrently. Default 2")
+    parser.add_argument("--trace", dest="trace_path", default=None, help="Write per group/output stage timings (scan, group, decode, pack, write) with bytes read/written: Chrome trace (.json, open in chrome://tracing or Perfetto) or JSON lines (.jsonl)")
+    parser.add_argument("--profile", dest="profile_path", default=None, help="Run under cProfile and write stats to file (main process), view with python -m pstats or snakeviz")
+    parser.add_argument("--plan", dest="plan_path", nargs="?", const="-", default=None, metavar="FILE", help="Dry run: print inputs, outputs and missing maps of every group without decoding anything, optionally write JSON report to FILE. Exits with error when used with --validate and maps are missing")
+    parser.add_argument("--watch", dest="watch", action="store_true", default=False, help="Keep running: poll source directory and repack only groups whose source files changed (Ctrl+C to stop)")
+    parser.add_argument("--watch-interval", dest="watch_interval", type=float, default=None, help="Source directory polling interval in seconds for --watch. Default 0.2")
+    #parser.add_argument("-l","-local-config", dest= "local_config", action="store_true", default="false", help="Use local config (defined in -c or --config) in source directory")
+    return parser
 
 
 class FileGroups:dict[str,dict[str,str]]
@@ -64,11 +153,115 @@ class PackChItem:
         pass
 
 
+class SuffixMatcher:
+    """
+    Longest suffix match for lowercased file stems, same results as endswith() over suffixes sorted long>short.
+    Suffixes are bucketed by length: a lookup does one hash check per distinct suffix length
+    instead of one endswith() per suffix.
+    """
+
+    def __init__(self, suffixes) -> None:
+        self.buckets:dict[int,set[str]] = {}
+        for s in suffixes:
+            self.buckets.setdefault(len(s), set()).add(s)
+        self.lengths = sorted(self.buckets, reverse=True)
+        self._probes = [(-length, self.buckets[length]) for length in self.lengths]
+
+    def match(self, name:str)->tuple[str, int]:
+        name = name.lower()
+        size = len(name)
+        for neg, bucket in self._probes:
+            tail = name[neg:]
+            if tail in bucket:
+                return tail, size + neg
+        return None, -1
+
+
+class OutputPlan:
+    """
+    Compiled layout of one output texture: channel count and image mode, deduplicated source suffixes and
+    per channel gather steps (output channel, source suffix, source channel, invert).
+    Built once per layout, tuples only, shared read-only by all groups.
+    """
+
+    def __init__(self, suffix:str, pack_items:list[PackChItem], max_size:int=0, scale:float=1.0) -> None:
+        self.suffix = suffix
+        self.items = tuple(pack_items)
+        if scale <= 0 or max_size < 0:
+            raise ValueError(f"Invalid output size options (max_size={max_size}, scale={scale})")
+        self.max_size = max_size
+        self.scale = scale
+        self.channels = len(self.items) if len(self.items) != 2 else 1 #two channels unavailable, remove last one
+        if self.channels > 4:
+            raise ValueError(f"Too many channels to pack ({self.channels}), max 4 available (rgba)")
+        self.mode = TexturePacker.IMG_MODES_MAP.get(self.channels, None)
+        self.sources = tuple(dict.fromkeys(itm.suffix for itm in self.items))
+        self.gather = tuple((i, itm.suffix, itm.ch, itm.invert) for i, itm in enumerate(self.items[:self.channels]))
+
+    def target_size(self, size:tuple[int,int])->tuple[int,int]:
+        """Output size (width, height) for group size: scaled, then longer side limited to max_size"""
+        if size == None:
+            return None
+        width, height = size
+        if self.scale != 1.0:
+            width, height = max(round(width * self.scale), 1), max(round(height * self.scale), 1)
+        if self.max_size and max(width, height) > self.max_size:
+            factor = self.max_size / max(width, height)
+            width, height = max(round(width * factor), 1), max(round(height * factor), 1)
+        return width, height
+
+
+class PackPlan:
+    """
+    Compiled config.packer: OutputPlan per output suffix and all source suffixes the layout reads.
+    Layout errors are raised here, before any source is decoded.
+    """
+
+    def __init__(self, packer:dict[str,list[PackChItem]], options:dict[str,dict]=None) -> None:
+        outputs = {}
+        for suffix, pack_items in packer.items():
+            try:
+                outputs[suffix] = OutputPlan(suffix, pack_items, **(options or {}).get(suffix, {}))
+            except ValueError as e:
+                raise ValueError(f"Output {suffix}: {e}") from None
+        self.outputs = outputs
+        self.sources = tuple(dict.fromkeys(s for out in outputs.values() for s in out.sources))
+
+    def get(self, suffix:str, pack_items:list[PackChItem])->OutputPlan:
+        """Compiled output, compiled on the fly if pack_items is not the planned layout of suffix"""
+        out = self.outputs.get(suffix, None)
+        if out == None or out.items != tuple(pack_items):
+            out = OutputPlan(suffix, pack_items)
+        return out
+
+    def missing(self, suffixes, group_items:dict[str,Path])->list[str]:
+        """Source suffixes read by given outputs and not found in group"""
+        return [s for s in dict.fromkeys(s for out in suffixes for s in self.outputs[out].sources) if s not in group_items]
+
+
+class GroupPlan:
+    """
+    Planned work of one texture group: outputs to pack, skipped outputs {suffix:(save_path, reason)}
+    and source suffixes missing in group per output to pack.
+    """
+
+    def __init__(self, name:str, items:dict[str,Path], outputs:dict[str,list[PackChItem]], skipped:dict[str,tuple[Path,str]], missing:dict[str,list[str]]) -> None:
+        self.name = name
+        self.items = items
+        self.outputs = outputs
+        self.skipped = skipped
+        self.missing = missing
+
+    def missing_sources(self)->list[str]:
+        return list(dict.fromkeys(s for suffixes in self.missing.values() for s in suffixes))
+
+
 class Config:
     ASSIGN_SIGN = ">"
     CHANNEL_SEPARATOR = ":"
     PIPELINE_SEPARATOR = "|"
     CHANNEL_INVERSION_SIGN = "*"
+    OPTIONS_SIGN = "@"
     SECTION_OPEN_SIGN = "["
     SECTION_CLOSE_SIGN = "]"
     COMMENT_SIGN = "#"
@@ -92,9 +285,60 @@ class Config:
     dest_dir = "dest" #may be overriden from -d --dest param
     lowercase_names = False
     output_format = "png" #may be overriden -o --output-format param
+    bit_depth = "8" #8, 16 or 32f, may be overriden -b --bit-depth param
     owerwrite = True #ADDED, True to preserve old bahavior
     naming_scheme = "standard" #can be "standard" or "unreal"
+    stream_threshold = 128 #megapixels, larger groups are packed strip by strip (out-of-core), 0 - disabled
+    stream_strip_rows = 256 #rows per strip in streaming mode
+    stream_temp_dir = "" #directory for spilled source channels in streaming mode, system temp if empty
+    incremental = False #rebuild only outdated outputs, tracked by build manifest in dest_dir
+    journal = False #append completed groups to crash safe journal in dest_dir (always on with resume)
+    resume = False #skip groups completed by previous (interrupted) run of the same targets, read from journal
+    error_report = "" #JSON report of failed groups (decode, pack and write errors), empty - errors are only printed at the end of run
+    jobs = 1 #worker processes for group packing, may be overriden from -j --jobs param
+    write_threads = 2 #threads encoding outputs while next outputs are packed, 0 - synchronous writes
+    png_compress_level = 6 #deflate level 0-9 of PNG outputs (and 16/32 bit TIFF outputs)
+    optimize = False #extra PNG/JPG encoder pass for smaller files
+    jpeg_quality = 75
+    tga_rle = False
+    fast_write = False #fast iteration profile, overrides compression settings above
+    mipmaps = False #full mip chain in DDS outputs
+    mip_filter = "box" #mip downsampling filter: box, bilinear, bicubic, lanczos
+    dds_compression = "auto" #auto, none, bc1, bc4, bc5, bc7. auto: normal maps bc5, single channel bc4, rgba bc7, rgb dds_rgb_format
+    dds_rgb_format = "bc1" #auto compression of rgb outputs: bc1 (smaller, faster) or bc7 (higher quality)
+    dds_threads = 0 #threads encoding DDS blocks, 0 - one per CPU core
+    normal_outputs = ["_normal"] #output suffixes holding normal maps (DDS bc5, renormalized mips)
+    max_size = 0 #longer side limit of outputs in pixels (aspect ratio kept), 0 - no limit. Per output: [pack] line option "@ max_size=N"
+    scale = 1.0 #output scale relative to group size (largest source). Per output: [pack] line option "@ scale=F"
+    resize_filter = "auto" #auto (area average for integer downscale factors, bicubic otherwise), box, bilinear, bicubic, lanczos
+    pack_options:dict[str,dict] #per output options of [pack] lines {suffix:{"max_size":N, "scale":F}}
+    detect_constants = True #constant source channels are filled as single values, constant outputs are reported
+    constants_cache = False #remember constant sources in dest_dir, unchanged ones are not decoded again
+    constants_report = "" #JSON report of constant sources and outputs, empty - disabled
+    dedup = False #hash sources, identical outputs are packed once and linked, identical sources are decoded once
+    dedup_link = "hardlink" #duplicate outputs: hardlink (copy where not supported) or copy
+    dedup_memory = 512 #MB, decoded sources kept for other groups with identical source files
+    decode_cache_dir = "" #directory of decoded sources shared by runs (e.g. several presets), empty - disabled
+    decode_cache_size = 8192 #MB, least recently used decoded sources are evicted above this size
+    prefetch_groups = 2 #read-ahead depth in groups (sequential packing), 0 - disabled
+    prefetch_memory = 1024 #MB, cap of prefetched sources waiting for packing
+    prefetch_threads = 4 #threads opening and decoding prefetched sources
+    watch_interval = 0.2 #seconds between source directory polls in watch mode
+    watch_debounce = 0.3 #seconds without further changes before changed groups are repacked (bursts of copied files)
+    serve_workers = 2 #server mode: warm worker processes (concurrent jobs)
+    serve_queue = 64 #server mode: jobs waiting for a worker, further jobs are rejected (HTTP 503)
+    serve_history = 1000 #server mode: finished jobs kept for status requests
+    trace_path = "" #Chrome trace (.json) or JSON lines (.jsonl) file with stage timings, empty - disabled
+    targets:dict[str,dict] #named targets packed in one pass {name:{"preset":..., "settings":{...}, "pack":{...}}}, [target NAME] sections, empty - single target
     extensions=[".png",".jpg",".tga"]
+    recursive = False #scan subdirectories, may be overriden from -r --recursive param
+    include = [] #glob patterns (list or comma separated string) matched against source path relative to src_dir
+    exclude = []
+    scan_threads = 8 #threads walking directories in recursive mode
+    _suffix_matcher:SuffixMatcher = None
+    _suffix_matcher_keys:tuple = None
+    _pack_plan:PackPlan = None
+    _pack_plan_key:tuple = None
 
     # Unreal Engine naming convention mappings
     UNREAL_SUFFIX_MAP = {
@@ -137,7 +381,24 @@ class Config:
     
 
     def __init__(self) -> None:
-        pass
+        self.pack_options = {} #per instance, filled by [pack] line options
+        self.targets = {}
+
+    def get_suffix_matcher(self)->SuffixMatcher:
+        """Suffix matcher for map_suffixes keys, rebuilt only when the suffix map changes"""
+        keys = tuple(self.map_suffixes)
+        if self._suffix_matcher == None or self._suffix_matcher_keys != keys:
+            self._suffix_matcher = SuffixMatcher(keys)
+            self._suffix_matcher_keys = keys
+        return self._suffix_matcher
+
+    def get_pack_plan(self)->PackPlan:
+        """Compiled packer layout, recompiled only when the layout changes. Raises ValueError on invalid layout"""
+        key = tuple((suffix, tuple((itm.suffix, itm.ch, itm.invert) for itm in pack_items), tuple(self.get_output_options(suffix).items())) for suffix, pack_items in self.packer.items())
+        if self._pack_plan == None or self._pack_plan_key != key:
+            self._pack_plan = PackPlan(self.packer, {suffix:self.get_output_options(suffix) for suffix in self.packer})
+            self._pack_plan_key = key
+        return self._pack_plan
 
     def apply_naming_scheme(self, base_name:str, suffix:str)->str:
         """
@@ -174,9 +435,13 @@ class Config:
                 result = result.lower()
             return result
 
-    def apply_preset(self, preset_name:str):
-        """Apply a preset packing configuration (orm, ord, unity, unreal)"""
+    PRESETS = ("orm", "ord", "unity", "unreal")
+
+    def apply_preset(self, preset_name:str, log=print):
+        """Apply a preset packing configuration (orm, ord, unity, unreal), log=None applies it silently"""
+        log = log if log != None else (lambda *args, **kwargs: None)
         preset_name = preset_name.lower()
+        self.pack_options = {}
 
         # Common suffix mappings for all presets
         common_suffixes = {
@@ -212,7 +477,7 @@ class Config:
 
         if preset_name == "orm":
             # ORM: Occlusion (R), Roughness (G), Metallic (B)
-            print("[*] Applying ORM preset (Occlusion-Roughness-Metallic)")
+            log("[*] Applying ORM preset (Occlusion-Roughness-Metallic)")
             self.map_suffixes = common_suffixes
             self.packer = {
                 "_albedo": [PackChItem("_albedo", 0), PackChItem("_albedo", 1), PackChItem("_albedo", 2)],
@@ -222,7 +487,7 @@ class Config:
 
         elif preset_name == "ord":
             # ORD: Occlusion (R), Roughness (G), Displacement/Height (B)
-            print("[*] Applying ORD preset (Occlusion-Roughness-Displacement)")
+            log("[*] Applying ORD preset (Occlusion-Roughness-Displacement)")
             self.map_suffixes = common_suffixes
             self.packer = {
                 "_albedo": [PackChItem("_albedo", 0), PackChItem("_albedo", 1), PackChItem("_albedo", 2)],
@@ -232,7 +497,7 @@ class Config:
 
         elif preset_name == "unity":
             # Unity: Metallic/Smoothness workflow (inverted roughness)
-            print("[*] Applying Unity preset (Metallic-Smoothness)")
+            log("[*] Applying Unity preset (Metallic-Smoothness)")
             self.map_suffixes = common_suffixes
             self.map_suffixes["_smoothness"] = ""
             self.packer = {
@@ -243,7 +508,7 @@ class Config:
 
         elif preset_name == "unreal":
             # Unreal Engine: ORM + separate normal and height
-            print("[*] Applying Unreal Engine preset")
+            log("[*] Applying Unreal Engine preset")
             self.map_suffixes = common_suffixes
             self.packer = {
                 "_albedo": [PackChItem("_albedo", 0), PackChItem("_albedo", 1), PackChItem("_albedo", 2)],
@@ -252,7 +517,7 @@ class Config:
                 "_height": [PackChItem("_height", 0)],
             }
         else:
-            print(f"[!] Unknown preset: {preset_name}")
+            log(f"[!] Unknown preset: {preset_name}")
             return False
 
         return True
@@ -317,9 +582,71 @@ class Config:
             result.extend(self._parse_pack_ch_items(p))
         return result
 
+    PACK_OPTIONS = {"max_size":int, "scale":float}
+
+    def _parse_pack_line(self, map_suff:str, map_data:str)->list[PackChItem]:
+        """Parse channel layout of [pack] line, "@ name=value, ..." output options are stored in pack_options"""
+        layout, *opts = map_data.split(self.OPTIONS_SIGN, 1)
+        options = {}
+        for opt in (opts[0].replace(",", " ").split() if opts else []):
+            name, _, value = opt.partition("=")
+            if name not in self.PACK_OPTIONS:
+                print("[!] Unknown option <"+opt+"> of output "+map_suff+", use: "+", ".join(self.PACK_OPTIONS))
+                continue
+            options[name] = self.PACK_OPTIONS[name](value)
+        if options:
+            self.pack_options[map_suff] = options
+        return self._parse_mapstr(layout)
+
+    def get_output_options(self, tex_suffix:str)->dict:
+        """Resize options of output: own [pack] line options over global max_size and scale"""
+        options = {"max_size":int(self.max_size), "scale":float(self.scale)}
+        options.update(self.pack_options.get(tex_suffix, {}))
+        return options
+
+    def get_options_text(self, tex_suffix:str)->str:
+        """[pack] line options text of output, empty if output has no own options"""
+        options = self.pack_options.get(tex_suffix, {})
+        return ", ".join(f"{k}={v}" for k, v in options.items())
+
     def _packer_ch_to_text(self, item:PackChItem)->str:
         return item.suffix + ":" + self.NUM_TO_CH[item.ch] + ("*" if item.invert else "")
 
+    FAST_WRITE_LEVEL = 1
+
+    def get_compress_level(self)->int:
+        return self.FAST_WRITE_LEVEL if self.fast_write else int(self.png_compress_level)
+
+    def get_encoder_params(self, fmt:str)->dict:
+        """PIL save() params of output format, fast_write profile trades file size for encoding speed"""
+        fmt = fmt.lower()
+        if fmt == "png":
+            return {"compress_level":self.get_compress_level(), "optimize":self.optimize and not self.fast_write}
+        if fmt in ("jpg", "jpeg"):
+            return {"quality":int(self.jpeg_quality), "optimize":self.optimize and not self.fast_write}
+        if fmt == "tga":
+            return {"rle":self.tga_rle and not self.fast_write}
+        return {}
+
+    def get_dds_writer(self)->"DdsWriter":
+        return DdsWriter(self.dds_compression, self.mipmaps, self.mip_filter, self.dds_rgb_format, int(self.dds_threads))
+
+    def get_encoder_key(self, tex_suffix:str)->tuple:
+        """Output settings which change encoded bytes of output beside its layout (dedup of outputs across targets)"""
+        return (self.output_format.lower(), str(self.bit_depth), self.is_normal_map(tex_suffix), bool(self.mipmaps), self.mip_filter, self.dds_compression,
+                self.dds_rgb_format, self.get_compress_level(), int(self.jpeg_quality), bool(self.optimize and not self.fast_write), bool(self.tga_rle and not self.fast_write))
+
+    def is_normal_map(self, tex_suffix:str)->bool:
+        return tex_suffix in self.get_patterns(self.normal_outputs)
+
+    def get_layout_text(self, pack_items:list[PackChItem])->str:
+        return " | ".join(self._packer_ch_to_text(itm) for itm in pack_items)
+
+    def get_patterns(self, value:str|list[str])->list[str]:
+        if isinstance(value, str):
+            value = value.split(",")
+        return [p.strip() for p in value if p.strip() != ""]
+
     def override_params(self, data:any):
         if not type(data) == dict:
             try:
@@ -357,22 +684,143 @@ class Config:
         #parse packer map
         p_lines = sect["pack"]
         p_map={}
+        self.pack_options = {}
         for ln in p_lines:
             map_suff,map_data,*_ = self._split_trim(ln, self.ASSIGN_SIGN)
-            p_map[map_suff] = self._parse_mapstr(map_data)
+            p_map[map_suff] = self._parse_pack_line(map_suff, map_data)
         self.packer = p_map
 
+        #named targets: "preset > name", "_suffix > layout" pack lines and settings
+        self.targets = {}
+        for section, t_lines in sect.items():
+            if not section.startswith(self.TARGET_SECTION):
+                continue
+            spec = {"settings":{}, "pack":{}}
+            for ln in t_lines:
+                key, value, *_ = self._split_trim(ln, self.ASSIGN_SIGN) + [""]
+                if key == "preset":
+                    spec["preset"] = value
+                elif key.startswith("_"):
+                    spec["pack"][key] = value
+                else:
+                    spec["settings"][key] = self._convert_auto(value)
+            self.add_target(section[len(self.TARGET_SECTION):].strip(), spec)
+
         return self
 
+    def load_from_dict(self, data:dict):
+        """
+        Apply job description (server mode): {"config": path, "preset": name, "settings": {param: value},
+        "map_suffixes": {suffix: mapped}, "extensions": [...], "pack": {"_orm": "_ao:r | _roughness:r | _metallic:r @ max_size=1024"} or ["_orm > _ao:r | ..."],
+        "targets": {name: {"preset": name, "settings": {...}, "pack": {...}}}}
+        """
+        if data.get("config"):
+            self.load_from_file(data["config"])
+        if data.get("preset") and not self.apply_preset(data["preset"], log=None):
+            raise ValueError("Unknown preset: "+str(data["preset"]))
+        self.override_params({k:v for k, v in data.get("settings", {}).items() if not k.startswith("_")})
+        if "map_suffixes" in data:
+            self.map_suffixes = dict(sorted(data["map_suffixes"].items(), key=lambda x: len(x[0]), reverse=True))
+        if "extensions" in data:
+            self.extensions = list(data["extensions"])
+        pack = data.get("pack", None)
+        if pack != None:
+            if isinstance(pack, list):
+                pack = dict(self._split_trim(ln, self.ASSIGN_SIGN)[:2] for ln in pack)
+            self.pack_options = {}
+            self.packer = {k.strip():self._parse_pack_line(k.strip(), v) for k, v in pack.items()}
+        if "targets" in data:
+            self.targets = {}
+            for name, spec in data["targets"].items():
+                self.add_target(name, spec)
+        return self
+
+    TARGET_SECTION = "target "
+
+    def add_target(self, name:str, spec:dict=None):
+        """Add named target {"preset": name, "settings": {param: value}, "pack": {suffix: layout}}, target named after preset uses it by default"""
+        spec = dict(spec or {})
+        if not name:
+            raise ValueError("Target without name")
+        if not spec.get("preset") and name.lower() in self.PRESETS:
+            spec["preset"] = name
+        self.targets = dict(self.targets, **{name:spec})
+
+    def add_target_text(self, text:str):
+        """Add target from command line: NAME[:param=value,...], e.g. "unreal:naming_scheme=unreal,output_format=dds" """
+        name, _, opts = text.partition(self.CHANNEL_SEPARATOR)
+        settings = {}
+        for opt in self._split_trim(opts, ","):
+            if opt == "":
+                continue
+            key, assign, value = opt.partition("=")
+            if not assign:
+                raise ValueError("Target option <"+opt+"> is not param=value")
+            settings[key.strip()] = self._convert_auto(value.strip())
+        preset = settings.pop("preset", None)
+        self.add_target(name.strip(), {"preset":preset, "settings":settings})
+
+    def get_targets(self)->list[tuple[str,"Config"]]:
+        """
+        Configs of named targets [(name, config)], [("", self)] without targets.
+        Target config is a copy of this config with target preset, settings and pack lines applied, dest_dir defaults to dest_dir/NAME.
+        Sources are scanned, grouped and decoded with this config. Raises ValueError on unknown preset or setting
+        """
+        if not self.targets:
+            return [("", self)]
+        configs = []
+        for name, spec in self.targets.items():
+            unknown = [k for k in spec.get("settings", {}) if k.startswith("_") or k == "targets" or not hasattr(self, k)]
+            if unknown:
+                raise ValueError("Unknown setting <"+", ".join(unknown)+"> of target "+name)
+            tconf = copy.copy(self)
+            tconf.targets = {}
+            tconf.dest_dir = str(Path(self.dest_dir, name))
+            tconf._pack_plan = None
+            tconf._suffix_matcher = None
+            tconf.load_from_dict({k:spec[k] for k in ("preset", "settings", "pack") if spec.get(k)})
+            configs.append((name, tconf))
+        return configs
+
+    def get_grouping_config(self)->"Config":
+        """Config grouping sources for all targets: map_suffixes of targets merged (sorted long>short), self without targets"""
+        if not self.targets:
+            return self
+        merged = dict(self.map_suffixes)
+        for _, tconf in self.get_targets():
+            merged.update(tconf.map_suffixes)
+        gconf = copy.copy(self)
+        gconf.map_suffixes = dict(sorted(merged.items(), key=lambda x: len(x[0]), reverse=True))
+        gconf._suffix_matcher = None
+        return gconf
+
+    SECTION_PARAMS = ("extensions", "map_suffixes", "packer", "pack_options", "targets") #saved in own sections, not in [settings]
+
+    def get_settings(self)->dict:
+        """[settings] params (public attributes of Config except sections), lists as comma separated text"""
+        settings = {}
+        for k, v in vars(Config).items():
+            if k.startswith("_") or not k[0].islower() or callable(v) or k in self.SECTION_PARAMS:
+                continue
+            v = getattr(self, k)
+            settings[k] = ", ".join(v) if isinstance(v, (list, tuple)) else v
+        return settings
+
+    def get_pack_lines(self)->list[str]:
+        """[pack] lines of layout with output options"""
+        lines = []
+        for k,v in self.packer.items():
+            s = k+" > " + " | ".join(self._packer_ch_to_text(itm) for itm in v)
+            if self.get_options_text(k):
+                s+=" " + self.OPTIONS_SIGN + " " + self.get_options_text(k)
+            lines.append(s)
+        return lines
+
     def save_to_file(self, path:str|Path):
         data:list[str] = []
         data.append("[settings]")
-        data.append("lowercase_names > "+str(self.lowercase_names))
-        data.append("scan_subdirectories > "+str(self.scan_subdirectories))
-        data.append("save_format > "+str(self.save_format))
-        data.append("src_dir > "+str(self.src_dir))
-        data.append("dest_dir > "+str(self.dest_dir))
-        data.append("owerwrite >"+ str(self.owerwrite))
+        for k, v in self.get_settings().items():
+            data.append(k+" > "+str(v))
         data.append("[filters]")
         for itm in self.extensions:
             data.append(itm)
@@ -382,13 +830,17 @@ class Config:
             data.append(k+("" if (v.isspace() or v == "") else " > "+ v))
         
         data.append("[pack]")
-        for k,v in self.packer.items():
-            s = k+" > " + self._packer_ch_to_text(v[0])
-            
-            if len(v)>1:
-                for i in range(1,len(v)):
-                    s+=" | " + self._packer_ch_to_text(v[i])
-            data.append(s)
+        data.extend(self.get_pack_lines())
+
+        for name, spec in self.targets.items():
+            data.append("["+self.TARGET_SECTION+name+"]")
+            if spec.get("preset"):
+                data.append("preset > "+str(spec["preset"]))
+            for k, v in spec.get("settings", {}).items():
+                data.append(k+" > "+str(v))
+            pack = spec.get("pack") or {}
+            for ln in (pack if isinstance(pack, list) else [k+" > "+v for k, v in pack.items()]):
+                data.append(ln)
         if path is not Path:
             path = Path(path)
         path.write_text("\n".join(data))
@@ -396,6 +848,1299 @@ class Config:
 
         
 
+class StatCache:
+    """
+    Directory listing backed existence and stat cache of one run.
+    Source directories are filled from the scan listing, other directories (destination) are listed once on first query,
+    so per file checks cost no filesystem call (one round trip per directory on network shares instead of one per file).
+    Stat results come from listing entries (free on Windows, one stat call elsewhere) and are read at most once.
+    Files written by the packer are registered with invalidate(), changes made by other processes are seen on next scan.
+    """
+    WRITTEN = "written" #listing entry of file created or replaced in this run, stat is read again
+
+    def __init__(self) -> None:
+        self.dirs:dict[str,dict[str,object]] = {} #normcased directory > {normcased name:DirEntry or WRITTEN}
+        self.known_dirs:set[str] = set()
+        self._lock = threading.Lock()
+
+    def _split(self, path:str|Path)->tuple[str,str]:
+        head, tail = os.path.split(os.fspath(path))
+        return os.path.normcase(head), os.path.normcase(tail)
+
+    def add_listing(self, dir_path:str, entries:list[os.DirEntry]):
+        listing = {os.path.normcase(entry.name):entry for entry in entries}
+        with self._lock:
+            self.dirs[os.path.normcase(dir_path)] = listing
+            self.known_dirs.add(os.path.normcase(dir_path))
+
+    def _listing(self, dir_key:str)->dict[str,object]:
+        listing = self.dirs.get(dir_key, None)
+        if listing == None:
+            try:
+                with os.scandir(dir_key) as entries:
+                    listing = {os.path.normcase(entry.name):entry for entry in entries}
+                found = True
+            except OSError:
+                listing, found = {}, False #missing directory
+            with self._lock:
+                listing = self.dirs.setdefault(dir_key, listing)
+                if found:
+                    self.known_dirs.add(dir_key)
+        return listing
+
+    def exists(self, path:str|Path)->bool:
+        dir_key, name = self._split(path)
+        return name in self._listing(dir_key)
+
+    def stat(self, path:str|Path)->os.stat_result:
+        """Stat of existing file, None if missing"""
+        dir_key, name = self._split(path)
+        entry = self._listing(dir_key).get(name, None)
+        if entry == None:
+            return None
+        return os.stat(path) if entry is self.WRITTEN else entry.stat()
+
+    def invalidate(self, path:str|Path):
+        """File created or replaced by this run: exists from now on, stat is read again"""
+        dir_key, name = self._split(path)
+        with self._lock:
+            listing = self.dirs.get(dir_key, None)
+            if listing != None:
+                listing[name] = self.WRITTEN
+
+    def make_dir(self, path:Path)->bool:
+        """Create directory (with parents) unless known to exist, returns True if it was created"""
+        key = os.path.normcase(os.fspath(path))
+        if key in self.known_dirs:
+            return False
+        try:
+            os.mkdir(path)
+            created = True
+        except FileExistsError:
+            created = False
+        except FileNotFoundError:
+            path.mkdir(parents=True, exist_ok=True) #other worker processes may create it at the same time
+            created = True
+        with self._lock:
+            self.known_dirs.add(key)
+            if created:
+                self.dirs[key] = {}
+        if created:
+            self.invalidate(path)
+        return created
+
+
+HASH_CHUNK = 1 << 20
+
+
+def file_hash(path:Path)->str:
+    """Streaming blake2b content hash of a file, shared by build manifest and dedup index"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent record of packed outputs, stored in destination directory.
+    Maps every output texture to the state (mtime, size, content hash) of its sources,
+    the channel layout and output format/naming. Used by incremental mode to skip up to date outputs.
+    """
+    FILE_NAME = ".texture_packer_manifest.json"
+    VERSION = 1
+
+    def __init__(self, dest_dir:Path, stat_cache:StatCache=None) -> None:
+        self.dest_dir = dest_dir
+        self.stat_cache = stat_cache if stat_cache != None else StatCache()
+        self.path = dest_dir.joinpath(self.FILE_NAME)
+        self.outputs:dict[str,dict] = {}
+        self._states:dict[str,dict] = {} #source states computed in this run, every source hashed at most once
+        self.dirty = False
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == self.VERSION:
+            self.outputs = data.get("outputs", {})
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version":self.VERSION, "outputs":self.outputs}, indent=1))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def _key(self, save_path:Path)->str:
+        try:
+            return save_path.relative_to(self.dest_dir).as_posix()
+        except ValueError:
+            return save_path.as_posix()
+
+    def source_state(self, path:Path, previous:dict=None)->dict:
+        """
+        Current state of a source file. Content is hashed only when mtime or size differ from previous state,
+        so touched but unchanged files are still detected as up to date.
+        """
+        key = str(path)
+        state = self._states.get(key, None)
+        if state != None:
+            return state
+        st = self.stat_cache.stat(path)
+        if st == None:
+            raise FileNotFoundError(f"Source <{path}> not found")
+        if previous != None and previous.get("mtime") == st.st_mtime_ns and previous.get("size") == st.st_size:
+            state = previous
+        else:
+            state = {"mtime":st.st_mtime_ns, "size":st.st_size, "hash":file_hash(path)}
+        self._states[key] = state
+        return state
+
+    def snapshot(self, group_items:dict[str,Path], packer:dict[str,list[PackChItem]]):
+        """
+        Take source states of outputs before they are packed, record() stores this snapshot:
+        a source changed while its group is packed is not marked up to date and is packed again by the next run.
+        """
+        for suffix in dict.fromkeys(itm.suffix for pack_items in packer.values() for itm in pack_items):
+            src = group_items.get(suffix, None)
+            if src != None and self.stat_cache.exists(src):
+                self.source_state(src)
+
+    def output_record(self, group_items:dict[str,Path], pack_items:list[PackChItem], config:Config, previous:dict=None, tex_suffix:str="")->dict:
+        prev_sources = previous.get("sources", {}) if previous != None else {}
+        sources = {}
+        for suffix in dict.fromkeys(itm.suffix for itm in pack_items):
+            src = group_items.get(suffix, None)
+            if src != None and self.stat_cache.exists(src):
+                sources[str(src)] = self.source_state(src, prev_sources.get(str(src), None))
+        record = {
+            "sources":sources,
+            "layout":config.get_layout_text(pack_items),
+            "format":config.output_format,
+            "bit_depth":str(config.bit_depth),
+            "naming":config.naming_scheme + (":lowercase" if config.lowercase_names else ""),
+            "encoder":list(config.get_encoder_key(tex_suffix)), #compression, quality, DDS and mip settings
+        }
+        options = config.get_output_options(tex_suffix)
+        if options["max_size"] or options["scale"] != 1.0: #recorded only for resized outputs, older records stay valid
+            record["size"] = f"max_size={options['max_size']}, scale={options['scale']}"
+        return record
+
+    def is_up_to_date(self, save_path:Path, group_items:dict[str,Path], pack_items:list[PackChItem], config:Config, tex_suffix:str="")->bool:
+        previous = self.outputs.get(self._key(save_path), None)
+        if previous == None or not self.stat_cache.exists(save_path):
+            return False
+        current = self.output_record(group_items, pack_items, config, previous, tex_suffix)
+        if current["sources"] != previous["sources"]:
+            # same content with new mtime is still up to date, but refresh stored mtimes
+            if {k:v["hash"] for k,v in current["sources"].items()} != {k:v["hash"] for k,v in previous["sources"].items()}:
+                return False
+        if any(current.get(k) != previous.get(k) for k in ("layout", "format", "bit_depth", "naming", "size", "encoder")):
+            return False
+        if current != previous:
+            self.outputs[self._key(save_path)] = current
+            self.dirty = True
+        return True
+
+    def contains(self, save_path:Path)->bool:
+        return self._key(save_path) in self.outputs
+
+    def record(self, save_path:Path, group_items:dict[str,Path], pack_items:list[PackChItem], config:Config, tex_suffix:str=""):
+        self.outputs[self._key(save_path)] = self.output_record(group_items, pack_items, config, tex_suffix=tex_suffix)
+        self.dirty = True
+
+
+class ConstantCache:
+    """
+    Persistent record of fully constant sources (every channel a single value), stored in destination directory.
+    Entries are valid while source mtime and size are unchanged, such sources are not decoded again.
+    """
+    FILE_NAME = ".texture_packer_constants.json"
+    VERSION = 1
+
+    def __init__(self, dest_dir:Path, stat_cache:StatCache=None) -> None:
+        self.dest_dir = dest_dir
+        self.stat_cache = stat_cache if stat_cache != None else StatCache()
+        self.path = dest_dir.joinpath(self.FILE_NAME)
+        self.sources:dict[str,dict] = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == self.VERSION:
+            self.sources = data.get("sources", {})
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version":self.VERSION, "sources":self.sources}, indent=1))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def known(self, group_items:dict[str,Path])->dict[str,dict]:
+        """Entries of unchanged constant sources of a group by suffix"""
+        known = {}
+        for suffix, path in group_items.items():
+            entry = self.sources.get(str(path), None)
+            if entry == None:
+                continue
+            st = self.stat_cache.stat(path)
+            if st != None and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                known[suffix] = entry
+        return known
+
+    def add(self, found:dict[str,dict]):
+        """Record constant sources found by decoding (SourceCache.found_constants)"""
+        for path, entry in found.items():
+            st = self.stat_cache.stat(Path(path))
+            entry = dict(entry, mtime=st.st_mtime_ns, size=st.st_size) if st != None else None
+            if entry != None and self.sources.get(path, None) != entry:
+                self.sources[path] = entry
+                self.dirty = True
+
+
+class RunJournal:
+    """
+    Append only journal of groups completed by a run, stored in destination directory.
+    A JSON line is appended, flushed and synced once all outputs of a group are written, so a killed run leaves
+    at most a torn last line, which is ignored. Resumed runs with the same run key (targets, naming, formats, layouts)
+    skip journaled groups and continue the journal, other runs start a new one.
+    """
+    FILE_NAME = ".texture_packer_journal.jsonl"
+    VERSION = 1
+
+    def __init__(self, dest_dir:Path, run_key:str) -> None:
+        self.dest_dir = dest_dir
+        self.path = dest_dir.joinpath(self.FILE_NAME)
+        self.run_key = run_key
+        self.done:set[str] = set() #groups completed by previous run (resume)
+        self._file = None
+        self._torn = False
+
+    def load(self)->set[str]:
+        """Groups journaled by previous run with the same run key, None if there is no such journal"""
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        lines = text.splitlines()
+        done = set()
+        for i, ln in enumerate(lines):
+            try:
+                entry = json.loads(ln)
+            except ValueError: #torn line of killed run
+                continue
+            if i == 0 and (entry.get("version") != self.VERSION or entry.get("run") != self.run_key):
+                return None
+            if "group" in entry:
+                done.add(entry["group"])
+        self._torn = text != "" and not text.endswith("\n")
+        return done if lines else None
+
+    def open(self, resume:bool=False):
+        """Start journal, or continue journal of previous run with the same run key if resume is on. Returns True if resumed"""
+        done = self.load() if resume else None
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        if done != None:
+            self.done = done
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._torn:
+                self._file.write("\n")
+            return True
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write({"version":self.VERSION, "run":self.run_key, "started":time.time()})
+        return False
+
+    def _write(self, entry:dict):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def add(self, grp_name:str):
+        self._write({"group":grp_name, "time":time.time()})
+
+    def close(self):
+        if self._file != None:
+            self._file.close()
+            self._file = None
+
+
+class DedupIndex:
+    """
+    Content hash deduplication across groups (scan vendor variants sharing byte identical maps under other names).
+    Only sources whose file size matches another source are hashed (streaming blake2b), others are unique by size.
+    Outputs with the same layout, size and source contents are packed once and duplicates are linked to the first encode,
+    decoded sources with identical content are shared between groups (LRU, bounded by memory budget).
+    """
+
+    def __init__(self, stat_cache:StatCache=None, threads:int=8, memory_mb:float=512) -> None:
+        self.stat_cache = stat_cache if stat_cache != None else StatCache()
+        self.threads = max(int(threads), 1)
+        self.budget = int(memory_mb * (1 << 20))
+        self.hashes:dict[str,str] = {} #content hash of sources sharing file size with another source, by path
+        self.shared:set[str] = set() #hashes of more than one source file
+        self.outputs:dict[tuple,Path] = {} #first output path by output key
+        self.bands:dict[str,np.ndarray] = {} #decoded shared sources by hash, insertion ordered (LRU)
+        self.band_bytes = 0
+        self.band_hits = 0
+        self._lock = threading.Lock()
+
+    def hash_sources(self, paths:list[Path]):
+        by_size:dict[int,list[Path]] = {}
+        for path in dict.fromkeys(paths):
+            st = self.stat_cache.stat(path)
+            if st != None:
+                by_size.setdefault(st.st_size, []).append(path)
+        candidates = [path for same in by_size.values() if len(same) > 1 for path in same]
+        with futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for path, digest in zip(candidates, executor.map(file_hash, candidates)):
+                self.hashes[str(path)] = digest
+        counts:dict[str,int] = {}
+        for digest in self.hashes.values():
+            counts[digest] = counts.get(digest, 0) + 1
+        self.shared = {digest for digest, count in counts.items() if count > 1}
+
+    def source_id(self, path:Path)->str:
+        if path == None:
+            return None
+        return self.hashes.get(str(path), None) or "path:" + str(path)
+
+    def output_key(self, tex_suffix:str, out_plan:OutputPlan, size:tuple[int,int], group_items:dict[str,Path])->tuple:
+        return (tex_suffix, out_plan.gather, out_plan.mode, size, tuple(self.source_id(group_items.get(suffix, None)) for suffix in out_plan.sources))
+
+    def first_output(self, key:tuple, save_path:Path)->Path:
+        """Path of identical output packed before, None if this is the first one (registered)"""
+        first = self.outputs.get(key, None)
+        if first == None:
+            self.outputs[key] = save_path
+        return first
+
+    def get_band(self, path:Path)->np.ndarray:
+        digest = self.hashes.get(str(path), None)
+        with self._lock:
+            arr = self.bands.pop(digest, None) if digest != None else None
+            if arr is not None:
+                self.bands[digest] = arr #most recently used
+                self.band_hits += 1
+        return arr
+
+    def put_band(self, path:Path, arr:np.ndarray):
+        digest = self.hashes.get(str(path), None)
+        if digest not in self.shared or arr.nbytes > self.budget:
+            return
+        with self._lock:
+            if digest in self.bands:
+                return
+            self.bands[digest] = arr
+            self.band_bytes += arr.nbytes
+            while self.band_bytes > self.budget:
+                self.band_bytes -= self.bands.pop(next(iter(self.bands))).nbytes
+
+
+class DecodeCache:
+    """
+    Decoded sources shared by runs (several presets or targets over the same source library).
+    Every source is stored once as uncompressed .npy keyed by source path, mtime and size, later runs memory map it
+    (read only, zero copy) instead of decoding PNG/TGA again. Above the size budget least recently used entries are evicted,
+    entries of changed sources get a new key and age out.
+    """
+    EXTENSION = ".npy"
+
+    def __init__(self, cache_dir:Path, budget_mb:float=8192, stat_cache:StatCache=None) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.budget = int(budget_mb * (1 << 20))
+        self.stat_cache = stat_cache if stat_cache != None else StatCache()
+        self.stats = {"hits":0, "misses":0, "mapped_bytes":0, "stored_bytes":0}
+        self._entries:dict[str,list] = None #cache file name: [last use, size], listed on first store
+        self._lock = threading.Lock()
+
+    def key(self, path:Path)->str:
+        st = self.stat_cache.stat(path)
+        if st == None:
+            return None
+        ident = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+        return hashlib.blake2b(ident.encode(), digest_size=16).hexdigest() + self.EXTENSION
+
+    def get(self, path:Path)->np.ndarray:
+        """Memory mapped HxWxC array of source, None if not cached"""
+        name = self.key(path)
+        if name == None:
+            return None
+        file = self.cache_dir.joinpath(name)
+        try:
+            arr = np.load(file, mmap_mode="r")
+            os.utime(file) #last use for eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["mapped_bytes"] += arr.nbytes
+            if self._entries != None and name in self._entries:
+                self._entries[name][0] = time.time()
+        return arr
+
+    def put(self, path:Path, arr:np.ndarray):
+        """Store decoded source, errors (full disk, read only directory) only disable storing of this source"""
+        name = self.key(path)
+        if name == None or arr.nbytes > self.budget:
+            return
+        file = self.cache_dir.joinpath(name)
+        tmp = file.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp, file)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self.stats["stored_bytes"] += arr.nbytes
+            self._list()[name] = [time.time(), file.stat().st_size]
+            self.evict()
+
+    def _list(self)->dict[str,list]:
+        if self._entries == None:
+            self._entries = {}
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(self.EXTENSION):
+                        st = entry.stat()
+                        self._entries[entry.name] = [st.st_mtime, st.st_size]
+        return self._entries
+
+    def evict(self):
+        """Remove least recently used entries above budget (caller holds lock)"""
+        total = sum(size for _, size in self._entries.values())
+        for name, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if total <= self.budget:
+                break
+            try:
+                self.cache_dir.joinpath(name).unlink() #existing memory maps stay valid (posix)
+            except FileNotFoundError:
+                pass
+            except OSError: #mapped by another process (windows)
+                continue
+            del self._entries[name]
+            total -= size
+
+    def merge(self, stats:dict):
+        """Merge counters of worker process"""
+        for key, value in stats.items():
+            self.stats[key] += value
+
+    def report(self):
+        stats = self.stats
+        print(f"[*] Decode cache: {stats['hits']} source(s) mapped ({stats['mapped_bytes'] / (1 << 20):.1f} MB), "
+              f"{stats['misses']} decoded ({stats['stored_bytes'] / (1 << 20):.1f} MB stored)")
+
+
+class ArrayWriter:
+    """
+    Writers for high bit depth outputs which PIL can`t save: 16 bit PNG (any channel count), 16 bit and 32 bit float TIFF.
+    Images are written in row strips (strips of rows_per_strip rows, last may be shorter), so streamed outputs
+    are never fully held in memory. Float TIFF is readable by DCC tools and converters to EXR.
+    """
+    FORMATS = {
+        "16":("png", "tiff"),
+        "32f":("tiff",),
+    }
+    PNG_COLOR_TYPES = {1:0, 2:4, 3:2, 4:6}
+    ROWS_PER_STRIP = 64
+
+    def __init__(self, compress_level:int=6, rows_per_strip:int=ROWS_PER_STRIP) -> None:
+        self.compress_level = compress_level
+        self.rows_per_strip = rows_per_strip
+
+    def strips(self, arr:np.ndarray):
+        for r in range(0, arr.shape[0], self.rows_per_strip):
+            yield arr[r:r + self.rows_per_strip]
+
+    def write(self, path:Path, arr:np.ndarray, fmt:str):
+        if fmt == "png":
+            self.write_png(path, arr.shape, arr.dtype, self.strips(arr))
+        elif fmt in ("tif", "tiff"):
+            self.write_tiff(path, arr.shape, arr.dtype, self.strips(arr))
+        else:
+            raise ValueError(f"Format {fmt} is not supported for {arr.dtype} data")
+
+    def _png_chunk(self, f, tag:bytes, data:bytes):
+        f.write(struct.pack(">I", len(data)) + tag)
+        f.write(data)
+        f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
+
+    def _paeth_filter(self, rows:np.ndarray, prev:np.ndarray, bpp:int)->np.ndarray:
+        """PNG Paeth filter of byte rows (vectorized, prediction uses unfiltered neighbours), filter type byte prepended"""
+        cur = rows.astype(np.int16)
+        up = np.empty_like(cur)
+        up[0] = prev
+        up[1:] = cur[:-1]
+        left = np.zeros_like(cur)
+        left[:, bpp:] = cur[:, :-bpp]
+        upleft = np.zeros_like(cur)
+        upleft[:, bpp:] = up[:, :-bpp]
+        p = left + up - upleft
+        pa = np.abs(p - left)
+        pb = np.abs(p - up)
+        pc = np.abs(p - upleft)
+        pred = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+        out = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+        out[:, 0] = 4
+        np.subtract(cur, pred, out=out[:, 1:], casting="unsafe") # modulo 256
+        return out
+
+    def write_png(self, path:Path, shape:tuple, dtype:np.dtype, strips):
+        height, width, channels = shape
+        dtype = np.dtype(dtype)
+        bpp = channels * dtype.itemsize
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            self._png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, dtype.itemsize * 8, self.PNG_COLOR_TYPES[channels], 0, 0, 0))
+            z = zlib.compressobj(self.compress_level)
+            prev = np.zeros(width * bpp, np.int16)
+            for strip in strips:
+                rows = np.ascontiguousarray(strip, dtype.newbyteorder(">")).view(np.uint8).reshape(strip.shape[0], width * bpp)
+                data = z.compress(self._paeth_filter(rows, prev, bpp))
+                prev = rows[-1].copy() #strip buffer may be reused by the caller
+                if data:
+                    self._png_chunk(f, b"IDAT", data)
+            self._png_chunk(f, b"IDAT", z.flush())
+            self._png_chunk(f, b"IEND", b"")
+
+    def write_tiff(self, path:Path, shape:tuple, dtype:np.dtype, strips):
+        """Little endian TIFF, deflate compressed strips of rows_per_strip rows"""
+        height, width, channels = shape
+        dtype = np.dtype(dtype)
+        offsets, counts = [], []
+        with open(path, "wb") as f:
+            f.write(b"II*\x00\x00\x00\x00\x00") # IFD offset written at the end
+            for strip in strips:
+                data = np.ascontiguousarray(strip, dtype.newbyteorder("<")).tobytes()
+                if self.compress_level > 0:
+                    data = zlib.compress(data, self.compress_level)
+                offsets.append(f.tell())
+                counts.append(len(data))
+                f.write(data)
+                if f.tell() % 2:
+                    f.write(b"\x00")
+
+            SHORT, LONG = 3, 4
+            tags = [
+                (256, LONG, [width]),
+                (257, LONG, [height]),
+                (258, SHORT, [dtype.itemsize * 8] * channels), #BitsPerSample
+                (259, SHORT, [8 if self.compress_level > 0 else 1]), #Compression: Adobe deflate or none
+                (262, SHORT, [2 if channels >= 3 else 1]), #Photometric: RGB or BlackIsZero
+                (273, LONG, offsets), #StripOffsets
+                (277, SHORT, [channels]), #SamplesPerPixel
+                (278, LONG, [self.rows_per_strip]), #RowsPerStrip
+                (279, LONG, counts), #StripByteCounts
+                (284, SHORT, [1]), #PlanarConfiguration: chunky
+            ]
+            if channels in (2, 4):
+                tags.append((338, SHORT, [2])) #ExtraSamples: unassociated alpha
+            tags.append((339, SHORT, [3 if dtype.kind == "f" else 1] * channels)) #SampleFormat: float or unsigned int
+
+            ifd_offset = f.tell()
+            extra_offset = ifd_offset + 2 + len(tags) * 12 + 4
+            entries, extra = [], b""
+            for tag, typ, values in tags:
+                data = struct.pack("<%d%s" % (len(values), "H" if typ == SHORT else "I"), *values)
+                if len(data) <= 4:
+                    entries.append(struct.pack("<HHI", tag, typ, len(values)) + data.ljust(4, b"\x00"))
+                else:
+                    entries.append(struct.pack("<HHII", tag, typ, len(values), extra_offset + len(extra)))
+                    extra += data
+            f.write(struct.pack("<H", len(tags)) + b"".join(entries) + struct.pack("<I", 0) + extra)
+            f.seek(4)
+            f.write(struct.pack("<I", ifd_offset))
+
+
+class DdsWriter:
+    """
+    DDS writer with mip chain and BCn block compression, encoders are vectorized over 4x4 blocks (numpy) and
+    block ranges are encoded on a thread pool.
+    BC1 (RGB, 4 bpp), BC4 (single channel), BC5 (two channels, normal map XY), BC7 (RGB(A), mode 6 blocks only:
+    one subset, 7.7.7.7 endpoints with p-bits, 4 bit indices), "none" - uncompressed 8 bit L / RGB(A).
+    BC1 and BC7 endpoints are fitted along the principal axis of block colors.
+    """
+    COMPRESSIONS = ("auto", "none", "bc1", "bc4", "bc5", "bc7")
+    MIP_FILTERS = ("box", "bilinear", "bicubic", "lanczos")
+    PIL_FILTERS = LazyConstant(lambda: {"box":None, "bilinear":Img.BILINEAR, "bicubic":Img.BICUBIC, "lanczos":Img.LANCZOS})
+    BLOCK_BYTES = {"bc1":8, "bc4":8, "bc5":16, "bc7":16}
+    FOURCC = {"bc1":b"DXT1", "bc4":b"ATI1", "bc5":b"ATI2", "bc7":b"DX10"}
+    DXGI_BC7_UNORM = 98
+    BC7_WEIGHTS = LazyConstant(lambda: np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64], np.int32))
+    CHUNK_BLOCKS = 4096 #blocks encoded per thread pool task
+
+    def __init__(self, compression:str="auto", mipmaps:bool=False, mip_filter:str="box", rgb_format:str="bc1", threads:int=0) -> None:
+        self.compression = compression
+        self.mipmaps = mipmaps
+        self.mip_filter = mip_filter
+        self.rgb_format = rgb_format
+        self.threads = threads if threads > 0 else (os.cpu_count() or 1)
+
+    def select_format(self, channels:int, normal_map:bool=False)->str:
+        """Auto compression: normal maps BC5, single channel BC4, RGBA BC7, RGB rgb_format (BC1 or BC7)"""
+        if self.compression != "auto":
+            return self.compression
+        if normal_map and channels >= 2:
+            return "bc5"
+        if channels == 1:
+            return "bc4"
+        return "bc7" if channels == 4 else self.rgb_format
+
+    def mip_chain(self, arr:np.ndarray, normal_map:bool=False)->list[np.ndarray]:
+        """Full mip chain down to 1x1 (level 0 is arr). Normal map levels are renormalized (xyz in first 3 channels)"""
+        levels = [arr]
+        height, width = arr.shape[:2]
+        base = None
+        while levels[-1].shape[0] > 1 or levels[-1].shape[1] > 1:
+            height, width = max(height // 2, 1), max(width // 2, 1)
+            if self.PIL_FILTERS[self.mip_filter] == None:
+                level = self.box_reduce(levels[-1])
+            else: #PIL resampling of the full resolution level, not cascaded
+                if base is None:
+                    base = Img.fromarray(np.ascontiguousarray(arr[:, :, 0] if arr.shape[2] == 1 else arr))
+                level = np.asarray(base.resize((width, height), self.PIL_FILTERS[self.mip_filter]))
+                level = level[:, :, np.newaxis] if level.ndim == 2 else level
+            if normal_map and level.shape[2] >= 3:
+                level = self.renormalize(level)
+            levels.append(level)
+        return levels
+
+    def box_reduce(self, arr:np.ndarray)->np.ndarray:
+        """2x2 box filter, odd last row/column is dropped, 1 pixel sides are kept"""
+        height, width = arr.shape[:2]
+        acc = arr.astype(np.uint16)
+        acc = acc[0:height // 2 * 2:2] + acc[1:height // 2 * 2:2] if height > 1 else acc * 2
+        acc = acc[:, 0:width // 2 * 2:2] + acc[:, 1:width // 2 * 2:2] if width > 1 else acc * 2
+        return ((acc + 2) >> 2).astype(np.uint8)
+
+    def renormalize(self, level:np.ndarray)->np.ndarray:
+        level = level.copy()
+        xyz = level[:, :, :3].astype(np.float32) * (2.0 / 255.0) - 1.0
+        xyz /= np.maximum(np.sqrt(np.sum(xyz * xyz, axis=2, keepdims=True)), 1e-6)
+        level[:, :, :3] = np.clip(np.rint((xyz + 1.0) * 127.5), 0, 255)
+        return level
+
+    def to_blocks(self, arr:np.ndarray)->np.ndarray:
+        """HxWxC image to Nx16xC 4x4 blocks in row major block order, partial blocks padded by edge pixels"""
+        height, width, channels = arr.shape
+        pad_h, pad_w = -height % 4, -width % 4
+        if pad_h or pad_w:
+            arr = np.pad(arr, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+        bh, bw = arr.shape[0] // 4, arr.shape[1] // 4
+        return arr.reshape(bh, 4, bw, 4, channels).swapaxes(1, 2).reshape(bh * bw, 16, channels)
+
+    def principal_endpoints(self, pixels:np.ndarray)->tuple[np.ndarray,np.ndarray]:
+        """Endpoints (float, 0..255) at extremes of block pixels projected on principal axis (power iteration)"""
+        mean = pixels.mean(axis=1, dtype=np.float32)
+        centered = pixels.astype(np.float32) - mean[:, np.newaxis]
+        cov = centered.transpose(0, 2, 1) @ centered
+        axis = (pixels.max(axis=1).astype(np.float32) - pixels.min(axis=1))[:, :, np.newaxis]
+        for _ in range(4):
+            axis = cov @ axis + axis * 1e-3
+            axis /= np.maximum(np.sqrt(np.sum(axis * axis, axis=1, keepdims=True)), 1e-6)
+        proj = (centered @ axis)[:, :, 0]
+        axis = axis[:, :, 0]
+        hi = mean + axis * proj.max(axis=1, keepdims=True)
+        lo = mean + axis * proj.min(axis=1, keepdims=True)
+        return np.clip(hi, 0, 255), np.clip(lo, 0, 255)
+
+    def line_positions(self, pixels:np.ndarray, e0:np.ndarray, e1:np.ndarray)->np.ndarray:
+        """Position (0..1) of block pixels (Nx16xC) projected on line between quantized endpoints e0 and e1 (NxC)"""
+        d = (e1 - e0).astype(np.float32)
+        rel = pixels.astype(np.float32) - e0[:, np.newaxis, :]
+        t = (rel @ d[:, :, np.newaxis])[:, :, 0] / np.maximum(np.sum(d * d, axis=1), 1e-6)[:, np.newaxis]
+        return np.clip(t, 0.0, 1.0)
+
+    def encode_bc4(self, values:np.ndarray)->np.ndarray:
+        """Nx16 uint8 values to Nx8 bytes, 8 value palette between block min and max"""
+        vmax = values.max(axis=1).astype(np.int32)
+        vmin = values.min(axis=1).astype(np.int32)
+        rng = vmax - vmin
+        t = ((vmax[:, np.newaxis] - values) * 7 + (rng[:, np.newaxis] >> 1)) // np.maximum(rng, 1)[:, np.newaxis]
+        idx = np.array([0, 2, 3, 4, 5, 6, 7, 1], np.uint64)[t] #palette position (max..min) to BC4 index
+        bits = vmax.astype(np.uint64) | (vmin.astype(np.uint64) << np.uint64(8))
+        bits |= np.bitwise_or.reduce(idx << (np.arange(16, dtype=np.uint64) * np.uint64(3) + np.uint64(16)), axis=1)
+        return bits.astype("<u8").view(np.uint8).reshape(-1, 8)
+
+    def encode_bc5(self, pixels:np.ndarray)->np.ndarray:
+        return np.concatenate([self.encode_bc4(pixels[:, :, 0]), self.encode_bc4(pixels[:, :, 1])], axis=1)
+
+    def encode_bc1(self, pixels:np.ndarray)->np.ndarray:
+        """Nx16x3 uint8 to Nx8 bytes, opaque 4 color blocks"""
+        hi, lo = self.principal_endpoints(pixels)
+        def to565(c):
+            q = np.rint(c * np.array([31 / 255, 63 / 255, 31 / 255], np.float32)).astype(np.int32)
+            code = (q[:, 0] << 11) | (q[:, 1] << 5) | q[:, 2]
+            rgb = np.stack([(q[:, 0] << 3) | (q[:, 0] >> 2), (q[:, 1] << 2) | (q[:, 1] >> 4), (q[:, 2] << 3) | (q[:, 2] >> 2)], axis=1)
+            return code, rgb
+        c0, p0 = to565(hi)
+        c1, p1 = to565(lo)
+        swap = c0 < c1 #4 color mode needs c0 > c1
+        c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+        p0, p1 = np.where(swap[:, np.newaxis], p1, p0), np.where(swap[:, np.newaxis], p0, p1)
+        t = np.rint(self.line_positions(pixels, p0, p1) * 3).astype(np.intp)
+        idx = np.array([0, 2, 3, 1], np.uint64)[t] #line position (p0..p1) to BC1 index
+        idx[c0 == c1] = 0 #3 color mode, index 3 would be transparent black
+        bits = c0.astype(np.uint64) | (c1.astype(np.uint64) << np.uint64(16))
+        bits |= np.bitwise_or.reduce(idx << (np.arange(16, dtype=np.uint64) * np.uint64(2) + np.uint64(32)), axis=1)
+        return bits.astype("<u8").view(np.uint8).reshape(-1, 8)
+
+    def _put_bits(self, words:np.ndarray, value:np.ndarray, offset:int, nbits:int):
+        """OR nbits of value at bit offset of 128 bit blocks (Nx2 uint64, little endian)"""
+        value = value.astype(np.uint64) & np.uint64((1 << nbits) - 1)
+        word, shift = divmod(offset, 64)
+        words[:, word] |= value << np.uint64(shift)
+        if shift + nbits > 64:
+            words[:, word + 1] |= value >> np.uint64(64 - shift)
+
+    def encode_bc7(self, pixels:np.ndarray)->np.ndarray:
+        """Nx16x4 uint8 to Nx16 bytes, mode 6 blocks"""
+        hi, lo = self.principal_endpoints(pixels)
+        def quantize(e):
+            # 7 bit endpoint + shared p-bit per endpoint, p-bit with lower error
+            best = None
+            for p in (0, 1):
+                q = np.clip(np.rint((e - p) / 2), 0, 127).astype(np.int32)
+                err = np.sum(((q << 1 | p) - e) ** 2, axis=1)
+                if best == None:
+                    best = (q, np.zeros(len(e), np.int32), err)
+                else:
+                    better = err < best[2]
+                    best = (np.where(better[:, np.newaxis], q, best[0]), np.where(better, 1, best[1]), np.minimum(err, best[2]))
+            return best[0], best[1]
+        q0, pb0 = quantize(hi)
+        q1, pb1 = quantize(lo)
+        e0 = (q0 << 1) | pb0[:, np.newaxis]
+        e1 = (q1 << 1) | pb1[:, np.newaxis]
+        midpoints = (self.BC7_WEIGHTS[1:] + self.BC7_WEIGHTS[:-1]) / 128.0
+        idx = np.searchsorted(midpoints, self.line_positions(pixels, e0, e1))
+        flip = idx[:, 0] >= 8 #anchor index has implicit 0 msb
+        q0, q1 = np.where(flip[:, np.newaxis], q1, q0), np.where(flip[:, np.newaxis], q0, q1)
+        pb0, pb1 = np.where(flip, pb1, pb0), np.where(flip, pb0, pb1)
+        idx = np.where(flip[:, np.newaxis], 15 - idx, idx)
+        words = np.zeros((len(pixels), 2), np.uint64)
+        words[:, 0] = 1 << 6 #mode 6
+        for c in range(4):
+            self._put_bits(words, q0[:, c], 7 + c * 14, 7)
+            self._put_bits(words, q1[:, c], 14 + c * 14, 7)
+        self._put_bits(words, pb0, 63, 1)
+        self._put_bits(words, pb1, 64, 1)
+        self._put_bits(words, idx[:, 0], 65, 3)
+        for i in range(1, 16):
+            self._put_bits(words, idx[:, i], 64 + i * 4, 4)
+        return words.astype("<u8").view(np.uint8).reshape(-1, 16)
+
+    def encode(self, level:np.ndarray, fmt:str, executor:futures.ThreadPoolExecutor=None)->bytes:
+        """Encode one mip level, block ranges run on executor"""
+        channels = level.shape[2]
+        if fmt == "bc4":
+            encoder, used = self.encode_bc4, (lambda b: b[:, :, 0])
+        elif fmt == "bc5":
+            encoder, used = self.encode_bc5, (lambda b: b if channels >= 2 else np.repeat(b, 2, axis=2))
+        elif fmt == "bc1":
+            encoder, used = self.encode_bc1, (lambda b: b[:, :, :3] if channels >= 3 else np.repeat(b[:, :, :1], 3, axis=2))
+        else:
+            def used(b):
+                if channels == 4:
+                    return b
+                rgb = b[:, :, :3] if channels >= 3 else np.repeat(b[:, :, :1], 3, axis=2)
+                return np.concatenate([rgb, np.full(rgb.shape[:2] + (1,), 255, np.uint8)], axis=2)
+            encoder = self.encode_bc7
+        blocks = self.to_blocks(level)
+        chunks = [blocks[i:i + self.CHUNK_BLOCKS] for i in range(0, len(blocks), self.CHUNK_BLOCKS)]
+        if executor == None or len(chunks) == 1:
+            encoded = [encoder(used(chunk)) for chunk in chunks]
+        else:
+            encoded = list(executor.map(lambda chunk: encoder(used(chunk)), chunks))
+        return b"".join(e.tobytes() for e in encoded)
+
+    def header(self, width:int, height:int, mip_count:int, fmt:str, channels:int)->bytes:
+        caps = 0x1000 | (0x400008 if mip_count > 1 else 0) #TEXTURE | COMPLEX | MIPMAP
+        flags = 0x1007 | (0x20000 if mip_count > 1 else 0) #CAPS | HEIGHT | WIDTH | PIXELFORMAT | MIPMAPCOUNT
+        if fmt in self.FOURCC:
+            flags |= 0x80000 #LINEARSIZE
+            pitch = max((width + 3) // 4, 1) * max((height + 3) // 4, 1) * self.BLOCK_BYTES[fmt]
+            pixel_format = struct.pack("<II4s5I", 32, 0x4, self.FOURCC[fmt], 0, 0, 0, 0, 0)
+        elif channels == 1:
+            flags |= 0x8 #PITCH
+            pitch = width
+            pixel_format = struct.pack("<II4s5I", 32, 0x20000, b"\0\0\0\0", 8, 0xff, 0, 0, 0) #LUMINANCE
+        else:
+            flags |= 0x8
+            pitch = width * 4
+            alpha = channels == 4
+            pixel_format = struct.pack("<II4s5I", 32, 0x40 | (0x1 if alpha else 0), b"\0\0\0\0", 32, 0xff, 0xff00, 0xff0000, 0xff000000 if alpha else 0)
+        data = b"DDS " + struct.pack("<7I44x", 124, flags, height, width, pitch, 0, mip_count) + pixel_format + struct.pack("<5I", caps, 0, 0, 0, 0)
+        if fmt == "bc7":
+            data += struct.pack("<5I", self.DXGI_BC7_UNORM, 3, 0, 1, 0) #DX10 header: format, TEXTURE2D, misc, array size, misc2
+        return data
+
+    def write(self, path:Path, arr:np.ndarray, normal_map:bool=False):
+        """Write 8 bit HxWxC output as DDS, mip chain and compression by writer settings"""
+        fmt = self.select_format(arr.shape[2], normal_map)
+        levels = self.mip_chain(arr, normal_map) if self.mipmaps else [arr]
+        height, width, channels = arr.shape
+        with open(path, "wb") as f, futures.ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="dds") if self.threads > 1 else nullcontext() as executor:
+            f.write(self.header(width, height, len(levels), fmt, channels))
+            for level in levels:
+                if fmt != "none":
+                    f.write(self.encode(level, fmt, executor))
+                elif channels == 1:
+                    f.write(np.ascontiguousarray(level).tobytes())
+                else:
+                    rgba = np.full(level.shape[:2] + (4,), 255, np.uint8)
+                    rgba[:, :, :channels] = level
+                    f.write(rgba.tobytes())
+
+
+class TextureWriter:
+    """
+    Output writer stage: textures are encoded and saved on a thread pool (PIL and zlib encoders release the GIL)
+    while the next outputs and groups are decoded and packed. Completions ("[+] Save" lines, done/failed callbacks) are handled
+    in submission order in the calling thread, so they may be printed after messages of the next group packed meanwhile.
+    Pending writes are bounded, each holds one output buffer.
+    threads=0 writes synchronously.
+    """
+
+    def __init__(self, packer:"TexturePacker", threads:int=2) -> None:
+        self.packer = packer
+        self.executor = futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix="writer") if threads > 0 else None
+        self.max_pending = max(threads, 1) * 2
+        self.pending = deque()
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, tex:Image|np.ndarray, save_path:Path, config:Config, done=None, tex_suffix:str="", failed=None):
+        """Save texture, done() is called after the file is written, failed(error) if it is not"""
+        while len(self.pending) >= self.max_pending:
+            self._complete(*self.pending.popleft())
+        if self.executor == None:
+            self._complete(None, save_path, done, lambda: self.packer.save_texture(tex, save_path, config, tex_suffix), failed)
+            return
+        self.pending.append((self.executor.submit(self.packer.save_texture, tex, save_path, config, tex_suffix), save_path, done, None, failed))
+
+    def after(self, done):
+        """done() is called once all textures submitted so far are written or failed (e.g. group completed)"""
+        if not self.pending:
+            done()
+        else:
+            self.pending.append((None, None, done, None, None))
+
+    def _complete(self, future, save_path:Path, done, call=None, failed=None):
+        if save_path == None: #after() marker
+            done()
+            return
+        try:
+            future.result() if future != None else call()
+        except Exception as e: #any encoder error belongs to this output, not to the group packed when it is raised
+            error = str(e) if isinstance(e, (OSError, ValueError, KeyError)) else f"{type(e).__name__}: {e}"
+            print("[!] Texture <"+str(save_path)+"> not saved: "+error)
+            self.failed += 1
+            if failed != None:
+                failed(error)
+            return
+        print("[+] Save: "+str(save_path))
+        if done != None:
+            done()
+
+    def flush(self):
+        while self.pending:
+            self._complete(*self.pending.popleft())
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.executor != None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+class SourceCache:
+    """
+    Group level cache of decoded source textures.
+    Every source is decoded once (failed decodes are remembered and not retried), reference counts are derived
+    from the packer layout and decoded buffers are released right after the last output reading them is packed.
+    Tracks resident bytes of decoded sources and output buffers, peak is reported per group in traced runs (--trace).
+    Constant source channels are detected once per source, fully constant sources are kept as broadcast
+    (zero stride) arrays instead of decoded buffers, sources known to be constant from previous runs are not decoded.
+    """
+
+    def __init__(self, packer:"TexturePacker", group_items:dict[str,Path], pk_conf:dict[str:list[PackChItem]], preloaded:dict[str,np.ndarray]=None, resize_filter:str="auto", detect_constants:bool=True, known_constants:dict[str,dict]=None) -> None:
+        self.packer = packer
+        self.group_items = group_items
+        self.resize_filter = resize_filter
+        self.detect_constants = detect_constants
+        self.known_constants = known_constants or {} #fully constant sources by suffix (ConstantCache entries)
+        self.constants:dict[tuple[str,int],object] = {} #value of constant source channel by (suffix, channel)
+        self.found_constants:dict[str,dict] = {} #fully constant sources found by decoding, by source path
+        self.constant_outputs:dict[str,list[float]] = {} #normalized channel values of fully constant outputs
+        self.checked:set[str] = set()
+        self.skipped_decodes = 0
+        self.skipped_bytes = 0
+        self.mixed_sizes = False
+        self.refs:dict[str,int] = {}
+        for pack_items in pk_conf.values():
+            for suffix in self.suffixes(pack_items):
+                self.refs[suffix] = self.refs.get(suffix, 0) + 1
+        self.arrays:dict[str,np.ndarray] = {}
+        self.resized:dict[tuple[str,tuple[int,int]],np.ndarray] = {} #resampled sources by (suffix, (width, height))
+        self.sizes:dict[str,tuple[int,int]] = {} #source sizes read from image headers
+        self.failed:set[str] = set()
+        self.errors:list[tuple[Path,str]] = [] #(path, error) of sources which failed to decode
+        self.resident = 0
+        self.peak = 0
+        self._size = None
+        for suffix, arr in (preloaded or {}).items(): #sources decoded ahead by SourcePrefetcher
+            if suffix in self.refs:
+                self.arrays[suffix] = arr
+                self.add_resident(self.buffer_nbytes(arr))
+                if suffix in group_items:
+                    packer.share_source(group_items[suffix], arr)
+
+    def suffixes(self, pack_items:list[PackChItem])->list[str]:
+        return list(dict.fromkeys(itm.suffix for itm in pack_items))
+
+    def buffer_nbytes(self, arr:np.ndarray)->int:
+        if arr.strides[:2] == (0, 0): #broadcast constant source
+            return arr.shape[2] * arr.itemsize
+        if isinstance(arr, np.memmap): #decode cache, backed by page cache
+            return 0
+        return arr.base.nbytes if isinstance(arr.base, np.ndarray) else arr.nbytes #views keep whole (padded) buffer alive
+
+    def add_resident(self, nbytes:int):
+        self.resident += nbytes
+        self.peak = max(self.peak, self.resident)
+
+    def get(self, suffix:str)->np.ndarray:
+        arr = self.arrays.get(suffix, None)
+        if arr is None and suffix not in self.failed:
+            arr = self.decode(suffix)
+        if arr is not None and suffix not in self.checked:
+            arr = self.check_constant(suffix, arr)
+        return arr
+
+    def constant_array(self, values:list, dtype:np.dtype, size:tuple[int,int])->np.ndarray:
+        """Zero stride HxWxC view of per channel values, no image sized buffer"""
+        return np.broadcast_to(np.array(values, dtype), (size[1], size[0], len(values)))
+
+    def check_constant(self, suffix:str, arr:np.ndarray)->np.ndarray:
+        """Record constant channels of source, fully constant source is replaced by broadcast array"""
+        self.checked.add(suffix)
+        if not self.detect_constants:
+            return arr
+        known = arr.strides[:2] == (0, 0) #known constant, not decoded
+        values = arr[0, 0].tolist() if known else self.packer.constant_values(arr)
+        for ch, value in enumerate(values):
+            if value is not None:
+                self.constants[(suffix, ch)] = value
+        if known or None in values:
+            return arr
+        const = self.constant_array(values, arr.dtype, (arr.shape[1], arr.shape[0]))
+        self.resident -= self.buffer_nbytes(arr)
+        self.arrays[suffix] = const
+        self.add_resident(self.buffer_nbytes(const))
+        band_path = self.group_items.get(suffix, None)
+        if band_path != None:
+            self.found_constants[str(band_path)] = {"width":arr.shape[1], "height":arr.shape[0], "dtype":arr.dtype.str, "values":values}
+        return const
+
+    def decode(self, suffix:str)->np.ndarray:
+        entry = self.known_constants.get(suffix, None)
+        if entry != None: #constant in previous run and unchanged since, not decoded
+            arr = self.constant_array(entry["values"], np.dtype(entry["dtype"]), (entry["width"], entry["height"]))
+            self.skipped_decodes += 1
+            self.skipped_bytes += arr.size * arr.itemsize
+            self.found_constants[str(self.group_items[suffix])] = {key:entry[key] for key in ("width", "height", "dtype", "values")}
+            self.arrays[suffix] = arr
+            self.add_resident(self.buffer_nbytes(arr))
+            return arr
+        band_path = self.group_items.get(suffix, None)
+        if band_path == None: #group items come from directory scan, files removed since are reported by load_image()
+            self.failed.add(suffix)
+            return None
+        arr = self.packer.shared_source(band_path)
+        if arr is None:
+            arr = self.packer.cached_source(band_path)
+        if arr is not None:
+            self.arrays[suffix] = arr
+            self.packer.share_source(band_path, arr)
+            return arr
+        img = self.packer.load_image(band_path)
+        if img == None:
+            self.failed.add(suffix)
+            self.errors.append((band_path, "not loaded"))
+            return None
+        try:
+            with img, self.packer.stage("decode", path=str(band_path), bytes_read=self.packer.traced_size(band_path)):
+                arr = self.packer.image_to_array(img)
+            self.packer.store_source(band_path, arr)
+            self.packer.share_source(band_path, arr)
+        except (OSError, ValueError) as e:
+            self.packer.log("[!] Image <"+str(band_path)+"> not decoded: "+str(e))
+            self.failed.add(suffix)
+            self.errors.append((band_path, str(e)))
+            return None
+        self.arrays[suffix] = arr
+        self.add_resident(self.buffer_nbytes(arr))
+        return arr
+
+    def lookup_constants(self, out_plan:OutputPlan)->dict[tuple[str,int],object]:
+        """Constant source channels read by output (sources must be looked up first)"""
+        return {(suffix, ch):self.constants[(suffix, ch)] for _, suffix, ch, _ in out_plan.gather if (suffix, ch) in self.constants}
+
+    def lookup(self, sources:tuple[str], size:tuple[int,int]=None)->dict[str,np.ndarray]:
+        """
+        Decoded sources (None if missing or failed) for one output texture, sources - OutputPlan.sources.
+        size - output size (width, height), sources of other size are resampled once and reused by other outputs.
+        """
+        bands = {}
+        for suffix in sources:
+            arr = self.get(suffix)
+            if arr is not None and size != None and (arr.shape[1], arr.shape[0]) != size:
+                arr = self.get_resized(suffix, arr, size)
+            bands[suffix] = arr
+        return bands
+
+    def get_resized(self, suffix:str, arr:np.ndarray, size:tuple[int,int])->np.ndarray:
+        resized = self.resized.get((suffix, size), None)
+        if resized is None:
+            with self.packer.stage("resize", source=suffix, size=f"{size[0]}x{size[1]}"):
+                resized = self.packer.resample(arr, size, self.resize_filter)
+            self.resized[(suffix, size)] = resized
+            self.add_resident(self.buffer_nbytes(resized))
+        return resized
+
+    def source_size(self, suffix:str)->tuple[int,int]:
+        """Source size (width, height) from decoded array or image header, None if missing or failed (not decoded later)"""
+        arr = self.arrays.get(suffix, None)
+        if arr is not None:
+            return arr.shape[1], arr.shape[0]
+        if suffix not in self.sizes:
+            band_path = self.group_items.get(suffix, None)
+            img = self.packer.load_image(band_path) if band_path != None and suffix not in self.failed else None
+            if img != None:
+                with img:
+                    self.sizes[suffix] = img.size
+            else:
+                self.sizes[suffix] = None
+                if band_path != None and suffix not in self.failed: #header not readable, reported once, decode is not tried
+                    self.failed.add(suffix)
+                    self.errors.append((band_path, "not loaded"))
+        return self.sizes[suffix]
+
+    def group_size(self)->tuple[int,int]:
+        """
+        Size of the group: largest source (decoded or read from image header), used as output size
+        and for outputs without any valid source. Smaller sources are resampled to it.
+        """
+        if self._size == None:
+            sizes = [size for size in (self.source_size(suffix) for suffix in self.refs) if size != None]
+            self._size = max(sizes, key=lambda size: size[0] * size[1]) if sizes else None
+            self.mixed_sizes = len(set(sizes)) > 1
+        return self._size
+
+    def release(self, sources:tuple[str]):
+        """Output packed, drop its references and free sources (and their resampled copies) which are no longer needed"""
+        for suffix in sources:
+            self.refs[suffix] -= 1
+            if self.refs[suffix] <= 0:
+                arr = self.arrays.pop(suffix, None)
+                if arr is not None:
+                    self.resident -= self.buffer_nbytes(arr)
+                for key in [key for key in self.resized if key[0] == suffix]:
+                    self.resident -= self.buffer_nbytes(self.resized.pop(key))
+
+
+class SourcePrefetcher:
+    """
+    Bounded read-ahead of source textures for upcoming groups (sequential packing).
+    Sources of the next `depth` groups are opened and decoded on background threads while the current group is packed,
+    so file open latency and decoding overlap with packing and encoding.
+    Decoded, not yet taken sources are limited by memory cap, a source that doesn't fit is left to be decoded on demand.
+    Groups packed in streaming mode are not prefetched.
+    """
+
+    def __init__(self, packer:"TexturePacker", config:Config, jobs:list[tuple]) -> None:
+        self.packer = packer
+        self.config = config
+        self.jobs = jobs
+        self.depth = max(int(config.prefetch_groups), 0)
+        self.cap = int(config.prefetch_memory * (1 << 20))
+        self.executor = futures.ThreadPoolExecutor(max_workers=max(int(config.prefetch_threads), 1), thread_name_prefix="prefetch") if self.depth > 0 else None
+        self.futures:dict[int,dict[str,object]] = {}
+        self.hashes:set[str] = set() #dedup mode: content hashes already scheduled, identical sources are shared on demand
+        self.reserved:dict[int,int] = {} #bytes of decoded, not taken sources per group index
+        self.cond = threading.Condition()
+        self.closed = False
+        for index in range(min(self.depth, len(jobs))):
+            self._schedule(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _schedule(self, index:int):
+        if self.executor == None or index >= len(self.jobs) or index in self.futures:
+            return
+        _, group_items, sets, _, known = self.jobs[index]
+        suffixes = dict.fromkeys(itm.suffix for _, _, pk_conf, _, duplicates in sets for tex_suffix, pack_items in pk_conf.items() if tex_suffix not in duplicates for itm in pack_items)
+        suffixes = [suffix for suffix in suffixes if suffix in group_items and suffix not in known and self._first_content(group_items[suffix])]
+        self.futures[index] = {suffix:self.executor.submit(self._decode, index, group_items[suffix]) for suffix in suffixes}
+
+    def _first_content(self, path:Path)->bool:
+        digest = self.packer.dedup.hashes.get(str(path), None) if self.packer.dedup != None else None
+        if digest == None:
+            return True
+        if digest in self.hashes:
+            return False
+        self.hashes.add(digest)
+        return True
+
+    def _estimate_nbytes(self, img:Image)->int:
+        dtype, channels = self.packer.ARRAY_MODES.get(img.mode, (np.uint8, 4))
+        if img.mode.startswith("I;16") and img.mode != "I;16":
+            dtype, channels = np.int32, 1 #converted to I
+        return img.width * img.height * channels * np.dtype(dtype).itemsize
+
+    def _reserve(self, index:int, nbytes:int)->bool:
+        """
+        Wait for memory budget. Only budget of earlier groups is waited for (they are taken first, so no deadlock),
+        returns False if the source doesn't fit.
+        """
+        with self.cond:
+            while not self.closed and sum(self.reserved.values()) + nbytes > self.cap:
+                if sum(v for i, v in self.reserved.items() if i < index) == 0:
+                    return False
+                self.cond.wait()
+            if self.closed:
+                return False
+            self.reserved[index] = self.reserved.get(index, 0) + nbytes
+            return True
+
+    def _unreserve(self, index:int, nbytes:int):
+        with self.cond:
+            self.reserved[index] = self.reserved.get(index, 0) - nbytes
+            if self.reserved[index] <= 0:
+                del self.reserved[index]
+            self.cond.notify_all()
+
+    def _decode(self, index:int, path:Path)->np.ndarray:
+        """Runs in prefetch thread, errors are left for on demand decoding which reports them"""
+        arr = self.packer.cached_source(path) #memory mapped, no budget
+        if arr is not None:
+            return arr
+        try:
+            with Img.open(path) as img:
+                if self.packer.use_streaming(img.size, self.config):
+                    return None
+                nbytes = self._estimate_nbytes(img)
+                if not self._reserve(index, nbytes):
+                    return None
+                try:
+                    with self.packer.stage("decode", path=str(path), bytes_read=self.packer.traced_size(path), prefetch=True):
+                        arr = self.packer.image_to_array(img)
+                    self.packer.store_source(path, arr)
+                except BaseException:
+                    self._unreserve(index, nbytes)
+                    raise
+                return arr
+        except (OSError, ValueError):
+            return None
+
+    def take(self, index:int)->dict[str,np.ndarray]:
+        """Prefetched sources of group (decoded so far), schedules next group read-ahead"""
+        futures = self.futures.pop(index, {})
+        self._schedule(index + self.depth)
+        preloaded = {}
+        for suffix, future in futures.items():
+            arr = future.result()
+            if arr is not None:
+                preloaded[suffix] = arr
+        with self.cond:
+            self.reserved.pop(index, None) #taken sources are owned by group cache now
+            self.cond.notify_all()
+        return preloaded
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        if self.executor != None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        self.futures.clear()
+
+
+class Tracer:
+    """
+    Timing events of packing stages (scan, group, decode, pack, write, ...) and per group spans with their
+    arguments (paths, bytes read/written). Saved as Chrome trace (chrome://tracing, Perfetto) or JSON lines (*.jsonl).
+    Events of worker processes are merged into the main process tracer.
+    """
+
+    def __init__(self) -> None:
+        self.events:list[dict] = []
+        self.threads:dict[tuple[int,int],str] = {}
+        self.lock = threading.Lock()
+        self.origin = time.time() - time.perf_counter() #wall clock origin, timestamps are comparable between processes
+
+    def add(self, name:str, cat:str, start:float, duration:float, args:dict):
+        thread = threading.current_thread()
+        event = {"name":name, "cat":cat, "ph":"X", "ts":round((self.origin + start) * 1e6), "dur":round(duration * 1e6),
+                 "pid":os.getpid(), "tid":thread.ident, "args":{k:v for k, v in args.items() if v is not None}}
+        with self.lock:
+            self.events.append(event)
+            self.threads[(event["pid"], thread.ident)] = thread.name
+
+    def merge(self, data:dict):
+        with self.lock:
+            self.events.extend(data["events"])
+            self.threads.update({tuple(k):v for k, v in data["threads"]})
+
+    def export(self)->dict:
+        """Picklable events of this process, for merge()"""
+        return {"events":self.events, "threads":list(self.threads.items())}
+
+    def save(self, path:str|Path):
+        path = Path(path)
+        events = sorted(self.events, key=lambda e: e["ts"])
+        if path.suffix.lower() == ".jsonl":
+            with open(path, "w") as f:
+                for e in events:
+                    f.write(json.dumps({"name":e["name"], "stage":e["cat"], "start":e["ts"] / 1e6, "duration_s":e["dur"] / 1e6,
+                                        "pid":e["pid"], "thread":self.threads.get((e["pid"], e["tid"]), str(e["tid"])), **e["args"]}) + "\n")
+        else:
+            meta = [{"name":"thread_name", "ph":"M", "pid":pid, "tid":tid, "args":{"name":name}} for (pid, tid), name in self.threads.items()]
+            path.write_text(json.dumps({"traceEvents":meta + events, "displayTimeUnit":"ms"}))
+        print(f"[+] Save trace: {path} ({len(events)} events)")
+
+
 class TexturePacker:
     
     SUFFIX_PLACEHOLDER = "@S@"
@@ -406,34 +2151,181 @@ class TexturePacker:
         4:"RGBA"
     }
 
-    def __init__(self) -> None:
-        pass
+    BIT_DEPTH_NAMES = ("8", "16", "32f")
+    BIT_DEPTHS = LazyConstant(lambda: {
+        "8":np.uint8,
+        "16":np.uint16,
+        "32f":np.float32
+    })
+
+    CONVERT_ROWS = 256 #row strip size for conversions which need float temporaries
+
+    def __init__(self, log=print) -> None:
+        self.log = log if log != None else (lambda *args, **kwargs: None) #messages of packing path (warnings, decode errors)
+        self.stage_times:dict[str,float] = {} #seconds per stage (scan, group, decode, pack, write, stream), summed over threads
+        self._stage_lock = threading.Lock()
+        self.tracer:Tracer = None #set when tracing is enabled (config.trace_path)
+        self.stat_cache = StatCache() #rebuilt by every source scan
+        self.decode_cache:DecodeCache = None #set when decoded sources are shared by runs (config.decode_cache_dir)
+        self.dedup:DedupIndex = None #set in dedup mode (sequential packing shares decoded sources through it)
+        self.reset_constants()
+        self.reset_errors()
+
+    @contextmanager
+    def stage(self, name:str, **args):
+        """Time a packing stage, yields trace event args which may be extended inside the block"""
+        t = time.perf_counter()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - t
+            with self._stage_lock:
+                self.stage_times[name] = self.stage_times.get(name, 0.0) + duration
+            if self.tracer != None:
+                self.tracer.add(name, name, t, duration, args)
+
+    @contextmanager
+    def span(self, name:str, cat:str, **args):
+        """Trace only span (not counted in stage times), e.g. whole group"""
+        t = time.perf_counter()
+        try:
+            yield args
+        finally:
+            if self.tracer != None:
+                self.tracer.add(name, cat, t, time.perf_counter() - t, args)
+
+    def open_decode_cache(self, config:Config):
+        self.decode_cache = DecodeCache(config.decode_cache_dir, config.decode_cache_size, self.stat_cache) if config.decode_cache_dir else None
+
+    def shared_source(self, path:Path)->np.ndarray:
+        """Source decoded by other group from identical file (dedup mode), None if not available"""
+        return self.dedup.get_band(path) if self.dedup != None else None
+
+    def share_source(self, path:Path, arr:np.ndarray):
+        if self.dedup != None:
+            self.dedup.put_band(path, arr)
+
+    def cached_source(self, path:Path)->np.ndarray:
+        """Source mapped from decode cache, None if disabled or not cached"""
+        if self.decode_cache == None:
+            return None
+        with self.stage("map", path=str(path)):
+            return self.decode_cache.get(path)
+
+    def store_source(self, path:Path, arr:np.ndarray):
+        if self.decode_cache != None:
+            with self.stage("cache_store", path=str(path), bytes_written=arr.nbytes):
+                self.decode_cache.put(path, arr)
+
+    def traced_size(self, path:Path)->int:
+        """File size for trace events, None (no stat call) if tracing is disabled"""
+        if self.tracer == None:
+            return None
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def add_stage_times(self, times:dict[str,float]):
+        with self._stage_lock:
+            for name, t in times.items():
+                self.stage_times[name] = self.stage_times.get(name, 0.0) + t
     
-    def convert_mode_i_to_l(self, img:Image)->Image:
-        array = np.uint8(np.array(img) / 256)
-        return Img.fromarray(array)
+    # mode: (dtype, channels)
+    ARRAY_MODES = LazyConstant(lambda: {
+        "L":(np.uint8, 1),
+        "LA":(np.uint8, 2),
+        "RGB":(np.uint8, 3),
+        "RGBA":(np.uint8, 4),
+        "CMYK":(np.uint8, 4),
+        "I;16":(np.uint16, 1),
+        "I":(np.int32, 1),
+        "F":(np.float32, 1),
+    })
+
+    def image_to_array(self, img:Image)->np.ndarray:
+        """
+        Decode image to HxWxC array (single decode, no per-band copies), read only.
+        Palette, bilevel and other modes are expanded to RGB(A)/L first, 16/32 bit integer and float modes keep their dtype.
+        """
+        if img.mode not in self.ARRAY_MODES:
+            if img.mode.startswith("I;16"):
+                img = img.convert("I")
+            elif img.mode in ("1", "La"):
+                img = img.convert("L" if img.mode == "1" else "LA")
+            else:
+                img = img.convert("RGBA" if "A" in img.mode or "transparency" in img.info else "RGB")
+        arr = np.asarray(img)
+        return arr[:, :, np.newaxis] if arr.ndim == 2 else arr
+
+    def array_to_image(self, arr:np.ndarray, mode:str)->Image:
+        """PIL image of output buffer, L and RGBA share its memory. Buffer is HxWx1 (L) or HxWx4 (RGB pixels padded to 4 bytes, copied)"""
+        size = (arr.shape[1], arr.shape[0])
+        if mode == "RGB":
+            return Img.frombytes(mode, size, np.ascontiguousarray(arr), "raw", "RGBX", 0, 1)
+        return Img.frombuffer(mode, size, np.ascontiguousarray(arr), "raw", mode, 0, 1)
 
     def load_image(self, path:str)->Image:
         try:
             return Img.open(path)
         except error:
-            print("[!] Image <"+str(path)+"> not loaded.")
+            self.log("[!] Image <"+str(path)+"> not loaded.")
             return None
 
-    def get_file_suffix_index(self, name:str, suffixes:list[str] )-> tuple[str, int]:
-        name = name.lower()
-        for s in suffixes:
-            # Check if suffix is at the end of the name (critical for short suffixes like _r, _n)
-            if name.endswith(s):
-                index = len(name) - len(s)
-                return s, index
-        return None, -1
-
     def get_mapped_suffix(self,suffix:str, suffix_map:dict[str,str])->str:
         mapped = suffix_map.get(suffix,"")
         return suffix if mapped == "" else mapped
 
-    def get_groups(self, paths:list[Path], relative_to:Path, suffixes_map:dict[str,str])->dict[str,dict[str:Path]]:
+    SKIP_DIRS = {".git", ".svn", ".hg", ".bzr", "CVS", "__pycache__"}
+
+    def scan_source_files(self, src_dir:Path, config:Config, exclude_dirs:list[Path]=())->list[Path]:
+        """
+        List source textures with os.scandir (no per entry Path/stat overhead).
+        Recursive mode walks subdirectories in parallel threads, hidden and VCS directories are skipped
+        (hidden files are listed like any other file).
+        Include/exclude glob patterns are matched against path relative to src_dir ("/" separated).
+        Directory listings are kept in a new stat cache of the run.
+        """
+        self.stat_cache = StatCache()
+        extensions = tuple(ext.lower() for ext in config.extensions)
+        include = config.get_patterns(config.include)
+        exclude = config.get_patterns(config.exclude)
+        skip_paths = {os.path.normcase(str(d)) for d in exclude_dirs}
+
+        def scan_dir(path:str, rel:str)->tuple[list[str], list[tuple[str,str]]]:
+            files, subdirs = [], []
+            with os.scandir(path) as it:
+                entries = list(it)
+            self.stat_cache.add_listing(path, entries)
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if config.recursive and not name.startswith(".") and name not in self.SKIP_DIRS and os.path.normcase(entry.path) not in skip_paths:
+                        subdirs.append((entry.path, rel + name + "/"))
+                    continue
+                if not name.lower().endswith(extensions):
+                    continue
+                rel_path = rel + name
+                if include and not any(fnmatch.fnmatch(rel_path, p) for p in include):
+                    continue
+                if exclude and any(fnmatch.fnmatch(rel_path, p) for p in exclude):
+                    continue
+                files.append(entry.path)
+            return files, subdirs
+
+        files, subdirs = scan_dir(str(src_dir), "")
+        if subdirs:
+            with futures.ThreadPoolExecutor(max_workers=max(config.scan_threads, 1)) as executor:
+                pending = {executor.submit(scan_dir, *d) for d in subdirs}
+                while pending:
+                    done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        dir_files, dir_subdirs = future.result()
+                        files.extend(dir_files)
+                        pending.update(executor.submit(scan_dir, *d) for d in dir_subdirs)
+        return sorted(Path(f) for f in files) #sorted for deterministic group order
+
+    def get_groups(self, paths:list[Path], relative_to:Path, suffixes_map:dict[str,str], matcher:SuffixMatcher=None)->dict[str,dict[str:Path]]:
         '''
         output:
         {
@@ -450,18 +2342,25 @@ class TexturePacker:
             }
         }
         '''
-        # Sort suffixes by length (longest first) to prioritize specific matches over short ones
-        suffixes = sorted(suffixes_map.keys(), key=lambda x: len(x), reverse=True)
+        # Longest suffix wins, to prioritize specific matches over short ones (critical for short suffixes like _r, _n)
+        if matcher == None:
+            matcher = SuffixMatcher(suffixes_map)
+        prefix = str(relative_to).rstrip("/\\") + os.sep
         groups = {}
         for pth in paths:
-            sf, sf_index = self.get_file_suffix_index(pth.stem,suffixes)
+            path_str = str(pth)
+            rel = path_str[len(prefix):] if path_str.startswith(prefix) else str(pth.relative_to(relative_to))
+            rel = rel[:rel.rfind(".")] if rel.rfind(".") > rel.rfind(os.sep) else rel #remove extension
+            stem = rel[rel.rfind(os.sep) + 1:]
+            sf, sf_index = matcher.match(stem)
 
             if sf == None:
-                print("[-] Skip: "+str(pth)+" (has no valid suffix, described in [map suffixes] section of config)")
+                print("[-] Skip: "+path_str+" (has no valid suffix, described in [map suffixes] section of config)")
                 continue
-            
-            grp_name = str(pth.relative_to(relative_to)).rsplit(".",1)[0]
-            grp_name = grp_name[ :sf_index] + self.SUFFIX_PLACEHOLDER + grp_name[sf_index + len(sf): ]
+
+            if os.sep != "/":
+                rel = rel.replace(os.sep, "/")
+            grp_name = rel[ :len(rel) - len(sf)] + self.SUFFIX_PLACEHOLDER #suffix is always at the end of stem
             
             itms = groups.get(grp_name, None)
             if itms == None:
@@ -470,102 +2369,676 @@ class TexturePacker:
             itms[self.get_mapped_suffix(sf,suffixes_map)] = pth
         return groups
 
-    def get_filtered_packer_config(self, group_name:str, target_dir:Path)->dict[str, list[PackChItem]]:
+    def filter_outputs(self, group_name:str, group_items:dict[str,Path], target_dir:Path, config:Config, manifest:BuildManifest=None)->tuple[dict[str, list[PackChItem]], dict[str,tuple[Path,str]]]:
+        """
+        Split outputs to pack and outputs which should not be packed, returns (packer config, {suffix:(save_path, reason)}):
+        - up to date outputs in incremental mode (sources, layout and naming unchanged since recorded in build manifest)
+        - already existing outputs in no-owerwrite mode, except outputs tracked by build manifest in incremental mode
+        """
         pk_conf = {}
+        skipped = {}
         for pk_suffix in config.packer:
-            excl_path = target_dir.joinpath(group_name + pk_suffix+"."+config.output_format)
-            if not excl_path.exists():
+            excl_path = self.get_save_path(group_name, pk_suffix, config, target_dir)
+            if manifest != None and manifest.is_up_to_date(excl_path, group_items, config.packer[pk_suffix], config, pk_suffix):
+                skipped[pk_suffix] = (excl_path, "up to date")
+            elif config.owerwrite or not self.stat_cache.exists(excl_path) or (manifest != None and manifest.contains(excl_path)):
                 pk_conf[pk_suffix]=config.packer[pk_suffix]
             else:
-                print("[-] Skip: " + str(excl_path) + " (file exists)")
+                skipped[pk_suffix] = (excl_path, "file exists")
+        return pk_conf, skipped
+
+    def get_filtered_packer_config(self, group_name:str, group_items:dict[str,Path], target_dir:Path, config:Config, manifest:BuildManifest=None)->dict[str, list[PackChItem]]:
+        """Outputs to pack (see filter_outputs()), skipped outputs are printed"""
+        pk_conf, skipped = self.filter_outputs(group_name, group_items, target_dir, config, manifest)
+        for excl_path, reason in skipped.values():
+            print("[-] Skip: " + str(excl_path) + " (" + reason + ")")
         return pk_conf
 
-    def load_texture_bands(self, group_items:dict[str,Path], config:dict[list[PackChItem]])->dict[str,list[Image]]:
-        loaded:dict[str,list[Image]] = {}
-        for pack_grp in config:
-            pack_ch_itms = config[pack_grp]
-            for pack_ch_itm in pack_ch_itms:
-                band_path = group_items.get(pack_ch_itm.suffix, None)
-                if band_path!=None and band_path.exists() and (loaded.get(pack_ch_itm.suffix, None) == None):
-                    img = self.load_image(band_path)
-                    if img != None:
-                        loaded[pack_ch_itm.suffix] = img.split()
-                    else:
-                        loaded[pack_ch_itm.suffix] = None
-        return loaded
-    
-    def pack_texture(self,band_lookup:dict[str,list[Image]], pack_items:list[PackChItem])->Image:
-        if len(band_lookup) < 1:
-            print("[!] Warning: No textures loaded for packing")
-            return None
-
-        # Find first valid band to determine size, filtering out None values
-        valid_bands = [bands for bands in band_lookup.values() if bands is not None and len(bands) > 0]
-        if len(valid_bands) == 0:
-            print("[!] Warning: No valid texture bands found")
+    def plan_groups(self, groups:dict[str,dict[str,Path]], config:Config, target_dir:Path, manifest:BuildManifest=None)->list[GroupPlan]:
+        """
+        Plan all groups up front from scanned files and compiled layout, nothing is decoded:
+        outputs to pack, skipped outputs and missing sources. Existence checks are answered from stat cache.
+        """
+        plan = config.get_pack_plan()
+        planned = []
+        for grp_name, group_items in groups.items():
+            if config.owerwrite and manifest == None:
+                pk_conf, skipped = config.packer, {}
+            else:
+                pk_conf, skipped = self.filter_outputs(grp_name, group_items, target_dir, config, manifest)
+            if manifest != None:
+                manifest.snapshot(group_items, pk_conf)
+            missing = {}
+            for tex_suffix in pk_conf:
+                suffixes = plan.missing([tex_suffix], group_items)
+                if suffixes:
+                    missing[tex_suffix] = suffixes
+            planned.append(GroupPlan(grp_name, group_items, pk_conf, skipped, missing))
+        return planned
+
+    def high_byte(self, src:np.ndarray)->np.ndarray:
+        """Bits 8-15 of integer channel as uint8 view (no copy) or None if channel memory layout doesn`t allow it"""
+        if src.strides[-1] != src.itemsize:
             return None
+        little = src.dtype.byteorder == "<" or (src.dtype.byteorder in "=|" and sys.byteorder == "little")
+        return src.view(np.uint8)[..., (1 if little else src.itemsize - 2)::src.itemsize]
 
-        black_ch = Img.new("L", valid_bands[0][0].size, 0) # Create black channel using first valid band size
-        ch_bands:list[Image] = []
+    def gather_channel(self, dst:np.ndarray, src:np.ndarray, invert:bool=False):
+        """
+        Copy one source channel to output channel view, converting bit depth and inverting in the same pass.
+        Integer conversions use byte views and integer ops writing directly to output, without full size temporaries.
+        """
+        if dst.dtype == np.uint8 and src.dtype.kind in "iu" and src.dtype != np.uint8: # 16/32 bit integer ("I", "I;16" modes) to 8 bit
+            high = self.high_byte(src)
+            if high is None:
+                np.right_shift(src, 8, out=dst, casting="unsafe")
+                src = dst
+            else:
+                src = high
+        if dst.dtype == np.uint16 and src.dtype == np.uint8:
+            np.multiply(src, np.uint16(257), out=dst) # v << 8 | v, full 0..65535 range
+        elif dst.dtype.kind == "f" and src.dtype.kind in "iu":
+            np.multiply(src, np.float32(1.0 / (255 if src.dtype == np.uint8 else 65535)), out=dst)
+        elif dst.dtype.kind in "iu" and src.dtype.kind == "f": # float expected in 0..1 range, clipped in row strips
+            max_value = np.iinfo(dst.dtype).max
+            for r in range(0, src.shape[0], self.CONVERT_ROWS):
+                np.multiply(np.clip(src[r:r + self.CONVERT_ROWS], 0.0, 1.0), max_value, out=dst[r:r + self.CONVERT_ROWS], casting="unsafe")
+        elif src.dtype.kind in "iu" or src.dtype == dst.dtype:
+            if invert and dst.dtype.kind == "u":
+                np.invert(src, out=dst, casting="unsafe") # max - value for unsigned output
+                return
+            np.copyto(dst, src, casting="unsafe")
+        else:
+            np.copyto(dst, src, casting="same_kind")
 
-        for item in pack_items:
-            g_tex = band_lookup.get(item.suffix, [])
-            if g_tex is not None and item.ch<len(g_tex):
-                bnd = g_tex[item.ch]
-                if bnd is None:
-                    print(f"[!] Warning: Band {item.ch} of {item.suffix} is None, using black channel")
-                    ch_bands.append(black_ch)
-                    continue
+        if invert:
+            if dst.dtype.kind == "f":
+                np.subtract(1.0, dst, out=dst)
+            else:
+                np.invert(dst, out=dst)
 
-                if bnd.mode == "I":
-                    #print("Item: "+item.suffix+" has I (32 bits per channel) format, convert to L(8 bits per channel).")
-                    bnd = self.convert_mode_i_to_l(bnd)
+    RESIZE_FILTERS = ("auto", "box", "bilinear", "bicubic", "lanczos")
+    PIL_RESIZE_FILTERS = LazyConstant(lambda: {"auto":Img.BICUBIC, "box":Img.BOX, "bilinear":Img.BILINEAR, "bicubic":Img.BICUBIC, "lanczos":Img.LANCZOS})
+    PIL_ARRAY_MODES = LazyConstant(lambda: {np.dtype(np.uint8):"L", np.dtype(np.int32):"I", np.dtype(np.float32):"F"})
 
-                bnd = bnd if not item.invert else ImageChops.invert(bnd)
-                ch_bands.append(bnd)
+    def resample(self, arr:np.ndarray, size:tuple[int,int], resize_filter:str="auto")->np.ndarray:
+        """
+        Resample HxWxC source array to size (width, height), dtype is kept.
+        Integer downscale factors with auto or box filter are area averaged in numpy (vectorized, exact),
+        other sizes are resampled by PIL (8 bit RGB(A) in one pass, other data channel by channel).
+        """
+        height, width, channels = arr.shape
+        out_w, out_h = size
+        if arr.strides[:2] == (0, 0): #constant source
+            return np.broadcast_to(arr[:1, :1], (out_h, out_w, channels))
+        if resize_filter in ("auto", "box") and width % out_w == 0 and height % out_h == 0 and width >= out_w and height >= out_h:
+            fx, fy = width // out_w, height // out_h
+            out = arr.reshape(out_h, fy, out_w, fx, channels).mean(axis=(1, 3), dtype=np.float32)
+            return out if arr.dtype.kind == "f" else np.rint(out).astype(arr.dtype)
+        resample = self.PIL_RESIZE_FILTERS[resize_filter]
+        if arr.dtype == np.uint8 and channels in (3, 4):
+            return np.asarray(Img.fromarray(np.ascontiguousarray(arr)).resize(size, resample))
+        dtype = arr.dtype if arr.dtype in self.PIL_ARRAY_MODES else (np.dtype(np.int32) if arr.dtype.kind in "iu" else np.dtype(np.float32))
+        out = np.empty((out_h, out_w, channels), arr.dtype)
+        for ch in range(channels):
+            band = Img.fromarray(np.ascontiguousarray(arr[:, :, ch], dtype), self.PIL_ARRAY_MODES[dtype])
+            out[:, :, ch] = np.asarray(band.resize(size, resample))
+        return out
+
+    CONSTANT_SAMPLE = (17, 13) #row, column step of sparse sample checked before full min/max pass
+
+    def constant_values(self, arr:np.ndarray)->list:
+        """
+        Value of every constant channel of HxWxC array, None for other channels.
+        A sparse sample is checked first, so most non constant channels are rejected without a full pass.
+        """
+        values = []
+        for ch in range(arr.shape[2]):
+            band = arr[:, :, ch]
+            first = band[0, 0]
+            sample = band[::self.CONSTANT_SAMPLE[0], ::self.CONSTANT_SAMPLE[1]]
+            if sample.min() != first or sample.max() != first or band.min() != first or band.max() != first:
+                values.append(None)
             else:
-                print(f"[!] Warning: Texture {item.suffix} not found or channel {item.ch} missing, using black channel")
-                ch_bands.append(black_ch)
-            #print("-->: ["+item.suffix+"] contains "+str(len(g_tex))+" channels")
+                values.append(first.item())
+        return values
+
+    def constant_fill(self, value, src_dtype:np.dtype, dst_dtype:np.dtype, invert:bool=False):
+        """Output value of constant source channel, converted exactly like gather_channel() converts pixels"""
+        dst = np.empty((1, 1), dst_dtype)
+        self.gather_channel(dst, np.full((1, 1), value, src_dtype), invert)
+        return dst[0, 0]
+
+    def constant_output(self, band_lookup:dict[str,np.ndarray], out_plan:OutputPlan, constants:dict[tuple[str,int],object])->list[float]:
+        """Normalized (0..1) channel values if every channel of output is constant or missing (black), else None"""
+        values = []
+        for _, suffix, ch, invert in out_plan.gather:
+            g_tex = band_lookup.get(suffix, None)
+            if g_tex is None or ch >= g_tex.shape[2]:
+                values.append(0.0)
+            elif (suffix, ch) in constants:
+                values.append(round(float(self.constant_fill(constants[(suffix, ch)], g_tex.dtype, np.float32, invert)), 6))
+            else:
+                return None
+        return values
+
+    def output_channels(self, pack_items:list[PackChItem])->tuple[int,str]:
+        out_plan = OutputPlan("", pack_items)
+        return out_plan.channels, out_plan.mode
+
+    def pack_texture(self,band_lookup:dict[str,np.ndarray], pack_items:list[PackChItem], bit_depth:str="8", size:tuple[int,int]=None, as_array:bool=False)->Image|np.ndarray:
+        """Pack output texture from source channels, see pack_output()"""
+        return self.pack_output(band_lookup, OutputPlan("", pack_items), bit_depth, size, as_array)
+
+    def pack_output(self, band_lookup:dict[str,np.ndarray], out_plan:OutputPlan, bit_depth:str="8", size:tuple[int,int]=None, as_array:bool=False, constants:dict[tuple[str,int],object]=None)->Image|np.ndarray:
+        """
+        Pack output texture from source channels by compiled output layout.
+        Constant source channels (constants by (suffix, channel), broadcast sources) are written as scalar fills.
+        8 bit output is returned as PIL image, 16 and 32f bit outputs as HxWxC array (saved by ArrayWriter).
+        as_array - return 8 bit output as HxWxC array too (view of output buffer, no copy).
+        size - group size (width, height), used when none of the output sources is available
+        """
+        if len(band_lookup) < 1:
+            self.log("[!] Warning: No textures loaded for packing")
+            return None
 
-        if len(ch_bands)==0:
-            print("[!] Warning: No channels to pack")
+        # Find first valid source to determine size, filtering out None values
+        valid_bands = [bands for bands in band_lookup.values() if bands is not None]
+        if len(valid_bands) == 0 and size == None:
+            self.log("[!] Warning: No valid texture bands found")
             return None
 
-        if len(ch_bands)==2: #two channels unavailable, remove last one
-            ch_bands.pop()
-        img =  Img.merge(self.IMG_MODES_MAP[len(ch_bands)],ch_bands)
-        return img
+        if out_plan.channels == 0:
+            self.log("[!] Warning: No channels to pack")
+            return None
 
-    def pack_material_stems(self, group_items:dict[str,Path], config:dict[str:list[PackChItem]]):
-        packed_stems:dict[str,Image] = {}
-        bands = self.load_texture_bands(group_items,config)
-        for itm_name in config:
-            #print("- texture: "+itm_name)
-            tex = self.pack_texture(bands,config[itm_name])
+        height, width = valid_bands[0].shape[:2] if valid_bands else (size[1], size[0])
+        channels = out_plan.channels
+        dtype = self.BIT_DEPTHS[bit_depth]
+        if dtype == np.uint8:
+            # output buffer in PIL memory layout, channels are gathered directly into it and shared with output image
+            out = np.empty((height, width, 1 if channels == 1 else 4), dtype)
+        else:
+            out = np.empty((height, width, channels), dtype)
+
+        for i, suffix, ch, invert in out_plan.gather:
+            g_tex = band_lookup.get(suffix, None)
+            if g_tex is not None and ch < g_tex.shape[2]:
+                if g_tex.shape[:2] != (height, width):
+                    raise ValueError(f"Texture {suffix} size {g_tex.shape[1]}x{g_tex.shape[0]} differs from group size {width}x{height}")
+                value = constants.get((suffix, ch), None) if constants else None
+                if value is None and g_tex.strides[:2] == (0, 0):
+                    value = g_tex[0, 0, ch]
+                if value is not None:
+                    out[:, :, i] = self.constant_fill(value, g_tex.dtype, dtype, invert)
+                else:
+                    self.gather_channel(out[:, :, i], g_tex[:, :, ch], invert)
+            else:
+                self.log(f"[!] Warning: Texture {suffix} not found or channel {ch} missing, using black channel")
+                out[:, :, i] = 0
+
+        if dtype != np.uint8:
+            return out
+        if as_array:
+            return out[:, :, :channels]
+        return self.array_to_image(out, out_plan.mode)
+
+    def source_to_array(self, source:str|Path|bytes|np.ndarray|Image)->np.ndarray:
+        """Decode in-memory API source: file path, encoded file content, PIL image or HxW / HxWxC array"""
+        if isinstance(source, np.ndarray):
+            return source[:, :, np.newaxis] if source.ndim == 2 else source
+        if isinstance(source, Img.Image):
+            return self.image_to_array(source)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        with Img.open(source) as img:
+            with self.stage("decode"):
+                return self.image_to_array(img)
+
+    def pack_sources(self, config:Config, sources:dict[str,object], as_array:bool=False)->dict[str,Image|np.ndarray]:
+        """
+        Pack one texture group from in-memory sources (see pack()), outputs are returned instead of saved.
+        Source suffixes are remapped by config.map_suffixes, only sources used by config.packer are decoded.
+        """
+        bit_depth = str(config.bit_depth)
+        if bit_depth not in self.BIT_DEPTH_NAMES:
+            raise ValueError("Unsupported bit depth <"+bit_depth+">, use one of: "+", ".join(self.BIT_DEPTH_NAMES))
+        plan = config.get_pack_plan()
+        preloaded = {}
+        for suffix, source in sources.items():
+            suffix = suffix.lower()
+            suffix = self.get_mapped_suffix(suffix, config.map_suffixes) if suffix in config.map_suffixes else suffix
+            if suffix in plan.sources and suffix not in preloaded:
+                preloaded[suffix] = self.source_to_array(source)
+        cache = SourceCache(self, {}, config.packer, preloaded, config.resize_filter, config.detect_constants)
+        packed = {}
+        for tex_suffix, out_plan in plan.outputs.items():
+            size = out_plan.target_size(cache.group_size())
+            band_lookup = cache.lookup(out_plan.sources, size)
+            if any(arr is not None for arr in band_lookup.values()): #outputs without any source are omitted
+                with self.stage("pack", output=tex_suffix):
+                    tex = self.pack_output(band_lookup, out_plan, bit_depth, size, as_array, cache.lookup_constants(out_plan))
+                if tex is not None:
+                    packed[tex_suffix] = tex
+            cache.release(out_plan.sources)
+        return packed
+
+    def pack_material_stems(self, group_items:dict[str,Path], config:dict[str:list[PackChItem]], bit_depth:str="8"):
+        packed_stems:dict[str,Image|np.ndarray] = {}
+        for itm_name, tex in self.iter_packed(SourceCache(self, group_items, config), config, bit_depth):
             packed_stems[itm_name] = tex
         return packed_stems
 
+    def iter_packed(self, cache:SourceCache, config:dict[str:list[PackChItem]], bit_depth:str="8", plan:PackPlan=None):
+        """
+        Pack output textures one by one, sources are released as soon as the last output reading them is packed.
+        plan - compiled layout of config (Config.get_pack_plan()), outputs not in plan are compiled on the fly.
+        Outputs are packed in group size (largest source) or in their own size (max_size, scale options).
+        """
+        for itm_name in config:
+            out_plan = plan.get(itm_name, config[itm_name]) if plan != None else OutputPlan(itm_name, config[itm_name])
+            size = out_plan.target_size(cache.group_size())
+            band_lookup = cache.lookup(out_plan.sources, size)
+            constants = cache.lookup_constants(out_plan)
+            with self.stage("pack", output=itm_name):
+                tex = self.pack_output(band_lookup, out_plan, bit_depth, size, constants=constants)
+            values = self.constant_output(band_lookup, out_plan, constants) if cache.detect_constants and tex is not None else None
+            if values != None:
+                cache.constant_outputs[itm_name] = values
+            cache.release(out_plan.sources)
+            yield itm_name, tex
+
+    def texture_nbytes(self, tex:Image|np.ndarray)->int:
+        if isinstance(tex, np.ndarray):
+            return tex.nbytes
+        return tex.width * tex.height * (1 if tex.mode == "L" else 4)
+
     def validate_group(self, group_name:str, group_items:dict[str,Path], pack_config:dict[str:list[PackChItem]])->tuple[bool, list[str]]:
         """
-        Validate that all required textures exist for a group.
+        Validate that all required textures exist for a group (group items come from directory scan).
         Returns (is_valid, list_of_missing_suffixes)
         """
-        required_suffixes = set()
-        for pack_items in pack_config.values():
-            for pack_item in pack_items:
-                required_suffixes.add(pack_item.suffix)
+        required_suffixes = dict.fromkeys(pack_item.suffix for pack_items in pack_config.values() for pack_item in pack_items)
+        missing = [suffix for suffix in required_suffixes if suffix not in group_items]
+        return len(missing) == 0, missing
 
-        missing = []
-        for suffix in required_suffixes:
-            if suffix not in group_items or not group_items[suffix].exists():
-                missing.append(suffix)
+    def get_save_path(self, grp_name:str, tex_suffix:str, config:Config, target_dir:Path)->Path:
+        # Get base name without placeholder, subdirectories (recursive mode) are kept as is
+        base_name = Path(grp_name.replace(self.SUFFIX_PLACEHOLDER, ""))
 
-        is_valid = len(missing) == 0
-        return is_valid, missing
+        # Apply naming scheme (handles both standard and Unreal conventions)
+        formatted_name = config.apply_naming_scheme(base_name.name, tex_suffix)
 
-    def pack_textures(self, config:Config, validate:bool=False):
-        
+        return target_dir.joinpath(base_name.parent, formatted_name + "." + config.output_format).resolve()
+
+    def confirm_source_overwrite(self, grp_name:str, pk_conf:dict[str:list[PackChItem]], config:Config, target_dir:Path)->dict[str:list[PackChItem]]:
+        """
+        Ask before overwriting source files (dest directory == src directory).
+        Always runs in the main process, declined outputs are removed from the returned packer config.
+        """
+        confirmed = {}
+        for tex_suffix in pk_conf:
+            save_path = self.get_save_path(grp_name, tex_suffix, config, target_dir)
+            if self.stat_cache.exists(save_path):
+                print("[?] OVERWRITE SOURCE FILE: <"+str(save_path)+"> ?")
+                print(" -> [Y] [ENTER] to overwrite")
+                answ = input()
+                if answ.lower() !="y":
+                    print("[!] Cancel")
+                    continue
+            confirmed[tex_suffix] = pk_conf[tex_suffix]
+        return confirmed
+
+    def reset_errors(self):
+        self.errors:list[dict] = [] #failed sources, outputs and groups of the run, reported at its end
+        self.failed_groups:set[str] = set()
+
+    def add_error(self, grp_name:str, stage:str, error:str, path:Path=None, target:str=""):
+        """Record failure of group (stage: decode, pack, write, link), failed groups are not journaled as completed"""
+        self.errors.append({"group":grp_name.replace(self.SUFFIX_PLACEHOLDER, ""), "target":target, "stage":stage, "path":str(path) if path != None else None, "error":error})
+        self.failed_groups.add(grp_name)
+
+    def report_errors(self, config:Config):
+        """Print errors of the run, write JSON report (config.error_report)"""
+        if self.errors:
+            groups = dict.fromkeys(err["group"] for err in self.errors)
+            print(f"[!] {len(self.errors)} error(s) in {len(groups)} group(s), failed groups are packed again by --resume:")
+            for err in self.errors:
+                print(f"    {err['group']}" + (f" (target {err['target']})" if err["target"] else "") + f": {err['stage']}" + (f" <{err['path']}>" if err["path"] else "") + f": {err['error']}")
+        if config.error_report:
+            report = {"errors":self.errors, "failed_groups":list(dict.fromkeys(err["group"] for err in self.errors))}
+            Path(config.error_report).write_text(json.dumps(report, indent=1))
+            print("[+] Save error report: "+config.error_report)
+
+    def reset_constants(self):
+        self.constant_stats = {"channels":0, "decodes_skipped":0, "bytes_skipped":0} #constant source channels, decodes skipped by ConstantCache
+        self.constant_outputs:list[dict] = [] #outputs whose every channel is constant, could be engine constants
+        self.found_constants:dict[str,dict] = {} #fully constant sources by path (ConstantCache entries)
+
+    def add_constants(self, cache:SourceCache, grp_name:str, config:Config, target_dir:Path):
+        """Accumulate constant outputs of one target packed from cache (taken from cache.constant_outputs)"""
+        for tex_suffix, values in cache.constant_outputs.items():
+            self.constant_outputs.append({"output":str(self.get_save_path(grp_name, tex_suffix, config, target_dir)), "values":values})
+        cache.constant_outputs.clear()
+
+    def add_constant_sources(self, cache:SourceCache):
+        """Accumulate constant sources found while packing a group"""
+        self.constant_stats["channels"] += len(cache.constants)
+        self.constant_stats["decodes_skipped"] += cache.skipped_decodes
+        self.constant_stats["bytes_skipped"] += cache.skipped_bytes
+        self.found_constants.update(cache.found_constants)
+
+    def export_constants(self)->dict:
+        return {"stats":self.constant_stats, "outputs":self.constant_outputs, "found":self.found_constants}
+
+    def merge_constants(self, constants:dict):
+        """Merge constants exported by worker process"""
+        for key, value in constants["stats"].items():
+            self.constant_stats[key] += value
+        self.constant_outputs.extend(constants["outputs"])
+        self.found_constants.update(constants["found"])
+
+    def report_constants(self, config:Config):
+        """Print constants summary, write JSON report (config.constants_report)"""
+        if not config.detect_constants:
+            return
+        stats = self.constant_stats
+        disk = 0
+        for output in self.constant_outputs:
+            st = self.stat_cache.stat(Path(output["output"]))
+            output["bytes"] = st.st_size if st != None else 0
+            disk += output["bytes"]
+        if stats["channels"] or stats["decodes_skipped"] or self.constant_outputs:
+            print(f"[*] Constants: {stats['channels']} source channel(s) constant, {stats['decodes_skipped']} decode(s) skipped ({stats['bytes_skipped'] / (1 << 20):.1f} MB), "
+                  f"{len(self.constant_outputs)} output(s) could be engine constants ({disk / 1024:.1f} KB on disk)")
+        if config.constants_report:
+            report = dict(stats, constant_sources=self.found_constants, constant_outputs=self.constant_outputs)
+            Path(config.constants_report).write_text(json.dumps(report, indent=1))
+            print("[+] Save constants report: "+config.constants_report)
+
+    def pack_group(self, grp_name:str, group_items:dict[str,Path], pk_conf:dict[str:list[PackChItem]], config:Config, target_dir:Path, writer:TextureWriter=None, on_saved=None, preloaded:dict[str,np.ndarray]=None, known_constants:dict[str,dict]=None, duplicates:set[str]=None)->list[str]:
+        """
+        Pack and save output textures of one group. Returns suffixes of saved outputs.
+        With shared writer the outputs may be still pending on return, on_saved(suffix) is called once an output is written.
+        preloaded - sources already decoded by SourcePrefetcher.
+        known_constants - constant sources of the group by suffix (ConstantCache.known()), not decoded.
+        duplicates - outputs identical to outputs of other groups (dedup mode), not packed here but linked after packing.
+        """
+        sets = [("", config, pk_conf, target_dir, duplicates or set())]
+        target_saved = (lambda name, tex_suffix: on_saved(tex_suffix)) if on_saved != None else None
+        saved = self.pack_group_targets(grp_name, group_items, sets, config, writer, target_saved, preloaded, known_constants)
+        return [tex_suffix for _, tex_suffix in saved]
+
+    def pack_group_targets(self, grp_name:str, group_items:dict[str,Path], sets:list[tuple], config:Config, writer:TextureWriter=None, on_saved=None, preloaded:dict[str,np.ndarray]=None, known_constants:dict[str,dict]=None)->list[tuple[str,str]]:
+        """
+        Pack and save outputs of one group for several targets, every source is decoded once for all of them.
+        sets - (target_name, target_config, pk_conf, target_dir, duplicates) per target, see pack_group().
+        config - run settings (writer threads, resize filter, streaming, constants detection).
+        Returns (target_name, suffix) of saved outputs, on_saved(target_name, suffix) is called once an output is written.
+        """
+        if writer == None:
+            with TextureWriter(self, config.write_threads) as writer:
+                return self.pack_group_targets(grp_name, group_items, sets, config, writer, on_saved, preloaded, known_constants)
+        with self.span(grp_name.replace(self.SUFFIX_PLACEHOLDER, ""), "pack_group", outputs=sum(len(pk_conf) for _, _, pk_conf, _, _ in sets), preloaded=len(preloaded or {})) as trace_args:
+            return self._pack_group(grp_name, group_items, sets, config, writer, on_saved, preloaded, known_constants, trace_args)
+
+    def _pack_group(self, grp_name:str, group_items:dict[str,Path], sets:list[tuple], config:Config, writer:TextureWriter, on_saved, preloaded:dict[str,np.ndarray], known_constants:dict[str,dict], trace_args:dict)->list[tuple[str,str]]:
+        saved = []
+        for _, _, _, target_dir, _ in sets:
+            t_dir = target_dir.joinpath(grp_name).parent
+            if self.stat_cache.make_dir(t_dir):
+                print("[!] Directory <"+str(t_dir)+"> does not exists, create it..")
+
+        #pack and save textures one by one, only one output buffer is alive at a time, sources are shared by outputs of all targets
+        all_conf = {(name, tex_suffix):pack_items for name, _, pk_conf, _, _ in sets for tex_suffix, pack_items in pk_conf.items()}
+        cache = SourceCache(self, group_items, all_conf, preloaded, config.resize_filter, config.detect_constants, known_constants)
+        size = cache.group_size() #of all outputs, before duplicates are dropped
+        packed = []
+        for name, tconf, pk_conf, target_dir, duplicates in sets:
+            plan = tconf.get_pack_plan()
+            if duplicates:
+                for tex_suffix in duplicates:
+                    cache.release(plan.get(tex_suffix, pk_conf[tex_suffix]).sources)
+                pk_conf = {tex_suffix:pack_items for tex_suffix, pack_items in pk_conf.items() if tex_suffix not in duplicates}
+            packed.append((name, tconf, pk_conf, target_dir, plan))
+        resized = cache.mixed_sizes or any(plan.get(tex_suffix, pack_items).target_size(size) != size for _, _, pk_conf, _, plan in packed for tex_suffix, pack_items in pk_conf.items())
+        if self.use_streaming(size, config) and resized:
+            print(f"[*] '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}' has resized outputs or sources, packed in memory")
+        elif self.use_streaming(size, config):
+            writer.flush() #keep streamed group memory bound
+            for path, err in cache.errors: #sources with unreadable headers are not opened again
+                self.add_error(grp_name, "decode", err, path)
+            with self.stage("stream"):
+                saved = self.pack_group_streamed(grp_name, {suffix:path for suffix, path in group_items.items() if suffix not in cache.failed}, [(name, tconf, pk_conf, target_dir) for name, tconf, pk_conf, target_dir, _ in packed], config, cache.group_size())
+            for name, tex_suffix in saved if on_saved != None else []:
+                on_saved(name, tex_suffix)
+            return saved
+        for name, tconf, pk_conf, target_dir, plan in packed:
+            for tex_suffix, tex in self.iter_packed(cache, pk_conf, str(tconf.bit_depth), plan):
+                save_path = self.get_save_path(grp_name, tex_suffix, tconf, target_dir)
+
+                if tex is not None: #if output texture suffix described in config.packer but no source texture channels exists, <None> goes here, nasty bug fixed!
+                    nbytes = self.texture_nbytes(tex)
+                    cache.add_resident(nbytes)
+                    def done(name=name, tex_suffix=tex_suffix, nbytes=nbytes):
+                        saved.append((name, tex_suffix))
+                        cache.add_resident(-nbytes)
+                        if on_saved != None:
+                            on_saved(name, tex_suffix)
+                    def failed(error, name=name, save_path=save_path, nbytes=nbytes):
+                        cache.add_resident(-nbytes)
+                        self.add_error(grp_name, "write", error, save_path, name)
+                    writer.submit(tex, save_path, tconf, done, tex_suffix, failed) # finally, save the file (encoded while next output is packed)
+                    del tex
+            self.add_constants(cache, grp_name, tconf, target_dir)
+        self.add_constant_sources(cache)
+        for path, err in cache.errors:
+            self.add_error(grp_name, "decode", err, path)
+        if cache.peak > 0 and self.tracer != None: #traced runs only, a line per group would flood normal runs
+            trace_args["peak_mb"] = round(cache.peak / (1 << 20), 1)
+            self.log(f"[*] Peak memory of '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}': {trace_args['peak_mb']:.1f} MB")
+        return saved
+
+    # raw decoder modes which can be memory mapped: (dtype, values per pixel, pixel value index of r, g, b, a channels)
+    RAW_LAYOUTS = LazyConstant(lambda: {
+        "L":(np.uint8, 1, (0,)),
+        "RGB":(np.uint8, 3, (0, 1, 2)),
+        "BGR":(np.uint8, 3, (2, 1, 0)),
+        "RGBA":(np.uint8, 4, (0, 1, 2, 3)),
+        "BGRA":(np.uint8, 4, (2, 1, 0, 3)),
+        "RGBX":(np.uint8, 4, (0, 1, 2)),
+        "BGRX":(np.uint8, 4, (2, 1, 0)),
+        "I;16":(np.dtype("<u2"), 1, (0,)),
+        "I;16B":(np.dtype(">u2"), 1, (0,)),
+    })
+
+    def use_streaming(self, size:tuple[int,int], config:Config)->bool:
+        return size != None and config.stream_threshold > 0 and size[0] * size[1] >= config.stream_threshold * 1e6
+
+    def map_raw_source(self, img:Image, path:Path)->tuple[np.ndarray, dict[int,int]]:
+        """Memory map uncompressed image data (BMP, TGA, single strip TIFF), rows are read from disk only when accessed"""
+        if len(img.tile) != 1:
+            return None
+        name, extents, offset, args = img.tile[0]
+        if name != "raw" or tuple(extents) != (0, 0) + img.size:
+            return None
+        rawmode, stride, ystep = (args, 0, 1) if isinstance(args, str) else args
+        layout = self.RAW_LAYOUTS.get(rawmode, None)
+        if layout == None:
+            return None
+        dtype, values, order = layout
+        width, height = img.size
+        row_bytes = width * values * np.dtype(dtype).itemsize
+        stride = stride if stride > 0 else row_bytes
+        raw = np.memmap(path, np.uint8, "r", offset=offset, shape=(height, stride))
+        arr = raw[:, :row_bytes].view(dtype).reshape(height, width, values)
+        if ystep < 0: #bottom-up rows
+            arr = arr[::-1]
+        return arr, {ch:i for ch, i in enumerate(order)}
+
+    def spill_source(self, img:Image, channels:list[int], spill_path:Path, band_path:Path=None)->tuple[np.ndarray, dict[int,int]]:
+        """Decode compressed source once and store only referenced channels in temporary memory mapped file"""
+        arr = self.image_to_array(img)
+        if band_path != None:
+            self.store_source(band_path, arr)
+        channels = [ch for ch in channels if ch < arr.shape[2]]
+        spill = np.memmap(spill_path, arr.dtype, "w+", shape=arr.shape[:2] + (max(len(channels), 1),))
+        for i, ch in enumerate(channels):
+            spill[:, :, i] = arr[:, :, ch]
+        spill.flush()
+        return spill, {ch:i for i, ch in enumerate(channels)}
+
+    def open_strip_source(self, band_path:Path, channels:list[int], spill_path:Path)->tuple[np.ndarray, dict[int,int]]:
+        if band_path == None:
+            return None
+        arr = self.cached_source(band_path)
+        if arr is not None:
+            return arr, {ch:ch for ch in range(arr.shape[2])}
+        img = self.load_image(band_path)
+        if img == None:
+            return None
+        try:
+            with img:
+                return self.map_raw_source(img, band_path) or self.spill_source(img, channels, spill_path, band_path)
+        except (OSError, ValueError) as e:
+            self.log("[!] Image <"+str(band_path)+"> not decoded: "+str(e))
+            return None
+
+    def iter_strips(self, sources:dict[str,tuple], pack_items:list[PackChItem], size:tuple[int,int], bit_depth:str, rows:int, out:np.ndarray=None):
+        """
+        Assemble output texture strip by strip from source strips.
+        Strips are gathered into one reused strip buffer, or into out buffer (HxWxC) if given.
+        """
+        width, height = size
+        channels, _ = self.output_channels(pack_items)
+        buf = np.empty((min(rows, height), width, channels), self.BIT_DEPTHS[bit_depth]) if out is None else None
+        for item in pack_items[:channels]:
+            src = sources.get(item.suffix, None)
+            if src == None or item.ch not in src[1]:
+                self.log(f"[!] Warning: Texture {item.suffix} not found or channel {item.ch} missing, using black channel")
+        for r0 in range(0, height, rows):
+            r1 = min(r0 + rows, height)
+            strip = buf[:r1 - r0] if out is None else out[r0:r1]
+            for i, item in enumerate(pack_items[:channels]):
+                src = sources.get(item.suffix, None)
+                if src == None or item.ch not in src[1]:
+                    strip[:, :, i] = 0
+                else:
+                    self.gather_channel(strip[:, :, i], src[0][r0:r1, :, src[1][item.ch]], item.invert)
+            yield strip
+
+    def save_streamed(self, save_path:Path, sources:dict[str,tuple], pack_items:list[PackChItem], size:tuple[int,int], config:Config, tmp_dir:Path, tex_suffix:str=""):
+        width, height = size
+        bit_depth = str(config.bit_depth)
+        rows = config.stream_strip_rows
+        channels, mode = self.output_channels(pack_items)
+        if config.output_format in ("png", "tif", "tiff"): #encoded strip by strip
+            writer = ArrayWriter(config.get_compress_level(), rows_per_strip=rows)
+            strips = self.iter_strips(sources, pack_items, size, bit_depth, rows)
+            shape = (height, width, channels)
+            with self.atomic_write(save_path) as tmp:
+                if config.output_format == "png":
+                    writer.write_png(tmp, shape, self.BIT_DEPTHS[bit_depth], strips)
+                else:
+                    writer.write_tiff(tmp, shape, self.BIT_DEPTHS[bit_depth], strips)
+            return
+        # other formats are encoded by PIL from whole image, assembled in disk backed buffer
+        out = np.memmap(tmp_dir.joinpath("output.raw"), np.uint8, "w+", shape=(height, width, 1 if channels == 1 else 4))
+        for _ in self.iter_strips(sources, pack_items, size, bit_depth, rows, out):
+            pass
+        if config.output_format == "dds": #blocks are encoded from disk backed buffer
+            self.save_texture(out[:, :, :channels], save_path, config, tex_suffix)
+        else:
+            self.save_texture(self.array_to_image(out, mode), save_path, config, tex_suffix)
+        del out
+        tmp_dir.joinpath("output.raw").unlink()
+
+    def pack_group_streamed(self, grp_name:str, group_items:dict[str,Path], sets:list[tuple], config:Config, size:tuple[int,int])->list[tuple[str,str]]:
+        """
+        Out-of-core packing for very large textures, memory is bounded by strip size instead of image size.
+        Uncompressed sources are memory mapped and read in strips, compressed sources are decoded one at a time and their
+        referenced channels spilled to temporary files. Outputs are assembled strip by strip and streamed into the encoder.
+        sets - (target_name, target_config, pk_conf, target_dir) per target, sources are opened once for all targets.
+        Returns (target_name, suffix) of saved outputs.
+        """
+        self.log(f"[*] Streaming mode for '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}' ({size[0]}x{size[1]}), strips of {config.stream_strip_rows} rows")
+        referenced:dict[str,set[int]] = {}
+        for _, _, pk_conf, _ in sets:
+            for pack_items in pk_conf.values():
+                for itm in pack_items:
+                    referenced.setdefault(itm.suffix, set()).add(itm.ch)
+        saved = []
+        with tempfile.TemporaryDirectory(prefix="texture_packer_", dir=config.stream_temp_dir or None) as tmp_dir:
+            sources = {}
+            for suffix, channels in referenced.items():
+                src = self.open_strip_source(group_items.get(suffix, None), sorted(channels), Path(tmp_dir).joinpath("source"+suffix+".raw"))
+                if src == None and group_items.get(suffix, None) != None:
+                    self.add_error(grp_name, "decode", "not decoded", group_items[suffix])
+                if src != None:
+                    if src[0].shape[:2] != (size[1], size[0]):
+                        raise ValueError(f"Texture {suffix} size {src[0].shape[1]}x{src[0].shape[0]} differs from group size {size[0]}x{size[1]}")
+                    sources[suffix] = src
+            for name, tconf, pk_conf, target_dir in sets:
+                for tex_suffix, pack_items in pk_conf.items():
+                    if len(pack_items) == 0:
+                        self.log("[!] Warning: No channels to pack")
+                        continue
+                    save_path = self.get_save_path(grp_name, tex_suffix, tconf, target_dir)
+                    try:
+                        with self.span("write", "stream", path=str(save_path)) as trace_args:
+                            self.save_streamed(save_path, sources, pack_items, size, tconf, Path(tmp_dir), tex_suffix)
+                            self.stat_cache.invalidate(save_path)
+                            trace_args["bytes_written"] = self.traced_size(save_path)
+                    except Exception as e: #other outputs of the group are still written, like in memory packing
+                        self.log("[!] Texture <"+str(save_path)+"> not saved: "+f"{type(e).__name__}: {e}")
+                        self.add_error(grp_name, "write", f"{type(e).__name__}: {e}", save_path, name)
+                        continue
+                    self.log("[+] Save: "+str(save_path))
+                    saved.append((name, tex_suffix))
+            sources.clear() #close memory maps before temporary directory is removed
+        return saved
+
+    PIL_FORMATS = {"jpg":"JPEG", "tif":"TIFF"}
+
+    TMP_SUFFIX = ".tmp"
+
+    @contextmanager
+    def atomic_write(self, save_path:Path):
+        """
+        Yields temporary path next to save_path which is renamed over it once written, so an interrupted run never leaves
+        partially written output. Deduplicated (hardlinked) outputs are replaced instead of changed in place with their links.
+        """
+        tmp = save_path.with_name(save_path.name + self.TMP_SUFFIX)
+        try:
+            yield tmp
+            os.replace(tmp, save_path)
+        except BaseException:
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+            raise
+        finally:
+            self.stat_cache.invalidate(save_path)
+
+    def save_texture(self, tex:Image|np.ndarray, save_path:Path, config:Config, tex_suffix:str=""):
+        with self.stage("write", path=str(save_path)) as trace_args:
+            with self.atomic_write(save_path) as tmp:
+                self._save_texture(tex, tmp, config, tex_suffix)
+            trace_args["bytes_written"] = self.traced_size(save_path)
+
+    def _save_texture(self, tex:Image|np.ndarray, save_path:Path, config:Config, tex_suffix:str=""):
+        if config.output_format.lower() == "dds":
+            arr = tex if isinstance(tex, np.ndarray) else self.image_to_array(tex)
+            config.get_dds_writer().write(save_path, arr, config.is_normal_map(tex_suffix))
+        elif isinstance(tex, np.ndarray):
+            ArrayWriter(config.get_compress_level()).write(save_path, tex, config.output_format)
+        else:
+            fmt = config.output_format.lower()
+            tex.save(save_path, self.PIL_FORMATS.get(fmt, fmt.upper()), **config.get_encoder_params(fmt))
+
+    def check_config(self, config:Config)->tuple[Path,Path,bool]:
+        """Fail fast on invalid run settings and pack layout, before anything is scanned or decoded. Returns (src_dir, target_dir, dest_is_src)"""
         src_dir = Path(config.src_dir).resolve()
         target_dir = Path(config.dest_dir).resolve()
         dest_is_src = src_dir == target_dir
@@ -573,62 +3046,690 @@ class TexturePacker:
         if not src_dir.exists():
             print("[!] Src directory <"+str(src_dir)+"> does not exists")
             exit(1)
-        
-        src_files = [fl for fl in src_dir.iterdir() if fl.suffix.lower() in config.extensions]
 
-        groups = self.get_groups(src_files, src_dir, config.map_suffixes)
+        bit_depth = str(config.bit_depth)
+        if bit_depth not in self.BIT_DEPTH_NAMES:
+            print("[!] Unsupported bit depth <"+bit_depth+">, use one of: "+", ".join(self.BIT_DEPTH_NAMES))
+            exit(1)
+        if bit_depth != "8" and config.output_format not in ArrayWriter.FORMATS[bit_depth]:
+            print("[!] "+bit_depth+" bit output supports only formats: "+", ".join(ArrayWriter.FORMATS[bit_depth]))
+            exit(1)
 
-        print(f"[*] Found {len(groups)} texture group(s) to process")
+        try:
+            config.get_pack_plan()
+        except ValueError as e:
+            print("[!] Invalid pack layout: "+str(e))
+            exit(1)
+        if config.mip_filter not in DdsWriter.MIP_FILTERS:
+            print("[!] Unsupported mip filter <"+str(config.mip_filter)+">, use one of: "+", ".join(DdsWriter.MIP_FILTERS))
+            exit(1)
+        if config.dds_compression not in DdsWriter.COMPRESSIONS or config.dds_rgb_format not in ("bc1", "bc7"):
+            print("[!] Unsupported DDS compression, use one of: "+", ".join(DdsWriter.COMPRESSIONS)+" (rgb format: bc1, bc7)")
+            exit(1)
+        if config.resize_filter not in self.RESIZE_FILTERS:
+            print("[!] Unsupported resize filter <"+str(config.resize_filter)+">, use one of: "+", ".join(self.RESIZE_FILTERS))
+            exit(1)
+        if config.mipmaps and config.output_format != "dds":
+            print("[*] Mipmaps are written only to DDS outputs, ignored for "+config.output_format)
+        return src_dir, target_dir, dest_is_src
 
-        for grp_name in groups:
-            # Filter pack items is (owerwrite==True)
-            pk_conf = config.packer if config.owerwrite else self.get_filtered_packer_config(grp_name, target_dir)
-
-            # Validate if requested
-            if validate and pk_conf:
-                is_valid, missing = self.validate_group(grp_name, groups[grp_name], pk_conf)
-                if not is_valid:
-                    print(f"[!] Validation failed for '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}'")
-                    print(f"    Missing textures: {', '.join(missing)}")
-                    print(f"    Available textures: {', '.join(groups[grp_name].keys())}")
-                    print("    Skipping this group...")
-                    continue
+    def check_targets(self, config:Config)->tuple[Path,list[tuple[str,Config,Path,bool]]]:
+        """check_config() of every target (Config.get_targets()), returns (src_dir, [(target_name, target_config, target_dir, dest_is_src)])"""
+        try:
+            configs = config.get_targets()
+        except ValueError as e:
+            print("[!] Invalid target: "+str(e))
+            exit(1)
+        if config.targets and config.get_pack_lines() != Config().get_pack_lines() and all(spec.get("preset") or spec.get("pack") for spec in config.targets.values()):
+            print("[!] Top-level [pack] layout is not packed: every target sets own preset or pack lines")
+        src_dir = None
+        targets = []
+        for name, tconf in configs:
+            if name:
+                print(f"[*] Target '{name}': <{Path(tconf.dest_dir).resolve()}>")
+            src_dir, target_dir, dest_is_src = self.check_config(tconf)
+            targets.append((name, tconf, target_dir, dest_is_src))
+        return src_dir, targets
+
+    def output_dirs(self, targets:list[tuple])->list[Path]:
+        """Destination directories of targets excluded from source scan (except source directory itself)"""
+        return list(dict.fromkeys(target_dir for _, _, target_dir, dest_is_src in targets if not dest_is_src))
+
+    def open_manifests(self, targets:list[tuple])->dict[Path,BuildManifest]:
+        """Build manifests of incremental targets by destination directory (shared by targets writing to one directory)"""
+        manifests = {}
+        for _, tconf, target_dir, _ in targets:
+            if tconf.incremental and target_dir not in manifests:
+                manifests[target_dir] = BuildManifest(target_dir, self.stat_cache).load()
+        return manifests
+
+    def scan_groups(self, src_dir:Path, exclude_dirs:list[Path], config:Config)->dict[str,dict[str,Path]]:
+        with self.stage("scan", path=str(src_dir)) as trace_args:
+            src_files = self.scan_source_files(src_dir, config, exclude_dirs=exclude_dirs)
+            trace_args["files"] = len(src_files)
+
+        with self.stage("group") as trace_args:
+            groups = self.get_groups(src_files, src_dir, config.map_suffixes, config.get_suffix_matcher())
+            trace_args["groups"] = len(groups)
+        return groups
+
+    def run_key(self, targets:list[tuple])->str:
+        """Fingerprint of targets (destination, naming, format and layout of outputs), journal of other run is not resumed"""
+        data = [(name, str(target_dir), tconf.naming_scheme, bool(tconf.lowercase_names), tconf.output_format, str(tconf.bit_depth),
+                 {suffix:[tconf.get_layout_text(pack_items), tconf.get_output_options(suffix)] for suffix, pack_items in tconf.packer.items()}) for name, tconf, target_dir, _ in targets]
+        return hashlib.blake2b(json.dumps(data, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+    def pack_textures(self, config:Config, validate:bool=False)->bool:
+        """Pack all groups of config.src_dir, returns False if some group failed (see report_errors())"""
+        src_dir, targets = self.check_targets(config)
+
+        if config.trace_path:
+            self.tracer = Tracer()
+
+        groups = self.scan_groups(src_dir, self.output_dirs(targets), config.get_grouping_config())
+        print(f"[*] Found {len(groups)} texture group(s) to process")
+        if len(targets) > 1:
+            print(f"[*] Packing {len(targets)} targets ({', '.join(name for name, *_ in targets)}), sources are decoded once per group")
+        self.open_decode_cache(config)
+
+        jobs_count = config.jobs if config.jobs > 0 else (os.cpu_count() or 1)
+        manifests = self.open_manifests(targets)
+        constants = ConstantCache(Path(config.dest_dir).resolve(), self.stat_cache).load() if config.constants_cache and config.detect_constants else None
+        journal = RunJournal(Path(config.dest_dir).resolve(), self.run_key(targets)) if config.journal or config.resume else None
+        if journal != None and not journal.open(config.resume) and config.resume:
+            print("[!] No journal of previous run with the same targets in <"+str(journal.dest_dir)+">, packing all groups")
+        try:
+            self._pack_groups(groups, config, targets, validate, manifests, jobs_count, constants, journal)
+        finally:
+            if journal != None:
+                journal.close()
+            for manifest in manifests.values():
+                manifest.save()
+            if constants != None:
+                constants.save()
+            if self.decode_cache != None:
+                self.decode_cache.report()
+            if self.tracer != None:
+                self.tracer.save(config.trace_path)
+        return not self.errors
+
+    def print_plan(self, config:Config, validate:bool=False, report_path:str="")->bool:
+        """
+        Dry run (--plan): scan, group and plan like pack_textures() and print inputs, outputs and missing maps of every group.
+        No source is decoded and nothing is written except optional JSON report (report_path), with several targets
+        the report lists groups per target.
+        Returns False if some group misses source maps and validate is on (the group would be skipped).
+        """
+        src_dir, targets = self.check_targets(config)
+        groups = self.scan_groups(src_dir, self.output_dirs(targets), config.get_grouping_config())
+        manifests = self.open_manifests(targets)
+        reports = {}
+        to_pack = skipped = incomplete = 0
+        for name, tconf, target_dir, _ in targets:
+            if name:
+                print(f"[*] Target '{name}' > <{target_dir}>")
+            plan = tconf.get_pack_plan()
+            report = []
+            for group_plan in self.plan_groups(groups, tconf, target_dir, manifests.get(target_dir)):
+                grp_name = group_plan.name.replace(self.SUFFIX_PLACEHOLDER, "")
+                excluded = validate and bool(group_plan.missing)
+                inputs = {suffix:str(path) for suffix, path in group_plan.items.items() if suffix in plan.sources}
+                print(f"[*] {grp_name}" + (" (skipped by validation)" if excluded else ""))
+                print("    inputs: " + (", ".join(f"{suffix} < {Path(path).name}" for suffix, path in inputs.items()) or "none"))
+                outputs = {}
+                for tex_suffix in tconf.packer:
+                    out_plan = plan.outputs[tex_suffix]
+                    save_path, reason = group_plan.skipped.get(tex_suffix, (self.get_save_path(group_plan.name, tex_suffix, tconf, target_dir), None))
+                    missing = group_plan.missing.get(tex_suffix, [])
+                    layout = tconf.get_layout_text(out_plan.items[:out_plan.channels])
+                    if tconf.get_options_text(tex_suffix):
+                        layout += " " + tconf.OPTIONS_SIGN + " " + tconf.get_options_text(tex_suffix)
+                    if reason != None:
+                        print(f"    [-] {save_path.name}: skip ({reason})")
+                    else:
+                        print(f"    [+] {save_path.name}: {out_plan.mode or '-'} < {layout}")
+                        if missing:
+                            print(f"        [!] missing: {', '.join(missing)} (black channels)")
+                    outputs[tex_suffix] = {"path":str(save_path), "mode":out_plan.mode, "layout":layout, "skip":reason, "missing":missing}
+                if excluded:
+                    skipped += len(tconf.packer)
                 else:
-                    print(f"[+] Validation passed for '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}'")
+                    to_pack += len(group_plan.outputs)
+                    skipped += len(group_plan.skipped)
+                incomplete += 1 if group_plan.missing else 0
+                report.append({"group":grp_name, "inputs":inputs, "outputs":outputs, "skipped_by_validation":excluded})
+            reports[name] = {"dest_dir":str(target_dir), "groups":report}
+        print(f"[*] Plan: {len(groups)} group(s), {to_pack} output(s) to pack, {skipped} skipped, {incomplete} group(s) with missing maps")
+        if report_path:
+            summary = {"groups":len(groups), "to_pack":to_pack, "skipped":skipped, "incomplete_groups":incomplete}
+            if len(targets) > 1:
+                data = {"src_dir":str(src_dir), "targets":reports, "summary":summary}
+            else:
+                data = dict({"src_dir":str(src_dir)}, **reports[targets[0][0]], summary=summary)
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            print("[+] Save plan: "+report_path)
+        return not (validate and incomplete > 0)
+
+    def snapshot_sources(self, src_dir:Path, config:Config, exclude_dirs:list[Path])->dict[Path,tuple[int,int]]:
+        """Source files with their (mtime_ns, size) from scan listing, files removed while scanning are skipped"""
+        snapshot = {}
+        for path in self.scan_source_files(src_dir, config, exclude_dirs=exclude_dirs):
+            try:
+                st = self.stat_cache.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
 
-            tex_lookup = self.pack_material_stems(groups[grp_name], pk_conf)
-            
-            t_dir = target_dir.joinpath(grp_name).parent
-            if not t_dir.exists():
-                print("[!] Directory <"+str(t_dir)+"> does not exists, create it..")
-                t_dir.mkdir(parents=True)
-            
-            #save packed textures
-            for tex_suffix in tex_lookup:
-                # Get base name without placeholder
-                base_name = grp_name.replace(self.SUFFIX_PLACEHOLDER, "")
-
-                # Apply naming scheme (handles both standard and Unreal conventions)
-                formatted_name = config.apply_naming_scheme(base_name, tex_suffix)
-
-                # Create save path
-                save_path = target_dir.joinpath(formatted_name + "." + config.output_format).resolve()
-
-                #prevent silent overwrite sources
-                if dest_is_src and save_path.exists():
-                    print("[?] OVERWRITE SOURCE FILE: <"+str(save_path)+"> ?")
-                    print(" -> [Y] [ENTER] to overwrite")
-                    answ = input()
-                    if answ.lower() !="y":
-                        print("[!] Cancel")
+    def watch(self, config:Config, validate:bool=False):
+        """
+        Watch mode: pack everything once, then poll source directory (mtime/size snapshots) and repack only groups
+        whose member files were added, modified or removed, with current config.packer layout.
+        Bursts of changes are debounced, groups are kept in memory and updated from changed paths only.
+        Changed groups are always repacked (owerwrite on), incremental mode manifest is kept up to date.
+        With several targets a changed group is repacked to all of them.
+        """
+        src_dir = Path(config.src_dir).resolve()
+        watch_config = copy.copy(config)
+        watch_config.owerwrite = True
+        watch_config.trace_path = "" #trace of initial pass only
+        try:
+            targets = [(name, tconf, Path(tconf.dest_dir).resolve(), False) for name, tconf in watch_config.get_targets()]
+        except ValueError as e:
+            print("[!] Invalid target: "+str(e))
+            exit(1)
+        out_dirs = self.output_dirs(targets)
+        if src_dir in out_dirs:
+            print("[!] Watch mode needs destination directory different from source directory (outputs would trigger repacks)")
+            exit(1)
+        for _, tconf, _, _ in targets:
+            tconf.owerwrite = True
+        grouping = config.get_grouping_config()
+
+        snapshot = self.snapshot_sources(src_dir, grouping, out_dirs) if src_dir.exists() else {}
+        self.pack_textures(config, validate)
+
+        matcher = grouping.get_suffix_matcher()
+        groups = self.get_groups(list(snapshot), src_dir, grouping.map_suffixes, matcher)
+        members = {pth:(grp_name, suffix) for grp_name, itms in groups.items() for suffix, pth in itms.items()}
+        jobs_count = config.jobs if config.jobs > 0 else (os.cpu_count() or 1)
+
+        print(f"[*] Watching <{src_dir}> for changes (Ctrl+C to stop)")
+        try:
+            scan_error = ""
+            while True:
+                time.sleep(config.watch_interval)
+                try:
+                    current = self.snapshot_sources(src_dir, grouping, out_dirs)
+                    if current == snapshot:
+                        scan_error = ""
                         continue
+                    first_change = time.perf_counter()
+                    # debounce: wait until files stop changing (copy in progress, several maps exported at once)
+                    settled = time.perf_counter()
+                    while time.perf_counter() - settled < config.watch_debounce:
+                        time.sleep(min(config.watch_interval, config.watch_debounce))
+                        latest = self.snapshot_sources(src_dir, grouping, out_dirs)
+                        if latest != current:
+                            current = latest
+                            settled = time.perf_counter()
+                except OSError as e: #directory removed or renamed while scanned, retried on next poll
+                    if str(e) != scan_error:
+                        print("[!] Scan failed, retrying: " + str(e))
+                    scan_error = str(e)
+                    continue
+                scan_error = ""
+
+                changed = [pth for pth in current.keys() | snapshot.keys() if current.get(pth) != snapshot.get(pth)]
+                snapshot = current
+                affected = set()
+                for pth in changed:
+                    old = members.pop(pth, None)
+                    if old != None:
+                        grp_name, suffix = old
+                        affected.add(grp_name)
+                        if groups.get(grp_name, {}).get(suffix) == pth:
+                            del groups[grp_name][suffix]
+                            if not groups[grp_name]:
+                                del groups[grp_name]
+                    if pth in current:
+                        for grp_name, itms in self.get_groups([pth], src_dir, grouping.map_suffixes, matcher).items():
+                            for suffix, path in itms.items():
+                                groups.setdefault(grp_name, {})[suffix] = path
+                                members[path] = (grp_name, suffix)
+                            affected.add(grp_name)
+
+                repack = {grp_name:groups[grp_name] for grp_name in sorted(affected) if grp_name in groups}
+                if not repack:
+                    continue
+                names = ", ".join(grp_name.replace(self.SUFFIX_PLACEHOLDER, "") for grp_name in repack)
+                print(f"[*] {len(changed)} source file(s) changed, repacking {len(repack)} group(s): {names}")
+                manifests = self.open_manifests(targets)
+                constants = ConstantCache(Path(config.dest_dir).resolve(), self.stat_cache).load() if config.constants_cache and config.detect_constants else None
+                try:
+                    self._pack_groups(repack, watch_config, targets, validate, manifests, min(jobs_count, len(repack)), constants)
+                finally:
+                    for manifest in manifests.values():
+                        manifest.save()
+                    if constants != None:
+                        constants.save()
+                print(f"[+] Repacked in {time.perf_counter() - first_change:.2f} s after change detected")
+        except KeyboardInterrupt:
+            print("[*] Watch stopped")
+
+    def _record_saved(self, manifest:BuildManifest, grp_name:str, group_items:dict[str,Path], saved:list[str], config:Config, target_dir:Path):
+        if manifest == None:
+            return
+        for tex_suffix in saved:
+            manifest.record(self.get_save_path(grp_name, tex_suffix, config, target_dir), group_items, config.packer[tex_suffix], config, tex_suffix)
+
+    def _pack_groups(self, groups:dict[str,dict[str,Path]], config:Config, targets:list[tuple], validate:bool, manifests:dict[Path,BuildManifest], jobs_count:int, constants:ConstantCache=None, journal:RunJournal=None):
+        """
+        Pack groups to every target (check_targets()), outputs of all targets of a group are packed by one job from one decode of its sources.
+        manifests - build manifests by destination directory (open_manifests()), incremental targets only.
+        journal - groups completed without errors are appended, groups completed by resumed run are skipped.
+        A failed group doesn't stop the run, errors are reported at its end.
+        """
+        parallel = jobs_count > 1
+        self.reset_constants()
+        self.reset_errors()
+        by_name = {name:(tconf, target_dir) for name, tconf, target_dir, _ in targets}
+        plans = [self.plan_groups(groups, tconf, target_dir, manifests.get(target_dir)) for _, tconf, target_dir, _ in targets]
+        jobs = []
+        resumed = 0
+        for index, grp_name in enumerate(groups):
+            if journal != None and grp_name.replace(self.SUFFIX_PLACEHOLDER, "") in journal.done:
+                resumed += 1
+                continue
+            sets = []
+            for (name, tconf, target_dir, dest_is_src), group_plans in zip(targets, plans):
+                group_plan = group_plans[index]
+                label = grp_name.replace(self.SUFFIX_PLACEHOLDER, '') + (f"' (target {name})" if name else "'")
+                # Filtered pack items (up to date or existing outputs)
+                for excl_path, reason in group_plan.skipped.values():
+                    print("[-] Skip: " + str(excl_path) + " (" + reason + ")")
+                pk_conf = group_plan.outputs
+
+                # Validate if requested
+                if validate and pk_conf:
+                    missing = group_plan.missing_sources()
+                    if missing:
+                        print(f"[!] Validation failed for '{label}")
+                        print(f"    Missing textures: {', '.join(missing)}")
+                        print(f"    Available textures: {', '.join(groups[grp_name].keys())}")
+                        print("    Skipping this group...")
+                        continue
+                    else:
+                        print(f"[+] Validation passed for '{label}")
 
-                if tex_lookup[tex_suffix] != None: #if output texture suffix described in config.packer but no source texture channels exists, <None> goes here, nasty bug fixed!
-                    tex_lookup[tex_suffix].save(save_path,config.output_format) # finally, save the file
-                    print("[+] Save: "+str(save_path))
+                #prevent silent overwrite sources, interactive prompt stays in main process
+                if dest_is_src:
+                    pk_conf = self.confirm_source_overwrite(grp_name, pk_conf, tconf, target_dir)
+                sets.append((name, tconf, pk_conf, target_dir, set()))
+            if not sets:
+                continue
+
+            known = constants.known(groups[grp_name]) if constants != None else {}
+            jobs.append((grp_name, groups[grp_name], sets, config, known))
+        if resumed:
+            print(f"[*] Resume: {resumed} group(s) completed by previous run skipped")
+
+        links = self.plan_duplicates(jobs, config) if config.dedup else []
+        linked = {grp_name for _, _, grp_name, _, _ in links} #journaled once their duplicates are linked
+        completed = lambda grp_name: self._journal_group(journal, grp_name) if grp_name not in linked else None
+        if not parallel:
+            # one writer for all groups, outputs of a group are encoded while sources of next groups are prefetched and decoded
+            with TextureWriter(self, config.write_threads) as writer, SourcePrefetcher(self, config, jobs) as prefetcher:
+                for index, (grp_name, group_items, sets, _, known) in enumerate(jobs):
+                    on_saved = lambda name, tex_suffix, grp_name=grp_name: self._record_saved(manifests.get(by_name[name][1]), grp_name, groups[grp_name], [tex_suffix], *by_name[name])
+                    try:
+                        self.pack_group_targets(grp_name, group_items, sets, config, writer, on_saved, prefetcher.take(index), known)
+                    except Exception as e: #isolated, next groups are packed
+                        print(f"[!] Group '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}' failed: {type(e).__name__}: {e}")
+                        self.add_error(grp_name, "pack", f"{type(e).__name__}: {e}")
+                        continue
+                    writer.after(lambda grp_name=grp_name: completed(grp_name))
+            self.link_duplicates(links, config, manifests, groups, by_name)
+            for grp_name in linked:
+                self._journal_group(journal, grp_name)
+            self._finish_constants(config, constants)
+            self.report_errors(config)
+            return
+
+        print(f"[*] Packing {len(jobs)} group(s) with {jobs_count} worker processes")
+        with futures.ProcessPoolExecutor(max_workers=jobs_count) as executor:
+            # map() yields results in submission order, so console output stays in group order
+            for grp_name, output, saved, errors, times, trace, found, decoded in executor.map(_pack_group_job, jobs):
+                print(output, end="")
+                self.add_stage_times(times)
+                self.merge_constants(found)
+                if decoded != None and self.decode_cache != None:
+                    self.decode_cache.merge(decoded)
+                if trace != None and self.tracer != None:
+                    self.tracer.merge(trace)
+                for name, tex_suffix in saved: #written by worker process
+                    tconf, target_dir = by_name[name]
+                    self.stat_cache.invalidate(self.get_save_path(grp_name, tex_suffix, tconf, target_dir))
+                    self._record_saved(manifests.get(target_dir), grp_name, groups[grp_name], [tex_suffix], tconf, target_dir)
+                for err in errors: #of worker process
+                    if err["stage"] == "pack":
+                        print(f"[!] Group '{grp_name.replace(self.SUFFIX_PLACEHOLDER, '')}' failed: {err['error']}")
+                    self.errors.append(err)
+                    self.failed_groups.add(grp_name)
+                completed(grp_name)
+        self.link_duplicates(links, config, manifests, groups, by_name)
+        for grp_name in linked:
+            self._journal_group(journal, grp_name)
+        self._finish_constants(config, constants)
+        self.report_errors(config)
+
+    def _journal_group(self, journal:RunJournal, grp_name:str):
+        if journal != None and grp_name not in self.failed_groups:
+            journal.add(grp_name.replace(self.SUFFIX_PLACEHOLDER, ""))
+
+    def plan_duplicates(self, jobs:list[tuple], config:Config)->list[tuple[Path,Path,str,str,str]]:
+        """
+        Dedup mode: hash sources of all jobs and find outputs identical (layout, size, encoder settings, source contents) to an output
+        of an earlier job or target. Their suffixes are added to the duplicates set of the job target,
+        returns (first_path, save_path, group_name, target_name, tex_suffix) of every duplicate.
+        """
+        self.dedup = DedupIndex(self.stat_cache, config.scan_threads, config.dedup_memory)
+        with self.stage("hash") as trace_args:
+            self.dedup.hash_sources([group_items[itm.suffix] for _, group_items, sets, *_ in jobs for _, _, pk_conf, _, _ in sets for pack_items in pk_conf.values() for itm in pack_items if itm.suffix in group_items])
+            trace_args["hashed"] = len(self.dedup.hashes)
+        links = []
+        for grp_name, group_items, sets, _, _ in jobs:
+            all_conf = {(name, tex_suffix):pack_items for name, _, pk_conf, _, _ in sets for tex_suffix, pack_items in pk_conf.items()}
+            size = SourceCache(self, group_items, all_conf).group_size() if all_conf else None
+            for name, tconf, pk_conf, target_dir, duplicates in sets:
+                plan = tconf.get_pack_plan()
+                for tex_suffix, pack_items in pk_conf.items():
+                    out_plan = plan.get(tex_suffix, pack_items)
+                    save_path = self.get_save_path(grp_name, tex_suffix, tconf, target_dir)
+                    key = self.dedup.output_key(tex_suffix, out_plan, out_plan.target_size(size), group_items) + tconf.get_encoder_key(tex_suffix)
+                    first = self.dedup.first_output(key, save_path)
+                    if first != None:
+                        duplicates.add(tex_suffix)
+                        links.append((first, save_path, grp_name, name, tex_suffix))
+        if self.dedup.hashes:
+            print(f"[*] Dedup: {len(self.dedup.hashes)} source(s) hashed, {len(self.dedup.shared)} shared by several files, {len(links)} duplicate output(s)")
+        return links
+
+    def link_duplicates(self, links:list[tuple[Path,Path,str,str,str]], config:Config, manifests:dict[Path,BuildManifest], groups:dict[str,dict[str,Path]], by_name:dict[str,tuple[Config,Path]]):
+        """Write duplicate outputs as hardlinks (or copies) of the first encode, once all outputs are written"""
+        for first, save_path, grp_name, name, tex_suffix in links:
+            if not self.stat_cache.exists(first):
+                print("[!] Output <"+str(first)+"> not written, duplicate <"+str(save_path)+"> skipped")
+                self.add_error(grp_name, "link", "output "+str(first)+" not written", save_path, name)
+                continue
+            self.stat_cache.make_dir(save_path.parent)
+            tmp = save_path.with_name(save_path.name + ".tmp")
+            try:
+                tmp.unlink(missing_ok=True)
+                try:
+                    if config.dedup_link != "hardlink":
+                        raise OSError("copy requested")
+                    os.link(first, tmp)
+                    how = "Link"
+                except OSError: #other filesystem, no hardlink support
+                    shutil.copyfile(first, tmp)
+                    how = "Copy"
+                os.replace(tmp, save_path)
+            except OSError as e:
+                print("[!] Duplicate <"+str(save_path)+"> not written: "+str(e))
+                self.add_error(grp_name, "link", str(e), save_path, name)
+                continue
+            self.stat_cache.invalidate(save_path)
+            print("[+] "+how+": "+str(save_path)+" (same as "+first.name+")")
+            tconf, target_dir = by_name[name]
+            self._record_saved(manifests.get(target_dir), grp_name, groups[grp_name], [tex_suffix], tconf, target_dir)
+        if self.dedup != None and self.dedup.band_hits:
+            print(f"[*] Dedup: {self.dedup.band_hits} decode(s) shared between groups")
+        self.dedup = None
+
+    def _finish_constants(self, config:Config, constants:ConstantCache):
+        if constants != None:
+            constants.add(self.found_constants)
+        self.report_constants(config)
+
+
+def pack(config:Config, sources:dict[str,object], as_array:bool=False, log=None)->dict[str,Image|np.ndarray]:
+    """
+    Library API: pack one material in memory, no files are written, nothing is printed and sys.argv is not read.
+    config - Config (e.g. Config().load_from_file(path) or Config() with apply_preset()), reusable between calls.
+    sources - source textures by suffix ("_ao", "_base_color", ...): file path, encoded file bytes, PIL image or HxW(xC) array
+              (uint8, uint16, int32 16 bit values or float 0..1).
+    Returns packed textures by output suffix of config.packer: PIL image for 8 bit outputs (HxWxC array with as_array=True),
+    HxWxC array for 16 and 32f bit depth. Outputs without any available source are omitted.
+    log - callable receiving warnings (missing channels, decode errors), silent by default.
+    """
+    return TexturePacker(log=log).pack_sources(config, sources, as_array)
+
+
+def _run_server_job(job:dict, base_config:Config)->dict:
+    """
+    Server worker entry point. Job kinds:
+    - directory: {"src_dir", "dest_dir", ...config keys} - same as command line run
+    - material:  {"sources": {suffix: path}, "dest_dir", "name", ...config keys} - one material, outputs saved as dest_dir/name+suffix
+    Job config keys (see Config.load_from_dict) are applied over server config (-c / -p).
+    Returns result with saved outputs, captured log and stage timings.
+    """
+    output = io.StringIO()
+    packer = TexturePacker()
+    result = {}
+    with redirect_stdout(output):
+        try:
+            config = copy.deepcopy(base_config).load_from_dict(job)
+            config.src_dir = job.get("src_dir", config.src_dir)
+            config.dest_dir = job.get("dest_dir", config.dest_dir)
+            if "sources" in job:
+                target_dir = Path(config.dest_dir).resolve()
+                target_dir.mkdir(parents=True, exist_ok=True)
+                grp_name = str(job.get("name", "texture")) + packer.SUFFIX_PLACEHOLDER
+                saved = []
+                for tex_suffix, tex in packer.pack_sources(config, job["sources"]).items():
+                    save_path = packer.get_save_path(grp_name, tex_suffix, config, target_dir)
+                    packer.save_texture(tex, save_path, config, tex_suffix)
+                    saved.append(str(save_path))
+                result["saved"] = saved
+            else:
+                if Path(config.src_dir).resolve() == Path(config.dest_dir).resolve():
+                    raise ValueError("dest_dir must differ from src_dir in server mode (no overwrite prompt)")
+                packer.pack_textures(config, validate=bool(job.get("validate", False)))
+                result["errors"] = packer.errors
+                result["failed_groups"] = list(dict.fromkeys(err["group"] for err in packer.errors))
+            result["status"] = "partial" if result.get("errors") else "done" #partial: failed groups, other groups packed
+        except SystemExit:
+            result["status"] = "failed"
+            result["error"] = "job aborted, see log"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["log"] = output.getvalue()
+    result["stages_s"] = packer.stage_times
+    return result
+
+
+class PackServer:
+    """
+    Resident job server: pack jobs are posted as JSON over localhost HTTP or HTTP over Unix socket and run on a pool
+    of warm worker processes (no interpreter, PIL and NumPy startup per job). Jobs use the config syntax ([pack] lines,
+    presets, settings), concurrency is limited by worker count and waiting jobs by queue size.
+    API:
+        POST /jobs           job JSON ({"wait": true} responds when finished) -> {"id", "status", ...}
+        GET  /jobs/<id>      status (queued, running, done, partial, failed), timings, saved outputs, errors and log
+        GET  /jobs           all known jobs (without logs)
+        GET  /health         worker and queue state
+    """
+
+    def __init__(self, config:Config) -> None:
+        self.config = config
+        self.workers = max(int(config.serve_workers), 1)
+        self.executor = futures.ProcessPoolExecutor(max_workers=self.workers)
+        self.dispatcher = futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dispatch") #one thread per busy worker, jobs wait in its queue
+        self.jobs:dict[str,dict] = {}
+        self.lock = threading.Lock()
+        self.next_id = 1
+
+    def active_count(self)->int:
+        return sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    def submit(self, data:dict)->dict:
+        with self.lock:
+            if self.active_count() >= self.workers + self.config.serve_queue:
+                return None
+            job_id = str(self.next_id)
+            self.next_id += 1
+            job = {"id":job_id, "status":"queued", "submitted":time.time()}
+            job["future"] = self.dispatcher.submit(self._run, job, data) #_run waits for the lock, job is complete when published
+            self.jobs[job_id] = job
+            self._trim_history()
+        return job
+
+    def get_job(self, job_id:str)->dict:
+        with self.lock:
+            return self.jobs.get(job_id, None)
+
+    def list_jobs(self)->list[dict]:
+        with self.lock:
+            return list(self.jobs.values())
+
+    def _run(self, job:dict, data:dict):
+        with self.lock:
+            job["status"] = "running"
+            job["started"] = time.time()
+            job["queued_s"] = job["started"] - job["submitted"]
+        try:
+            result = self.executor.submit(_run_server_job, data, self.config).result()
+        except Exception as e: #worker process crashed
+            result = {"status":"failed", "error":f"{type(e).__name__}: {e}"}
+        with self.lock:
+            job.update(result)
+            job["finished"] = time.time()
+            job["run_s"] = job["finished"] - job["started"]
+        print(f"[*] Job {job['id']} {job['status']} in {job['run_s']:.2f} s" + (": "+job["error"] if job.get("error") else ""))
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["status"] not in ("queued", "running")]
+        for job_id in finished[:max(len(finished) - self.config.serve_history, 0)]:
+            del self.jobs[job_id]
+
+    def job_state(self, job:dict, log:bool=True)->dict:
+        with self.lock:
+            return {k:v for k, v in job.items() if k != "future" and (log or k != "log")}
+
+    def health(self)->dict:
+        with self.lock:
+            states = [job["status"] for job in self.jobs.values()]
+        return {"status":"ok", "workers":self.workers, "active":states.count("queued") + states.count("running"), "max_queue":self.config.serve_queue}
+
+    def handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def address_string(self):
+                return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+            def log_message(self, format, *args):
+                pass
+
+            def respond(self, code:int, data:dict):
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.rstrip("/")
+                job = server.get_job(path[6:]) if path.startswith("/jobs/") else None
+                if path == "/health":
+                    self.respond(200, server.health())
+                elif path == "/jobs":
+                    self.respond(200, {"jobs":[server.job_state(job, log=False) for job in server.list_jobs()]})
+                elif job != None:
+                    self.respond(200, server.job_state(job))
+                else:
+                    self.respond(404, {"error":"not found"})
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/jobs":
+                    self.respond(404, {"error":"not found"})
+                    return
+                try:
+                    data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    if not isinstance(data, dict):
+                        raise ValueError("job must be JSON object")
+                except ValueError as e:
+                    self.respond(400, {"error":"invalid job: "+str(e)})
+                    return
+                job = server.submit(data)
+                if job == None:
+                    self.respond(503, {"error":"job queue is full"})
+                    return
+                if data.get("wait", False):
+                    job["future"].result()
+                self.respond(202 if job["status"] in ("queued", "running") else 200, server.job_state(job))
+
+        return Handler
+
+    def serve(self, address:str):
+        import socketserver
+        from http.server import ThreadingHTTPServer
+        handler = self.handler_class()
+        if address.startswith("unix:"):
+            path = address[5:]
+            if os.path.exists(path):
+                os.unlink(path)
+            class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+            httpd = UnixHTTPServer(path, handler)
+        else:
+            host, _, port = address.rpartition(":")
+            httpd = ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+        # start workers now, so the first job doesn't pay process startup
+        for future in [self.executor.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+        print(f"[*] Serving pack jobs on {address} with {self.workers} worker(s) (Ctrl+C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("[*] Server stopped")
+        finally:
+            httpd.server_close()
+            self.dispatcher.shutdown(cancel_futures=True)
+            self.executor.shutdown(cancel_futures=True)
+            if address.startswith("unix:") and os.path.exists(address[5:]):
+                os.unlink(address[5:])
+
+
+def _pack_group_job(job:tuple)->tuple[str, str, list[tuple[str,str]], list[dict], dict[str,float], dict, dict, dict]:
+    """
+    Process pool entry point, packs and saves one texture group for all its targets.
+    Console output of the worker is captured and returned to the main process with saved outputs, errors (add_error() records),
+    stage timings, trace events, found constants and decode cache counters:
+    (group_name, output, saved (target_name, suffix) pairs, errors, stage_times, trace, constants, decode_cache_stats)
+    """
+    grp_name, group_items, sets, config, known = job
+    output = io.StringIO()
+    saved = []
+    packer = TexturePacker()
+    packer.tracer = Tracer() if config.trace_path else None
+    packer.open_decode_cache(config)
+    with redirect_stdout(output):
+        try:
+            saved = packer.pack_group_targets(grp_name, group_items, sets, config, known_constants=known)
+        except Exception as e:
+            packer.add_error(grp_name, "pack", f"{type(e).__name__}: {e}")
+    return grp_name, output.getvalue(), saved, packer.errors, packer.stage_times, packer.tracer.export() if packer.tracer != None else None, packer.export_constants(), packer.decode_cache.stats if packer.decode_cache != None else None
 
-if __name__ == "__main__":
 
+def main(argv:list[str]=None):
+    """Command line entry point, PIL and NumPy are imported only once pixels are decoded or packed"""
+    args = build_parser().parse_args(argv)
 
     tmr = time.perf_counter()
 
@@ -649,6 +3750,15 @@ if __name__ == "__main__":
         # Override config params from commandline
         config.override_params(args.__dict__)
 
+    if args.target_specs:
+        try:
+            config.targets = {}
+            for spec in args.target_specs:
+                config.add_target_text(spec)
+        except ValueError as e:
+            print("[!] Invalid target: "+str(e))
+            exit(1)
+
     # Validate BMP support
     if ".bmp" not in config.extensions:
         config.extensions.append(".bmp")
@@ -663,9 +3773,33 @@ if __name__ == "__main__":
         print("[*] VALIDATION mode: will check for missing textures")
 
     packer = TexturePacker()
-    packer.pack_textures(config, validate=args.validate)
+    ok = True
+    if args.serve:
+        PackServer(config).serve(args.serve)
+    elif args.plan_path:
+        if not packer.print_plan(config, validate=args.validate, report_path="" if args.plan_path == "-" else args.plan_path):
+            exit(1)
+    elif args.watch:
+        packer.watch(config, validate=args.validate)
+    elif args.profile_path:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(packer.pack_textures, config, validate=args.validate)
+        finally:
+            profiler.dump_stats(args.profile_path)
+            print("[+] Save profile: "+args.profile_path)
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+    else:
+        ok = packer.pack_textures(config, validate=args.validate)
 
 
-    tmr = round((time.perf_counter()-tmr))
-    print("Texture packing complete. Elapsed time: "+str(tmr) + " s")
+    tmr = time.perf_counter()-tmr
+    print(f"Texture packing complete. Elapsed time: {tmr:.2f} s")
+    if not ok:
+        exit(1)
 
+
+if __name__ == "__main__":
+    main()